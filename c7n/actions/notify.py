@@ -4,6 +4,7 @@
 
 import base64
 import copy
+import uuid
 import zlib
 
 from .core import EventAction
@@ -102,10 +103,38 @@ class Notify(BaseNotify):
                        attributes:
                           attribute_key: attribute_value
                           attribute_key_2: attribute_value_2
+
+    Resources are sent in messages of up to 250 resources, split further
+    as needed to fit within the transport's message size limit, and
+    multiple messages are sent with batch api calls. A resource whose
+    message is still too large can be stored in s3 with ``s3_spill``, in
+    which case a message pointing to the s3 object is sent instead,
+    c7n-mailer retrieves it from there.
+
+    .. code-block:: yaml
+
+              policies:
+                - name: iam-role-notify
+                  resource: iam-role
+                  actions:
+                   - type: notify
+                     to:
+                      - email@address
+                     template: policy-template
+                     transport:
+                       type: sqs
+                       queue: xyz
+                       s3_spill: s3://my-notify-bucket/spill
     """
 
     C7N_DATA_MESSAGE = "maidmsg/1.0"
 
+    # Size limit of sqs messages and sns notifications, and of their batches.
+    MAX_MESSAGE_SIZE = 256 * 1024
+    # Allowance for the envelope of sns notifications delivered to sqs.
+    SNS_ENVELOPE_SIZE = 4 * 1024
+    MAX_BATCH_ENTRIES = 10
+
     schema_alias = True
     schema = {
         'type': 'object',
@@ -129,13 +158,15 @@ class Notify(BaseNotify):
                      'required': ['type', 'queue'],
                      'properties': {
                          'queue': {'type': 'string'},
-                         'type': {'enum': ['sqs']}}},
+                         'type': {'enum': ['sqs']},
+                         's3_spill': {'type': 'string'}}},
                     {'type': 'object',
                      'required': ['type', 'topic'],
                      'properties': {
                          'topic': {'type': 'string'},
                          'type': {'enum': ['sns']},
                          'attributes': {'type': 'object'},
+                         's3_spill': {'type': 'string'},
                      }}]
             },
             'assume_role': {'type': 'boolean'}
@@ -155,11 +186,14 @@ class Notify(BaseNotify):
         return self
 
     def get_permissions(self):
+        perms = ()
         if self.data.get('transport', {}).get('type') == 'sns':
-            return ('sns:Publish',)
-        if self.data.get('transport', {'type': 'sqs'}).get('type') == 'sqs':
-            return ('sqs:SendMessage',)
-        return ()
+            perms = ('sns:Publish',)
+        elif self.data.get('transport', {'type': 'sqs'}).get('type') == 'sqs':
+            perms = ('sqs:SendMessage',)
+        if perms and self.data.get('transport', {}).get('s3_spill'):
+            perms += ('s3:PutObject',)
+        return perms
 
     def process(self, resources, event=None):
         alias = utils.get_account_alias_from_sts(
@@ -177,12 +211,82 @@ class Notify(BaseNotify):
             'policy': self.manager.data}
         message['action'] = self.expand_variables(message)
 
+        # clients are reused across the messages of an execution.
+        self.clients = {}
+        limit = self.MAX_MESSAGE_SIZE - self.get_attributes_size()
+        if self.data['transport']['type'] == 'sns':
+            limit -= self.SNS_ENVELOPE_SIZE
+        packed = []
         for batch in utils.chunks(resources, self.batch_size):
-            message['resources'] = self.prepare_resources(batch)
-            receipt = self.send_data_message(message)
+            packed.extend(self.pack_resources(message, batch, limit))
+        message['resources'] = []
+        receipts = self.send_data_messages(message, [body for body, count in packed])
+        for receipt, (body, count) in zip(receipts, packed):
             self.log.info("sent message:%s policy:%s template:%s count:%s" % (
                 receipt, self.manager.data['name'],
-                self.data.get('template', 'default'), len(batch)))
+                self.data.get('template', 'default'), count))
+
+    def pack_resources(self, message, resources, limit):
+        """Pack resources into messages that fit within the size limit.
+
+        Returns a list of packed message bodies and their resource counts.
+        """
+        message['resources'] = self.prepare_resources(resources)
+        body = self.pack(message)
+        if len(body) <= limit:
+            return [(body, len(resources))]
+        if len(resources) > 1:
+            mid = len(resources) // 2
+            return (self.pack_resources(message, resources[:mid], limit) +
+                    self.pack_resources(message, resources[mid:], limit))
+        if self.data['transport'].get('s3_spill'):
+            return [(self.spill_message(message, body), 1)]
+        # leave it to the transport to reject
+        return [(body, 1)]
+
+    def spill_message(self, message, body):
+        """Store a packed message in s3, returning a message pointing to it."""
+        s3_path, bucket, key_prefix = utils.parse_s3(self.data['transport']['s3_spill'])
+        key = "/".join(filter(None, (
+            key_prefix.strip('/'), self.manager.data['name'],
+            self.manager.ctx.execution_id, "%s.b64" % uuid.uuid4().hex)))
+        self.get_client('s3', self.manager.config.region).put_object(
+            Bucket=bucket, Key=key, Body=body.encode('ascii'))
+        return self.pack({
+            'c7n:payload': "s3://%s/%s" % (bucket, key),
+            'policy': {'name': self.manager.data['name']},
+            'account_id': message['account_id'],
+            'region': message['region']})
+
+    def get_client(self, service, region):
+        clients = getattr(self, 'clients', None)
+        if clients is None:
+            clients = self.clients = {}
+        if (service, region) not in clients:
+            clients[(service, region)] = self.manager.session_factory(
+                region=region, assume=self.assume_role).client(service)
+        return clients[(service, region)]
+
+    def get_message_attributes(self):
+        attrs = {
+            'mtype': {
+                'DataType': 'String',
+                'StringValue': self.C7N_DATA_MESSAGE,
+            },
+        }
+        if self.data['transport']['type'] != 'sns':
+            return attrs
+        user_attributes = self.data['transport'].get('attributes')
+        if user_attributes:
+            for k, v in user_attributes.items():
+                if k != 'mtype':
+                    attrs[k] = {'DataType': 'String', 'StringValue': v}
+        return attrs
+
+    def get_attributes_size(self):
+        return sum(
+            len(k) + len(v['DataType']) + len(str(v['StringValue']))
+            for k, v in self.get_message_attributes().items())
 
     def prepare_resources(self, resources):
         """Resources preparation for transport.
@@ -234,11 +338,75 @@ class Notify(BaseNotify):
         elif self.data['transport']['type'] == 'sns':
             return self.send_sns(message)
 
-    def send_sns(self, message):
+    def send_data_messages(self, message, bodies):
+        """Send packed message bodies, returning their message ids."""
+        attrs = self.get_message_attributes()
+        if self.data['transport']['type'] == 'sqs':
+            region, queue_url = self.get_sqs_destination(message)
+            client = self.get_client('sqs', region)
+            return self.send_batches(
+                bodies,
+                lambda entries: client.send_message_batch(
+                    QueueUrl=queue_url, Entries=[
+                        {'Id': i, 'MessageBody': b, 'MessageAttributes': attrs}
+                        for i, b in entries]),
+                lambda body: client.send_message(
+                    QueueUrl=queue_url, MessageBody=body,
+                    MessageAttributes=attrs)['MessageId'])
+        elif self.data['transport']['type'] == 'sns':
+            region, topic_arn = self.get_sns_destination(message)
+            client = self.get_client('sns', region)
+            return self.send_batches(
+                bodies,
+                lambda entries: client.publish_batch(
+                    TopicArn=topic_arn, PublishBatchRequestEntries=[
+                        {'Id': i, 'Message': b, 'MessageAttributes': attrs}
+                        for i, b in entries]),
+                lambda body: client.publish(
+                    TopicArn=topic_arn, Message=body,
+                    MessageAttributes=attrs)['MessageId'])
+        return []
+
+    def send_batches(self, bodies, send_batch, send):
+        """Send bodies in batches of up to ten entries within the size limit.
+
+        Entries that fail in a batch are retried individually.
+        """
+        receipts = {}
+        for entries in self.get_batches(bodies):
+            if len(entries) == 1:
+                receipts[entries[0][0]] = send(entries[0][1])
+                continue
+            result = send_batch(entries)
+            for r in result.get('Successful', ()):
+                receipts[r['Id']] = r['MessageId']
+            bodies_by_id = dict(entries)
+            for r in result.get('Failed', ()):
+                self.log.warning(
+                    "retrying failed batch message policy:%s error:%s",
+                    self.manager.data['name'], r.get('Message', r.get('Code')))
+                receipts[r['Id']] = send(bodies_by_id[r['Id']])
+        return [receipts[str(i)] for i in range(len(bodies))]
+
+    def get_batches(self, bodies):
+        # message attributes count toward the batch size limit.
+        attrs_size = self.get_attributes_size()
+        batch, size = [], 0
+        for i, body in enumerate(bodies):
+            entry_size = len(body) + attrs_size
+            if batch and (len(batch) == self.MAX_BATCH_ENTRIES or
+                          size + entry_size > self.MAX_MESSAGE_SIZE):
+                yield batch
+                batch, size = [], 0
+            batch.append((str(i), body))
+            size += entry_size
+        if batch:
+            yield batch
+
+    def get_sns_destination(self, message):
         topic = self.data['transport']['topic'].format(**message)
-        user_attributes = self.data['transport'].get('attributes')
         if topic.startswith('arn:'):
-            region = region = topic.split(':', 5)[3]
+            region = topic.split(':', 5)[3]
             topic_arn = topic
         else:
             region = message['region']
@@ -246,26 +414,18 @@ class Notify(BaseNotify):
                 service='sns', resource=topic,
                 account_id=message['account_id'],
                 region=message['region'])
-        client = self.manager.session_factory(
-            region=region, assume=self.assume_role).client('sns')
-        attrs = {
-            'mtype': {
-                'DataType': 'String',
-                'StringValue': self.C7N_DATA_MESSAGE,
-            },
-        }
-        if user_attributes:
-            for k, v in user_attributes.items():
-                if k != 'mtype':
-                    attrs[k] = {'DataType': 'String', 'StringValue': v}
-        result = client.publish(
+        return region, topic_arn
+
+    def send_sns(self, message):
+        region, topic_arn = self.get_sns_destination(message)
+        result = self.get_client('sns', region).publish(
             TopicArn=topic_arn,
             Message=self.pack(message),
-            MessageAttributes=attrs
+            MessageAttributes=self.get_message_attributes()
         )
         return result['MessageId']
 
-    def send_sqs(self, message):
+    def get_sqs_destination(self, message):
         queue = self.data['transport']['queue'].format(**message)
         if queue.startswith('https://queue.amazonaws.com'):
             region = 'us-east-1'
@@ -289,18 +449,14 @@ class Notify(BaseNotify):
             queue_name = queue
             queue_url = "https://sqs.%s.amazonaws.com/%s/%s" % (
                 region, owner_id, queue_name)
-        client = self.manager.session_factory(
-            region=region, assume=self.assume_role).client('sqs')
-        attrs = {
-            'mtype': {
-                'DataType': 'String',
-                'StringValue': self.C7N_DATA_MESSAGE,
-            },
-        }
-        result = client.send_message(
+        return region, queue_url
+
+    def send_sqs(self, message):
+        region, queue_url = self.get_sqs_destination(message)
+        result = self.get_client('sqs', region).send_message(
             QueueUrl=queue_url,
             MessageBody=self.pack(message),
-            MessageAttributes=attrs)
+            MessageAttributes=self.get_message_attributes())
         return result['MessageId']
 
     @classmethod
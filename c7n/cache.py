@@ -5,10 +5,17 @@ multiple policies on the same resource type.
 """
 import pickle  # nosec nosemgrep
 
+from concurrent.futures import Future
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+import json
 import os
 import logging
 import sqlite3
+import threading
+import zlib
+
+from c7n.utils import chunks, tag_index
 
 log = logging.getLogger('custodian.cache')
 
@@ -46,7 +53,15 @@ class Cache:
     def get(self, key):
         pass
 
-    def save(self, key, data):
+    def get_by_ids(self, key, ids, id_key):
+        """Return the cached resources with the given ids, None if key isn't cached."""
+        data = self.get(key)
+        if data is None:
+            return None
+        id_set = set(ids)
+        return [r for r in data if r[id_key] in id_set]
+
+    def save(self, key, data, id_key=None):
         pass
 
     def size(self):
@@ -82,7 +97,7 @@ class InMemoryCache(Cache):
     def get(self, key):
         return self.data.get(encode(key))
 
-    def save(self, key, data):
+    def save(self, key, data, id_key=None):
         self.data[encode(key)] = data
 
     def size(self):
@@ -93,6 +108,11 @@ def encode(key):
     return pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)  # nosemgrep
 
 
+def encode_key(key):
+    """Stable text form of a cache key, independent of dict ordering."""
+    return json.dumps(key, sort_keys=True, default=str)
+
+
 def resolve_path(path):
     return os.path.abspath(
         os.path.expanduser(
@@ -100,13 +120,39 @@ def resolve_path(path):
 
 
 class SqlKvCache(Cache):
+    """Sqlite backed cache, safe to share between processes.
+
+    Values are stored pickled and zlib compressed. Lists (ie. resource
+    populations) are stored in chunks, and when saved with an `id_key`
+    an index of resource id to chunk allows fetching a few resources by
+    id without decoding the whole population.
+    """
+
+    # bump on incompatible schema changes, older caches are recreated.
+    schema_version = 2
+    chunk_size = 500
+    compress_level = 1
 
     create_table = """
     create table if not exists c7n_cache (
-        key blob primary key,
+        key text primary key,
         value blob,
+        chunks integer,
+        id_key text,
         create_date timestamp
-    )
+    );
+    create table if not exists c7n_cache_chunk (
+        key text,
+        chunk integer,
+        value blob,
+        primary key (key, chunk)
+    );
+    create table if not exists c7n_cache_index (
+        key text,
+        id text,
+        chunk integer,
+        primary key (key, id)
+    );
     """
 
     def __init__(self, config):
@@ -114,6 +160,8 @@ class SqlKvCache(Cache):
         self.cache_period = config.cache_period
         self.cache_path = resolve_path(config.cache)
         self.conn = None
+        self.hits = self.misses = 0
+        self.bytes_read = self.bytes_written = 0
 
     def init(self):
         # migration from pickle cache file
@@ -126,13 +174,25 @@ class SqlKvCache(Cache):
         elif not os.path.exists(os.path.dirname(self.cache_path)):
             # parent directory creation
             os.makedirs(os.path.dirname(self.cache_path))
-        self.conn = sqlite3.connect(self.cache_path)
-        self.conn.execute(self.create_table)
+        self.conn = sqlite3.connect(self.cache_path, timeout=30)
+        # allow concurrent readers with a writer, ie. c7n-org workers
+        # sharing a cache directory.
+        self.conn.execute('pragma journal_mode=wal')
+        if self.conn.execute('pragma user_version').fetchone()[0] != self.schema_version:
+            log.debug('recreating cache tables')
+            with self.conn as cursor:
+                for table in ('c7n_cache', 'c7n_cache_chunk', 'c7n_cache_index'):
+                    cursor.execute('drop table if exists %s' % table)
+                cursor.execute('pragma user_version = %d' % self.schema_version)
+        self.conn.executescript(self.create_table)
         with self.conn as cursor:
             log.debug('expiring stale cache entries')
-            cursor.execute(
-                'delete from c7n_cache where create_date < ?',
-                [datetime.utcnow() - timedelta(minutes=self.cache_period)])
+            expired = [datetime.utcnow() - timedelta(minutes=self.cache_period)]
+            for table in ('c7n_cache_chunk', 'c7n_cache_index'):
+                cursor.execute(
+                    'delete from %s where key in '
+                    '(select key from c7n_cache where create_date < ?)' % table, expired)
+            cursor.execute('delete from c7n_cache where create_date < ?', expired)
 
     def load(self):
         if not self.conn:
@@ -140,26 +200,97 @@ class SqlKvCache(Cache):
         return True
 
     def get(self, key):
-        with self.conn as cursor:
-            r = cursor.execute(
-                'select value, create_date from c7n_cache where key = ?',
-                [sqlite3.Binary(encode(key))]
-            )
-            row = r.fetchone()
-            if row is None:
-                return None
-            value, create_date = row
-            create_date = sqlite3.converters['TIMESTAMP'](create_date.encode('utf8'))
+        entry = self._get_entry(key)
+        if entry is None:
+            return None
+        return self._read(entry)
+
+    def get_by_ids(self, key, ids, id_key):
+        """Return the cached resources with the given ids.
+
+        Only the chunks holding those resources are decoded when the
+        value was saved with the same id_key.
+        """
+        entry = self._get_entry(key)
+        if entry is None:
+            return None
+        id_set = set(ids)
+        if entry[2] is None or entry[3] != id_key:
+            return [r for r in self._read(entry) if r[id_key] in id_set]
+
+        chunk_ids = set()
+        for id_chunk in chunks(sorted(map(str, id_set)), 500):
+            chunk_ids.update(chunk for (chunk,) in self.conn.execute(
+                'select chunk from c7n_cache_index where key = ? and id in (%s)' % (
+                    ', '.join('?' * len(id_chunk))), [entry[0], *id_chunk]))
+        resources = []
+        for chunk_id in sorted(chunk_ids):
+            row = self.conn.execute(
+                'select value from c7n_cache_chunk where key = ? and chunk = ?',
+                [entry[0], chunk_id]).fetchone()
+            resources.extend(r for r in self._decode(row[0]) if r[id_key] in id_set)
+        return resources
+
+    def _read(self, entry):
+        key, value, num_chunks = entry[:3]
+        if num_chunks is None:
+            return self._decode(value)
+        data = []
+        for (chunk,) in self.conn.execute(
+                'select value from c7n_cache_chunk where key = ? order by chunk', [key]):
+            data.extend(self._decode(chunk))
+        return data
+
+    def _get_entry(self, key):
+        row = self.conn.execute(
+            'select key, value, chunks, id_key, create_date from c7n_cache where key = ?',
+            [encode_key(key)]).fetchone()
+        if row is not None:
+            create_date = sqlite3.converters['TIMESTAMP'](row[4].encode('utf8'))
             if (datetime.utcnow() - create_date).total_seconds() / 60.0 > self.cache_period:
-                return None
-            return pickle.loads(value)  # nosec nosemgrep
+                row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[:4]
+
+    def save(self, key, data, timestamp=None, id_key=None):
+        timestamp = timestamp or datetime.utcnow()
+        key = encode_key(key)
+        value = num_chunks = None
+        if isinstance(data, list):
+            num_chunks = len(data) and (len(data) - 1) // self.chunk_size + 1
+            if id_key and not all(isinstance(r, dict) and r.get(id_key) for r in data):
+                id_key = None
+        else:
+            value = self._encode(data)
+            id_key = None
 
-    def save(self, key, data, timestamp=None):
         with self.conn as cursor:
-            timestamp = timestamp or datetime.utcnow()
+            cursor.execute('delete from c7n_cache_chunk where key = ?', [key])
+            cursor.execute('delete from c7n_cache_index where key = ?', [key])
             cursor.execute(
-                'replace into c7n_cache (key, value, create_date) values (?, ?, ?)',
-                (sqlite3.Binary(encode(key)), sqlite3.Binary(encode(data)), timestamp))
+                'replace into c7n_cache (key, value, chunks, id_key, create_date) '
+                'values (?, ?, ?, ?, ?)', (key, value, num_chunks, id_key, timestamp))
+            for idx in range(num_chunks or 0):
+                chunk = data[idx * self.chunk_size:(idx + 1) * self.chunk_size]
+                cursor.execute(
+                    'insert into c7n_cache_chunk (key, chunk, value) values (?, ?, ?)',
+                    (key, idx, self._encode(chunk)))
+                if id_key:
+                    cursor.executemany(
+                        'replace into c7n_cache_index (key, id, chunk) values (?, ?, ?)',
+                        [(key, str(r[id_key]), idx) for r in chunk])
+
+    def _encode(self, data):
+        value = zlib.compress(encode(data), self.compress_level)
+        self.bytes_written += len(value)
+        return sqlite3.Binary(value)
+
+    def _decode(self, value):
+        self.bytes_read += len(value)
+        return pickle.loads(zlib.decompress(value))  # nosec nosemgrep
 
     def size(self):
         return os.path.exists(self.cache_path) and os.path.getsize(self.cache_path) or 0
@@ -168,3 +299,153 @@ class SqlKvCache(Cache):
         if self.conn:
             self.conn.close()
             self.conn = None
+            log.debug(
+                "cache hits:%d misses:%d bytes read:%d written:%d",
+                self.hits, self.misses, self.bytes_read, self.bytes_written)
+
+
+class ResourceSnapshots:
+    """In-process store of augmented resource populations for a single run.
+
+    Policies in a run that target the same resource type (and account,
+    region, source and query) share one describe and augment of the
+    population. Concurrent requests for a key that is still being
+    fetched wait on the in-flight fetch instead of issuing their own.
+
+    Each caller receives a list of shallow copies of the stored
+    resources, so per policy annotations (ie. ``c7n:MatchedFilters``)
+    don't leak across policies, while nested values are shared and must
+    be treated as read only.
+    """
+
+    def __init__(self, tag_types=()):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._tags = {}
+        self._stores = {}
+        self.tag_types = set(tag_types)
+        self.hits = self.misses = 0
+
+    def get(self, key, fetch):
+        """Return a view of the resources for key, calling fetch on a miss."""
+        ekey = encode(key)
+        with self._lock:
+            future = self._entries.get(ekey)
+            owner = future is None
+            if owner:
+                future = self._entries[ekey] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if owner:
+            try:
+                future.set_result(fetch())
+            except BaseException as e:
+                # don't cache failures, subsequent callers will refetch.
+                with self._lock:
+                    self._entries.pop(ekey, None)
+                future.set_exception(e)
+                raise
+        return self.view(future.result())
+
+    def peek(self, key):
+        """Return a view of the resources for key if already fetched."""
+        with self._lock:
+            future = self._entries.get(encode(key))
+        if future is None or not future.done() or future.exception():
+            return None
+        return self.view(future.result())
+
+    @staticmethod
+    def view(resources):
+        return [isinstance(r, dict) and r.copy() or r for r in resources]
+
+    def get_tags(self, key):
+        """Return the shared tag snapshot for key, ie. an account and region."""
+        ekey = encode(key)
+        with self._lock:
+            tags = self._tags.get(ekey)
+            if tags is None:
+                tags = self._tags[ekey] = TagSnapshot(self.tag_types)
+        return tags
+
+    def get_store(self, name, factory):
+        """Return the run's named store, ie. for api results shared across policies."""
+        with self._lock:
+            store = self._stores.get(name)
+            if store is None:
+                store = self._stores[name] = factory()
+        return store
+
+    def size(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._stores.clear()
+
+
+class TagSnapshot:
+    """Resource tags by arn for a region, shared across a run's policies.
+
+    Tags are swept by resource type, the first sweep also covers the
+    types of every other policy in the run known up front, so resource
+    types sharing the region's tagging api only page through it once.
+    """
+
+    def __init__(self, types=()):
+        self._lock = threading.Lock()
+        self.pending = set(types)
+        self.attempted = set()
+        self.swept = set()
+        self.tags = {}
+
+    def sweep(self, resource_type, fetch):
+        """Sweep resource_type's tags if needed, return whether it is covered.
+
+        fetch is called with a list of resource types and returns a map of
+        arns to tags, along with the types it was able to sweep.
+        """
+        with self._lock:
+            if resource_type not in self.attempted:
+                types = sorted(self.pending.union((resource_type,)) - self.attempted)
+                tags, swept = fetch(types)
+                self.tags.update(tags)
+                self.swept.update(swept)
+                self.attempted.update(types)
+            return resource_type in self.swept
+
+
+_snapshots = None
+
+
+def get_snapshots():
+    """Return the active run's resource snapshots, if any."""
+    return _snapshots
+
+
+@contextmanager
+def snapshot_scope(enabled=True, tag_types=()):
+    """Share resource populations across the policies executed in this block.
+
+    tag_types are the tagging api resource types the block's policies use,
+    see :py:func:`c7n.tags.get_universal_tag_types`.
+    """
+    global _snapshots
+    if not enabled or _snapshots is not None:
+        yield _snapshots
+        return
+    _snapshots = ResourceSnapshots(tag_types)
+    tag_index.start()
+    try:
+        yield _snapshots
+    finally:
+        log.debug(
+            "resource snapshots hits:%d misses:%d",
+            _snapshots.hits, _snapshots.misses)
+        _snapshots = None
+        # tag maps hold references to the run's resource tags.
+        tag_index.clear()
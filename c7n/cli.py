@@ -240,6 +240,24 @@ def setup_parser():
         dest="tracer",
         help="Tracing integration",
         default=None, nargs="?", const="default")
+    run.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="Number of policies to execute concurrently (default %(default)i)")
+    run.add_argument(
+        "--stream", action="store_true", default=False,
+        help="Augment and filter resources a page at a time to reduce memory usage")
+    run.add_argument(
+        "--adaptive-augment", action="store_true", default=False,
+        help="Adapt resource augment concurrency to api throttling, instead of "
+             "a fixed number of workers")
+    run.add_argument(
+        "--projected-augment", action="store_true", default=False,
+        help="Only augment resources with the attributes used by a policy's "
+             "filters and actions, where supported")
+    run.add_argument(
+        "--batch-metrics", action="store_true", default=False,
+        help="Retrieve metrics filter data with batched GetMetricData calls "
+             "shared across policies")
 
     schema_desc = ("Browse the available vocabularies (resources, filters, modes, and "
                    "actions) for policy construction. The selector "
@@ -1,6 +1,7 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 from collections import Counter, defaultdict
+from concurrent.futures import as_completed
 from datetime import timedelta, datetime
 from functools import wraps
 import json
@@ -13,12 +14,14 @@ from typing import List
 import yaml
 from yaml.constructor import ConstructorError
 
-from c7n import deprecated
+from c7n import cache, deprecated
+from c7n.executor import ThreadPoolExecutor
 from c7n.exceptions import ClientError, PolicyValidationError
 from c7n.loader import SourceLocator
 from c7n.provider import clouds
 from c7n.policy import Policy, PolicyCollection, load as policy_load
 from c7n.schema import ElementSchema, StructureParser, generate
+from c7n.tags import get_universal_tag_types
 from c7n.utils import load_file, local_session, SafeLoader, yaml_dump
 from c7n.config import Bag, Config
 from c7n.resources import (
@@ -283,6 +286,63 @@ def validate(options):
         sys.exit(1)
 
 
+def _run_policy(options, policy):
+    try:
+        policy()
+    except Exception:
+        if options.debug:
+            raise
+        log.exception(
+            "Error while executing policy %s, continuing" % (
+                policy.name))
+        return False
+    return True
+
+
+def _policy_schedule(options, policies):
+    """Partition policies into units of work that can run concurrently.
+
+    Policies are grouped by region and resource type so a group shares one
+    fetch of the resource population. Groups where any policy has actions
+    run serially in file order, as a policy's actions may change what the
+    following policies match. Lambda provisioning is always serial.
+    """
+    groups = {}
+    for p in policies:
+        if p.execution_mode != 'pull' and not options.dryrun:
+            key = ('provision',)
+        else:
+            key = (p.options.region, str(p.resource_type))
+        groups.setdefault(key, []).append(p)
+
+    units = []
+    for key, group in groups.items():
+        serial = key == ('provision',) or (
+            not options.dryrun and any(p.resource_manager.actions for p in group))
+        units.append(serial and [group] or [[p] for p in group])
+
+    # Interleave across groups, so the first policy of every group starts
+    # its resource fetch before we queue policies waiting on a fetch.
+    return [u for unit_set in itertools.zip_longest(*units) for u in unit_set if u]
+
+
+def _run_concurrent(options, policies):
+    policy_errors = set()
+
+    def run_unit(unit):
+        for p in unit:
+            if not _run_policy(options, p):
+                policy_errors.add(p)
+
+    with ThreadPoolExecutor(max_workers=options.jobs) as w:
+        futures = [w.submit(run_unit, unit) for unit in _policy_schedule(options, policies)]
+        for f in as_completed(futures):
+            # only in debug mode do we propagate exceptions
+            f.result()
+
+    return [p.name for p in policies if p in policy_errors]
+
+
 @policy_command
 def run(options, policies: List[Policy]) -> None:
     exit_code = 0
@@ -296,18 +356,23 @@ def run(options, policies: List[Policy]) -> None:
             log.exception("Unable to assume role %s", options.assume_role)
             sys.exit(1)
 
+    # Policies against the same resource type share a single fetch of
+    # the population, unless caching has been disabled.
+    snapshots = cache.snapshot_scope(
+        enabled=bool(getattr(options, 'cache', None) and
+                     getattr(options, 'cache_period', None)),
+        tag_types=get_universal_tag_types(policies))
+
     errored_policies: List[str] = []
-    for policy in policies:
-        try:
-            policy()
-        except Exception:
-            exit_code = 2
-            errored_policies.append(policy.name)
-            if options.debug:
-                raise
-            log.exception(
-                "Error while executing policy %s, continuing" % (
-                    policy.name))
+    with snapshots:
+        if getattr(options, 'jobs', 1) > 1:
+            errored_policies = _run_concurrent(options, policies)
+        else:
+            for policy in policies:
+                if not _run_policy(options, policy):
+                    errored_policies.append(policy.name)
+    if errored_policies:
+        exit_code = 2
     if exit_code != 0:
         log.error("The following policies had errors while executing\n - %s" % (
             "\n - ".join(errored_policies)))
@@ -4,6 +4,7 @@
 Authentication utilities
 """
 import os
+import threading
 
 from botocore.credentials import RefreshableCredentials
 from botocore.session import get_session
@@ -18,6 +19,10 @@ from c7n.utils import get_retry
 USE_STS_REGIONAL = os.environ.get(
     'C7N_USE_STS_REGIONAL', '').lower() in ('yes', 'true')
 
+# Assumed role credentials, shared by the sessions of a process.
+CREDENTIAL_CACHE = {}
+_credential_lock = threading.Lock()
+
 
 class SessionFactory:
 
@@ -32,6 +37,8 @@ class SessionFactory:
             self.session_name = "%s@%s" % (
                 self.session_name, os.environ['C7N_SESSION_SUFFIX'])
         self._subscribers = []
+        self._clients = {}
+        self._client_lock = threading.Lock()
 
     def _set_policy_name(self, name):
         self.user_agent_name = ("CloudCustodian(%s)" % name).strip()
@@ -48,7 +55,10 @@ class SessionFactory:
             session = Session(
                 region_name=region or self.region, profile_name=self.profile)
 
-        return self.update(session)
+        session = self.update(session)
+        self.share_clients(
+            session, (self.profile, self.external_id, assume and self.assume_role or None))
+        return session
 
     def update(self, session):
         session._session.user_agent_name = self.user_agent_name
@@ -56,10 +66,48 @@ class SessionFactory:
 
         for s in self._subscribers:
             s(session)
+        session._c7n_subscribers = tuple(self._subscribers)
 
         return session
 
+    def share_clients(self, session, identity):
+        """Share clients across the factory's sessions with the same identity.
+
+        Sessions aren't thread safe, so threads each use their own (see
+        :py:func:`c7n.utils.local_session`), while botocore clients are,
+        so clients are created once per region and user agent, and reused
+        by other threads' sessions.
+
+        Clients keep the event subscribers of the session that created
+        them, so they're only shared while those subscribers are current,
+        see :py:meth:`set_subscribers`. Clients also record the identity,
+        which keys their api rate limits (see :py:class:`c7n.utils.RateLimits`).
+        """
+        create_client = session.client
+
+        def client(service_name, region_name=None, endpoint_url=None, **kw):
+            if kw or session._c7n_subscribers != tuple(self._subscribers):
+                c = create_client(
+                    service_name, region_name=region_name, endpoint_url=endpoint_url, **kw)
+                c.meta.c7n_identity = identity
+                return c
+            key = (identity, session.region_name, session._session.user_agent_name,
+                   service_name, region_name, endpoint_url)
+            with self._client_lock:
+                c = self._clients.get(key)
+                if c is None:
+                    c = self._clients[key] = create_client(
+                        service_name, region_name=region_name, endpoint_url=endpoint_url)
+                    c.meta.c7n_identity = identity
+            return c
+
+        session.client = client
+
     def set_subscribers(self, subscribers):
+        # shared clients were created with the previous subscribers
+        if tuple(subscribers) != tuple(self._subscribers):
+            with self._client_lock:
+                self._clients.clear()
         self._subscribers = subscribers
 
 
@@ -82,6 +130,8 @@ def assumed_session(role_arn, session_name, session=None, region=None, external_
         session = Session()
 
     retry = get_retry(('Throttling',))
+    cache_key = (session.profile_name, role_arn, session_name, external_id,
+                 region if USE_STS_REGIONAL else None)
 
     def refresh():
 
@@ -100,10 +150,16 @@ def assumed_session(role_arn, session_name, session=None, region=None, external_
             # Silly that we basically stringify so it can be parsed again
             expiry_time=credentials['Expiration'].isoformat())
 
-    session_credentials = RefreshableCredentials.create_from_metadata(
-        metadata=refresh(),
-        refresh_using=refresh,
-        method='sts-assume-role')
+    # credentials are shared by the process's sessions for the role, and
+    # refreshed by botocore ahead of their expiration.
+    with _credential_lock:
+        session_credentials = CREDENTIAL_CACHE.get(cache_key)
+        if session_credentials is None:
+            session_credentials = CREDENTIAL_CACHE[cache_key] = (
+                RefreshableCredentials.create_from_metadata(
+                    metadata=refresh(),
+                    refresh_using=refresh,
+                    method='sts-assume-role'))
 
     # so dirty.. it hurts, no clean way to set this outside of the
     # internals poke. There's some work upstream on making this nicer
@@ -14,6 +14,9 @@ class Element:
 
     permissions = ()
     metrics = ()
+    # Augmented resource attributes read by the element, None if unknown.
+    # Used to only augment resources with what a policy needs.
+    augment_attributes = None
 
     executor_factory = ThreadPoolExecutor
 
@@ -25,6 +28,9 @@ class Element:
     def get_permissions(self):
         return self.permissions
 
+    def get_augment_attributes(self):
+        return self.augment_attributes
+
     def validate(self):
         """Validate the current element's configuration.
 
@@ -1,9 +1,25 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
-from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor)  # noqa
+from concurrent import futures
+from concurrent.futures import ProcessPoolExecutor  # noqa
 
+import contextvars
 import threading
 
+from c7n.exceptions import ClientError
+from c7n.utils import THROTTLE_CODES
+
+
+class ThreadPoolExecutor(futures.ThreadPoolExecutor):
+    """Thread pool running submitted calls in a copy of the submitter's context.
+
+    Context variables, such as the policy whose log output records are
+    attributed to, carry over to worker threads.
+    """
+
+    def submit(self, fn, *args, **kw):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kw)
+
 
 class MainThreadExecutor:
     """ For running tests.
@@ -68,3 +84,65 @@ class MainThreadFuture:
 
     def add_done_callback(self, fn):
         return fn(self)
+
+
+class AdaptiveLimit:
+    """Adaptive bound on concurrent api calls to a service in a region.
+
+    The limit grows by one after a limit's worth of successful calls and
+    is halved when a call is throttled (additive increase, multiplicative
+    decrease), staying between minimum and maximum.
+    """
+
+    def __init__(self, initial=3, minimum=1, maximum=32):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self.successes = 0
+        self.throttles = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, throttled=False):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.throttles += 1
+                self.successes = 0
+                self.limit = max(self.minimum, self.limit // 2)
+            else:
+                self.successes += 1
+                if self.successes >= self.limit and self.limit < self.maximum:
+                    self.successes = 0
+                    self.limit += 1
+            self._cond.notify_all()
+
+    def call(self, func, *args, **kw):
+        self.acquire()
+        throttled = False
+        try:
+            return func(*args, **kw)
+        except ClientError as e:
+            throttled = e.response['Error']['Code'] in THROTTLE_CODES
+            raise
+        finally:
+            self.release(throttled)
+
+
+_limits = {}
+_limits_lock = threading.Lock()
+
+
+def get_adaptive_limit(service, region):
+    """Return the process wide concurrency limit for a service in a region."""
+    with _limits_lock:
+        limit = _limits.get((service, region))
+        if limit is None:
+            limit = _limits[(service, region)] = AdaptiveLimit()
+        return limit
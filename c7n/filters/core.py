@@ -22,7 +22,8 @@ from c7n.element import Element
 from c7n.exceptions import PolicyValidationError
 from c7n.registry import PluginRegistry
 from c7n.resolver import ValuesFrom
-from c7n.utils import set_annotation, type_schema, parse_cidr, parse_date
+from c7n.utils import (
+    set_annotation, type_schema, parse_cidr, parse_date, get_tag_map)
 from c7n.manager import iter_filters
 
 
@@ -182,6 +183,11 @@ class Filter(Element):
 
     log = logging.getLogger('custodian.filters')
 
+    # Whether the filter operates on the resource population as a whole,
+    # rather than per resource. Streaming resource managers only apply
+    # filters per batch of resources up to the first set level filter.
+    set_level = False
+
     def __init__(self, data, manager=None):
         self.data = data
         self.manager = manager
@@ -190,6 +196,15 @@ class Filter(Element):
         """ Bulk process resources and return filtered set."""
         return list(filter(self, resources))
 
+    def compile(self):
+        """Return a specialized per resource match function, if supported.
+
+        Filters returning a function from compile are evaluated with it
+        in place of process, and may be fused with sibling filters in an
+        `and` block into a single pass over resources.
+        """
+        return None
+
     def get_block_operator(self):
         """Determine the immediate parent boolean operator for a filter"""
         # Top level operator is `and`
@@ -232,23 +247,15 @@ class BaseValueFilter(Filter):
         r = None
         if k.startswith('tag:'):
             tk = k.split(':', 1)[1]
-            if 'Tags' in i:
-                for t in i.get("Tags", []):
-                    if t.get('Key') == tk:
-                        r = t.get('Value')
-                        break
-                    # NOTE normalize key, aka key case-insensitive
-                    if ktype == 'normalize' and t.get('Key').lower() == tk.lower():
-                        r = t.get('Value')
-                        break
-            # GCP schema: 'labels': {'key': 'value'}
-            elif 'labels' in i:
-                r = i.get('labels', {}).get(tk, None)
-            # GCP has a secondary form of labels called tags
-            # as labels without values.
+            # AWS schema: 'Tags': [{'Key': 'key', 'Value': 'value'}]
+            # GCP schema: 'labels': {'key': 'value'}, GCP has a secondary
+            # form of labels called tags as labels without values.
             # Azure schema: 'tags': {'key': 'value'}
-            elif 'tags' in i:
-                r = i.get('tags', {}).get(tk, None)
+            # NOTE normalize key, aka key case-insensitive
+            if ktype == 'normalize':
+                r = get_tag_map(i, normalize=True).get(tk.lower())
+            else:
+                r = get_tag_map(i).get(tk)
         elif k in i:
             r = i.get(k)
         elif k not in self.expr:
@@ -306,6 +313,9 @@ def union_list(a, b):
 
 class BooleanGroupFilter(Filter):
 
+    # nested filters are visited on their own, see iter_filters.
+    augment_attributes = ()
+
     def __init__(self, data, registry, manager):
         super(BooleanGroupFilter, self).__init__(data)
         self.registry = registry
@@ -337,6 +347,8 @@ class BooleanGroupFilter(Filter):
 
 class Or(BooleanGroupFilter):
 
+    set_level = True
+
     def process(self, resources, event=None):
         if self.manager:
             return self.process_set(resources, event)
@@ -370,14 +382,34 @@ class Or(BooleanGroupFilter):
 
 class And(BooleanGroupFilter):
 
+    @property
+    def set_level(self):
+        return any(f.set_level for f in self.filters)
+
+    def compile(self):
+        matchers = [f.compile() for f in self.filters]
+        if not matchers or None in matchers:
+            return None
+
+        def match(r):
+            for m in matchers:
+                if not m(r):
+                    return False
+            return True
+        return match
+
     def process(self, resources, events=None):
         if self.manager:
             sweeper = AnnotationSweeper(self.get_resource_type_id(), resources)
 
-        for f in self.filters:
-            resources = f.process(resources, events)
-            if not resources:
-                break
+        matcher = self.compile()
+        if matcher is not None:
+            resources = list(filter(matcher, resources))
+        else:
+            for f in self.filters:
+                resources = f.process(resources, events)
+                if not resources:
+                    break
 
         if self.manager:
             sweeper.sweep(resources)
@@ -387,6 +419,8 @@ class And(BooleanGroupFilter):
 
 class Not(BooleanGroupFilter):
 
+    set_level = True
+
     def process(self, resources, event=None):
         if self.manager:
             return self.process_set(resources, event)
@@ -568,6 +602,32 @@ class ValueFilter(BaseValueFilter):
 
         return self
 
+    @property
+    def set_level(self):
+        return self.data.get('value_type') == 'resource_count'
+
+    # top level attribute of a key, ie. Versioning in Versioning.Status
+    key_attribute_expr = re.compile(r'^([A-Za-z_][\w-]*)(?:$|[.\[])')
+
+    def get_augment_attributes(self):
+        # subclasses usually evaluate their key against other data than
+        # the resource.
+        if self.__class__ is not ValueFilter:
+            return super().get_augment_attributes()
+        if self.data.get('value_type') == 'resource_count':
+            return ()
+        if self.data.get('value_type') == 'expr':
+            # the value is another expression against the resource.
+            return None
+        if len(self.data) == 1:
+            [k] = self.data
+        else:
+            k = self.data.get('key', '')
+        if k.startswith('tag:'):
+            return ('Tags',)
+        m = self.key_attribute_expr.match(k)
+        return m and (m.group(1),) or None
+
     def __call__(self, i):
         if self.data.get('value_type') == 'resource_count':
             return self.process(i)
@@ -585,8 +645,196 @@ class ValueFilter(BaseValueFilter):
                 return resources
             return []
 
+        matcher = self.compile()
+        if matcher is not None:
+            return list(filter(matcher, resources))
         return super(ValueFilter, self).process(resources, event)
 
+    # Subclasses overriding any of these are evaluated via match.
+    _compiled_methods = (
+        '__call__', 'match', 'process', 'get_resource_value', 'process_value_type')
+
+    def compile(self):
+        """Build a match function specialized to this filter's configuration.
+
+        Key lookup, value conversion and operator are resolved once, with
+        regexes and jmespath expressions compiled, `in`/`ni` values as sets,
+        and relative dates computed once. Filters with dynamic values
+        (value_from, value_type: expr, op: annotation) aren't compiled.
+        """
+        for m in self._compiled_methods:
+            if getattr(self.__class__, m) is not getattr(ValueFilter, m):
+                return None
+        if len(self.data) == 1:
+            [(k, v)] = self.data.items()
+            op = vtype = None
+            if k in ('type', 'key', 'value'):
+                return None
+        else:
+            k, v, op = self.data.get('key'), self.data.get('value'), self.data.get('op')
+            vtype = self.data.get('value_type')
+            if ('value_from' in self.data or op == 'annotation' or
+                    vtype in ('expr', 'resource_count') or k is None):
+                return None
+        self.k, self.v, self.op, self.vtype = k, v, op, vtype
+
+        get_value = self._compile_key(k, self.data.get('key_type'), self.data.get('value_regex'))
+        convert = self._compile_value_type(vtype, v)
+        if convert is None:
+            return None
+        compare = op and self._compile_op(op, v, vtype) or None
+        empty_in = op in ('in', 'not-in')
+        annotate = self.annotate
+
+        def match(i):
+            if i is None:
+                return False
+            r = get_value(i)
+            if empty_in and r is None:
+                r = ()
+            v, r = convert(r)
+            if r is None and v == 'absent':
+                matched = True
+            elif r is not None and v == 'present':
+                matched = True
+            elif v == 'not-null' and r:
+                matched = True
+            elif v == 'empty' and not r:
+                matched = True
+            elif compare:
+                try:
+                    matched = compare(r, v)
+                except TypeError:
+                    matched = False
+            else:
+                matched = r == v
+            if matched and annotate:
+                set_annotation(i, ANNOTATION_KEY, k)
+            return matched
+        return match
+
+    def _compile_key(self, k, ktype, value_regex):
+        if k.startswith('tag:'):
+            tk = k.split(':', 1)[1]
+            normalize = ktype == 'normalize'
+            if normalize:
+                tk = tk.lower()
+
+            def get_value(i):
+                return get_tag_map(i, normalize).get(tk)
+        else:
+            expr = self.expr.get(k) or jmespath.compile(k)
+            self.expr[k] = expr
+
+            def get_value(i):
+                if k in i:
+                    return i.get(k)
+                return expr.search(i)
+
+        if not value_regex:
+            return get_value
+        pattern = re.compile(value_regex)
+
+        def get_regex_value(i):
+            r = get_value(i)
+            if r is None:
+                return r
+            try:
+                capture = pattern.match(r)
+            except (ValueError, TypeError):
+                return None
+            if capture is None:
+                return None
+            return capture.group(1)
+        return get_regex_value
+
+    def _compile_value_type(self, vtype, sentinel):
+        """Return a function of resource value -> (sentinel, value)."""
+        if vtype is None:
+            return lambda r: (sentinel, r)
+        elif vtype == 'normalize':
+            return lambda r: (sentinel, r.strip().lower() if isinstance(r, str) else r)
+        elif vtype in ('integer', 'number'):
+            cast, default = vtype == 'integer' and (int, 0) or (float, 0.0)
+
+            def convert(r):
+                try:
+                    return sentinel, cast(str(r).strip())
+                except ValueError:
+                    return sentinel, default
+            return convert
+        elif vtype in ('size', 'unique_size'):
+            unique = vtype == 'unique_size'
+
+            def convert(r):
+                try:
+                    return sentinel, len(set(r) if unique else r)
+                except TypeError:
+                    return sentinel, 0
+            return convert
+        elif vtype == 'swap':
+            return lambda r: (r, sentinel)
+        elif vtype == 'date':
+            s = parse_date(sentinel)
+            return lambda r: (s, parse_date(r))
+        elif vtype in ('age', 'expiration'):
+            s = sentinel
+            if not isinstance(s, datetime.datetime):
+                delta = timedelta(s)
+                now = datetime.datetime.now(tz=tzutc())
+                s = vtype == 'age' and now - delta or now + delta
+
+            def convert(r):
+                r = parse_date(r)
+                if r is None:
+                    r = 0
+                # age comparisons are reversed, see process_value_type
+                return vtype == 'age' and (r, s) or (s, r)
+            return convert
+        elif vtype == 'cidr':
+            s = parse_cidr(sentinel)
+
+            def convert(r):
+                v = parse_cidr(r)
+                if (isinstance(s, ipaddress._BaseAddress) and
+                        isinstance(v, ipaddress._BaseNetwork)):
+                    return v, s
+                return s, v
+            return convert
+        elif vtype == 'cidr_size':
+            def convert(r):
+                cidr = parse_cidr(r)
+                return sentinel, cidr and cidr.prefixlen or 0
+            return convert
+        elif vtype == 'version':
+            s = ComparableVersion(sentinel)
+            return lambda r: (s, ComparableVersion(r))
+        return None
+
+    def _compile_op(self, op, v, vtype):
+        # Only specialize on the configured value when the value type
+        # conversion leaves it as is.
+        if vtype not in (None, 'normalize', 'integer', 'number', 'size', 'unique_size'):
+            return OPERATORS[op]
+        if op in ('regex', 'regex-case') and isinstance(v, str):
+            pattern = re.compile(v, op == 'regex' and re.IGNORECASE or 0)
+            return lambda r, v: isinstance(r, str) and bool(pattern.match(r))
+        if op in ('in', 'ni', 'not-in') and isinstance(v, (list, tuple, set)):
+            try:
+                vset = frozenset(v)
+            except TypeError:
+                return OPERATORS[op]
+            negate = op != 'in'
+
+            def compare(r, v):
+                try:
+                    found = r in vset
+                except TypeError:
+                    found = r in v
+                return found != negate
+            return compare
+        return OPERATORS[op]
+
     def get_resource_value(self, k, i, ktype=None):
         value_regex = self.data.get('value_regex')
         return super(ValueFilter, self).get_resource_value(k, i, value_regex, ktype)
@@ -955,6 +1203,7 @@ class ReduceFilter(BaseValueFilter):
         },
     }
     schema_alias = True
+    set_level = True
 
     def __init__(self, data, manager):
         super(ReduceFilter, self).__init__(data, manager)
@@ -1,13 +1,18 @@
+import hashlib
 import os
+import threading
 from typing import Dict
 
-from c7n.cache import InMemoryCache
+from c7n.cache import InMemoryCache, NullCache, SqlKvCache, resolve_path
+from c7n.config import Bag
 from c7n.filters import COST_ANNOTATION_KEY
 from gql import Client, gql
 from gql.transport.requests import RequestsHTTPTransport
 
 from .core import OPERATORS, Filter
 
+PRICE_NOT_FOUND = 'Price not found'
+
 
 class Infracost(Filter):
     """Annotate resource monthly cost with Infracost pricing API.
@@ -31,6 +36,11 @@ class Infracost(Filter):
             value: 20
 
 
+    Distinct prices are queried once per resource set, concurrently, and
+    kept in a price catalog next to the policy cache file for
+    ``price_cache_period`` minutes (a day by default), shared by
+    subsequent runs and c7n-org workers using the same cache directory.
+
     reference: https://www.infracost.io/docs/cloud_pricing_api/overview/
     """
 
@@ -46,10 +56,15 @@ class Infracost(Filter):
             'op': {'$ref': '#/definitions/filters_common/comparison_operators'},
             'type': {'enum': ['infracost']},
             'value': {'type': 'number'},
+            'price_cache_period': {'type': 'integer'},
         },
     }
     schema_alias = True
 
+    max_workers = 4
+    price_cache_period = 24 * 60
+    price_cache_file = 'cloud-custodian-prices.cache'
+
     def __init__(self, data, manager=None):
         super().__init__(data, manager)
         self.cache = InMemoryCache({})
@@ -69,15 +84,75 @@ class Infracost(Filter):
         return super(Infracost, self).validate()
 
     def process(self, resources, event=None):
-        transport = RequestsHTTPTransport(
-            url=self.api_endpoint + "/graphql",
-            headers={'X-Api-Key': self.api_key},
-            verify=True,
-            retries=5,
-        )
-        client = Client(transport=transport, fetch_schema_from_transport=True)
+        # gql clients can't execute concurrent queries, use one per thread.
+        self.clients = threading.local()
         query = gql(self.get_query())
-        return [r for r in resources if self.process_resource(r, client, query)]
+        pending = {}
+        for r in resources:
+            for params in self.get_price_params(r):
+                cache_key = str(params)
+                if cache_key not in pending and not self.cache.get(cache_key):
+                    pending[cache_key] = params
+        if pending:
+            self.fetch_prices(query, pending)
+        return [r for r in resources if self.process_resource(r, None, query)]
+
+    def get_client(self):
+        client = getattr(self.clients, 'client', None)
+        if client is None:
+            transport = RequestsHTTPTransport(
+                url=self.api_endpoint + "/graphql",
+                headers={'X-Api-Key': self.api_key},
+                verify=True,
+                retries=5,
+            )
+            client = self.clients.client = Client(
+                transport=transport, fetch_schema_from_transport=False)
+        return client
+
+    def fetch_prices(self, query, pending):
+        """Populate the price cache with the prices of distinct query params.
+
+        Prices are read from the price catalog when available, the rest
+        are queried concurrently and added to it, if found.
+        """
+        catalog = self.get_price_catalog()
+        with catalog:
+            query_key = hashlib.sha256(self.get_query().encode('utf8')).hexdigest()
+            missing = {}
+            for cache_key, params in pending.items():
+                price = catalog.get(
+                    {'endpoint': self.api_endpoint, 'query': query_key, 'params': params})
+                if price:
+                    self.cache.save(cache_key, price)
+                else:
+                    missing[cache_key] = params
+
+            with self.executor_factory(max_workers=self.max_workers) as w:
+                futures = {
+                    cache_key: w.submit(self.fetch_price, query, params)
+                    for cache_key, params in missing.items()}
+                for cache_key, f in futures.items():
+                    price = f.result()
+                    self.cache.save(cache_key, price)
+                    # don't keep a missed lookup for the catalog's lifetime
+                    if price.get('description') == PRICE_NOT_FOUND:
+                        continue
+                    catalog.save(
+                        {'endpoint': self.api_endpoint, 'query': query_key,
+                         'params': missing[cache_key]}, price)
+
+    def fetch_price(self, query, params):
+        return self.invoke_infracost(self.get_client(), query, params)
+
+    def get_price_catalog(self):
+        config = self.manager.config
+        if not config.cache or config.cache == 'memory' or not config.cache_period:
+            return NullCache(None)
+        return SqlKvCache(Bag(
+            cache=os.path.join(
+                os.path.dirname(resolve_path(config.cache)), self.price_cache_file),
+            cache_period=self.data.get('price_cache_period', self.price_cache_period)))
 
     def process_resource(self, resource, client, query):
         price = self.get_price(resource, client, query)
@@ -97,7 +172,7 @@ class Infracost(Filter):
         cache_key = str(params)
         price: Dict = self.cache.get(cache_key)
         if not price:
-            price = self.invoke_infracost(client, query, params)
+            price = self.invoke_infracost(client or self.get_client(), query, params)
             self.cache.save(cache_key, price)
 
         total = price.copy()
@@ -111,7 +186,7 @@ class Infracost(Filter):
         self.log.info(f"Infracost {params}: {result}")
         if not result.get("products") or not result["products"][0].get("prices"):
             self.log.warning(f"Price not found for {params}")
-            return {'USD': '0.0', 'unit': 'N/A', 'description': 'Price not found'}
+            return {'USD': '0.0', 'unit': 'N/A', 'description': PRICE_NOT_FOUND}
         total = len(result["products"][0]["prices"])
         if total > 1:
             self.log.warning(f"Found {total} price options, expecting 1")
@@ -123,5 +198,9 @@ class Infracost(Filter):
     def get_params(self, resource):
         raise NotImplementedError("use subclass")
 
+    def get_price_params(self, resource):
+        """Return the query params of the prices needed for a resource."""
+        return [self.get_params(resource)]
+
     def get_quantity(self, resource):
         return self.data.get("quantity", 1)
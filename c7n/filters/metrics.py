@@ -5,11 +5,13 @@ CloudWatch Metrics suppport for resources
 """
 import jmespath
 import re
+import threading
 
 from collections import namedtuple
-from concurrent.futures import as_completed
+from concurrent.futures import Future, as_completed
 from datetime import datetime, timedelta
 
+from c7n import cache
 from c7n.exceptions import PolicyValidationError
 from c7n.filters.core import Filter, OPERATORS
 from c7n.utils import local_session, type_schema, chunks
@@ -68,6 +70,11 @@ class MetricsFilter(Filter):
     policy to treat their request counts as 0.
 
     Note the default statistic for metrics is Average.
+
+    When running with ``--batch-metrics``, metrics are retrieved with
+    GetMetricData for up to 500 resources per call, identical queries
+    are shared across the run's policies, and results are kept in the
+    policy cache for the metric window.
     """
 
     schema = type_schema(
@@ -136,6 +143,11 @@ class MetricsFilter(Filter):
         super(MetricsFilter, self).__init__(data, manager)
         self.days = self.data.get('days', 14)
 
+    def get_permissions(self):
+        if self.manager and getattr(self.manager.config, 'batch_metrics', False):
+            return ('cloudwatch:GetMetricData',)
+        return self.permissions
+
     def validate(self):
         stats = self.data.get('statistics', 'Average')
         if stats not in self.standard_stats and not self.extended_stats_re.match(stats):
@@ -200,6 +212,9 @@ class MetricsFilter(Filter):
         self.namespace = ns
 
         self.log.debug("Querying metrics for %d", len(resources))
+        if getattr(self.manager.config, 'batch_metrics', False):
+            return self.process_resource_set(resources, self.get_metric_data(resources))
+
         matched = []
         with self.executor_factory(max_workers=3) as w:
             futures = []
@@ -227,7 +242,47 @@ class MetricsFilter(Filter):
             dims.append({'Name': k, 'Value': v})
         return dims
 
-    def process_resource_set(self, resource_set):
+    def get_metric_data(self, resources):
+        """Get the datapoints of resources' metrics, keyed by their dimensions.
+
+        Datapoints are retrieved through the run's metric store, and kept
+        in the policy cache for the metric window.
+        """
+        stat = self.statistics
+        cache_key = {
+            'account': self.manager.config.account_id,
+            'region': self.manager.config.region,
+            'resource': 'metrics',
+            'q': (self.namespace, self.metric, stat, self.period,
+                  self.start.isoformat(), self.end.isoformat())}
+        with self.manager._cache:
+            metric_data = self.manager._cache.get(cache_key) or {}
+
+        queries = {}
+        for r in resources:
+            dimensions = self.get_dimensions(r)
+            dimensions.extend(self.get_user_dimensions())
+            dkey = get_dimensions_key(dimensions)
+            if dkey not in metric_data:
+                queries[cache_key['q'] + (dkey,)] = dict(
+                    Namespace=self.namespace,
+                    MetricName=self.metric,
+                    Dimensions=dimensions)
+        if not queries:
+            return metric_data
+
+        snapshots = cache.get_snapshots()
+        store = (snapshots.get_store('metrics', MetricDataStore)
+                 if snapshots is not None else MetricDataStore())
+        client = local_session(self.manager.session_factory).client('cloudwatch')
+        for qkey, datapoints in store.get(
+                client, queries, self.start, self.end, self.period, stat).items():
+            metric_data[qkey[-1]] = datapoints
+        with self.manager._cache:
+            self.manager._cache.save(cache_key, metric_data)
+        return metric_data
+
+    def process_resource_set(self, resource_set, metric_data=None):
         client = local_session(
             self.manager.session_factory).client('cloudwatch')
 
@@ -260,7 +315,10 @@ class MetricsFilter(Filter):
                          and 'Statistics' or 'ExtendedStatistics')
             params[stats_key] = [self.statistics]
 
-            if key not in collected_metrics:
+            if key not in collected_metrics and metric_data is not None:
+                collected_metrics[key] = list(
+                    metric_data.get(get_dimensions_key(dimensions), ()))
+            elif key not in collected_metrics:
                 collected_metrics[key] = client.get_metric_statistics(
                     **params)['Datapoints']
 
@@ -297,6 +355,78 @@ class MetricsFilter(Filter):
         return matched
 
 
+def get_dimensions_key(dimensions):
+    return tuple(sorted((d['Name'], d['Value']) for d in dimensions))
+
+
+class MetricDataStore:
+    """Metric statistics retrieved with batched GetMetricData calls.
+
+    Queries are keyed by their metric, dimensions, statistic, period and
+    window. A query already retrieved, or being retrieved, by another
+    filter (ie. another policy in the run) is not issued again.
+    """
+
+    MAX_QUERIES = 500
+    MAX_DATAPOINTS = 100800
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results = {}
+        self.calls = 0
+
+    def get(self, client, queries, start, end, period, stat):
+        """Return the datapoints of queries, a map of query keys to metrics."""
+        futures, claimed = {}, {}
+        with self._lock:
+            for qkey, metric in queries.items():
+                future = self._results.get(qkey)
+                if future is None:
+                    future = self._results[qkey] = Future()
+                    claimed[qkey] = metric
+                futures[qkey] = future
+
+        # resolve our own queries before waiting on other callers'.
+        if claimed:
+            try:
+                results = self.fetch(client, claimed, start, end, period, stat)
+            except BaseException as e:
+                with self._lock:
+                    for qkey in claimed:
+                        self._results.pop(qkey, None)
+                for qkey in claimed:
+                    futures[qkey].set_exception(e)
+                raise
+            for qkey in claimed:
+                futures[qkey].set_result(results.get(qkey, []))
+        return {qkey: f.result() for qkey, f in futures.items()}
+
+    def fetch(self, client, queries, start, end, period, stat):
+        points = max(int((end - start).total_seconds() // period), 1)
+        batch_size = max(min(self.MAX_QUERIES, self.MAX_DATAPOINTS // points), 1)
+        results = {}
+        for batch in chunks(list(queries.items()), batch_size):
+            ids = {'m%d' % idx: qkey for idx, (qkey, metric) in enumerate(batch)}
+            params = dict(
+                StartTime=start,
+                EndTime=end,
+                MetricDataQueries=[{
+                    'Id': 'm%d' % idx,
+                    'MetricStat': {'Metric': metric, 'Period': period, 'Stat': stat},
+                    'ReturnData': True} for idx, (qkey, metric) in enumerate(batch)])
+            while True:
+                self.calls += 1
+                response = client.get_metric_data(**params)
+                for result in response['MetricDataResults']:
+                    results.setdefault(ids[result['Id']], []).extend(
+                        {'Timestamp': ts, stat: v}
+                        for ts, v in zip(result['Timestamps'], result['Values']))
+                if not response.get('NextToken'):
+                    break
+                params['NextToken'] = response['NextToken']
+        return results
+
+
 class ShieldMetrics(MetricsFilter):
     """Specialized metrics filter for shield
     """
@@ -256,7 +256,7 @@ from dateutil import zoneinfo, tz as tzutil
 
 from c7n.exceptions import PolicyValidationError
 from c7n.filters import Filter
-from c7n.utils import type_schema, dumps
+from c7n.utils import type_schema, dumps, get_tag_map
 from c7n.resolver import ValuesFrom
 
 log = logging.getLogger('custodian.offhours')
@@ -347,6 +347,11 @@ class Time(Filter):
         self.fallback_schedule = self.data.get('fallback-schedule', None)
         self.default_schedule = self.get_default_schedule()
         self.parser = ScheduleParser(self.default_schedule)
+        # parsed schedules by tag value
+        self.schedules = {}
+        # per process, the current time by timezone, the skip days and
+        # results by tag value.
+        self.now = self.skip_days = self.results = None
 
         self.id_key = None
 
@@ -370,7 +375,14 @@ class Time(Filter):
         return self
 
     def process(self, resources, event=None):
-        resources = super(Time, self).process(resources)
+        # Resources sharing a schedule and timezone share an evaluation.
+        self.now, self.results = {}, {}
+        self.opted_out, self.parse_errors, self.enabled_count = [], [], 0
+        self.skip_days = self.get_skip_days()
+        try:
+            resources = super(Time, self).process(resources)
+        finally:
+            self.now = self.skip_days = self.results = None
         if self.parse_errors and self.manager and self.manager.ctx.log_dir:
             self.log.warning("parse errors %d", len(self.parse_errors))
             with open(join(
@@ -417,16 +429,45 @@ class Time(Filter):
 
     def process_resource_schedule(self, i, value, time_type):
         """Does the resource tag schedule and policy match the current time."""
+        if self.results is not None and (value, time_type) in self.results:
+            return self.results[(value, time_type)]
         rid = i[self.id_key]
+        schedule = self.get_schedule(value, time_type)
+        if schedule is None:
+            log.warning(
+                "Invalid schedule on resource:%s value:%s", rid, value)
+            self.parse_errors.append((rid, value))
+            return False
+        now = self.get_now(schedule['tz'])
+        if now is None:
+            log.warning(
+                "Could not resolve tz on resource:%s value:%s", rid, value)
+            self.parse_errors.append((rid, value))
+            return False
+        skip_days = self.skip_days
+        if skip_days is None:
+            skip_days = self.get_skip_days()
+        if now.strftime("%Y-%m-%d") in skip_days:
+            result = False
+        else:
+            result = self.match(now, schedule)
+        if self.results is not None:
+            self.results[(value, time_type)] = result
+        return result
+
+    def get_schedule(self, value, time_type):
+        """Parse a tag value's schedule, returns None if its invalid."""
+        if (value, time_type) in self.schedules:
+            return self.schedules[(value, time_type)]
         # this is to normalize trailing semicolons which when done allows
         # dateutil.parser.parse to process: value='off=(m-f,1);' properly.
         # before this normalization, some cases would silently fail.
-        value = ';'.join(filter(None, value.split(';')))
-        if self.parser.has_resource_schedule(value, time_type):
-            schedule = self.parser.parse(value)
-        elif self.parser.keys_are_valid(value):
+        normalized = ';'.join(filter(None, value.split(';')))
+        if self.parser.has_resource_schedule(normalized, time_type):
+            schedule = self.parser.parse(normalized)
+        elif self.parser.keys_are_valid(normalized):
             # respect timezone from tag
-            raw_data = self.parser.raw_data(value)
+            raw_data = self.parser.raw_data(normalized)
             if 'tz' in raw_data:
                 schedule = dict(self.default_schedule)
                 schedule['tz'] = raw_data['tz']
@@ -434,28 +475,25 @@ class Time(Filter):
                 schedule = self.default_schedule
         else:
             schedule = None
-        if schedule is None:
-            log.warning(
-                "Invalid schedule on resource:%s value:%s", rid, value)
-            self.parse_errors.append((rid, value))
-            return False
-        tz = self.get_tz(schedule['tz'])
-        if not tz:
-            log.warning(
-                "Could not resolve tz on resource:%s value:%s", rid, value)
-            self.parse_errors.append((rid, value))
-            return False
-        now = datetime.datetime.now(tz).replace(
-            minute=0, second=0, microsecond=0)
-        now_str = now.strftime("%Y-%m-%d")
+        self.schedules[(value, time_type)] = schedule
+        return schedule
+
+    def get_now(self, tz_name):
+        """Return the current hour in a timezone, or None if its invalid."""
+        if self.now is not None and tz_name in self.now:
+            return self.now[tz_name]
+        tz = self.get_tz(tz_name)
+        now = tz and datetime.datetime.now(tz).replace(
+            minute=0, second=0, microsecond=0) or None
+        if self.now is not None:
+            self.now[tz_name] = now
+        return now
+
+    def get_skip_days(self):
         if 'skip-days-from' in self.data:
             values = ValuesFrom(self.data['skip-days-from'], self.manager)
-            self.skip_days = values.get_values()
-        else:
-            self.skip_days = self.data.get('skip-days', [])
-        if now_str in self.skip_days:
-            return False
-        return self.match(now, schedule)
+            return values.get_values()
+        return self.data.get('skip-days', [])
 
     def match(self, now, schedule):
         time = schedule.get(self.time_type, ())
@@ -469,10 +507,8 @@ class Time(Filter):
         """Get the resource's tag value specifying its schedule."""
         # Look for the tag, Normalize tag key and tag value
         found = self.fallback_schedule
-        for t in i.get('Tags', ()):
-            if t['Key'].lower() == self.tag_key:
-                found = t['Value']
-                break
+        if 'Tags' in i:
+            found = get_tag_map(i, normalize=True).get(self.tag_key, found)
         # NOTE for GCP resources, eg sql-instance
         if found == self.fallback_schedule and 'labels' in i:
             found = i.get('labels', {}).get(self.tag_key) or found
@@ -4,6 +4,7 @@
 Custodian support for diffing and patching across multiple versions
 of a resource.
 """
+from concurrent.futures import as_completed
 
 from dateutil.parser import parse as parse_date
 from dateutil.tz import tzlocal, tzutc
@@ -11,7 +12,7 @@ from dateutil.tz import tzlocal, tzutc
 from c7n.exceptions import PolicyValidationError, ClientError
 from c7n.filters import Filter
 from c7n.manager import resources
-from c7n.utils import local_session, type_schema
+from c7n.utils import chunks, get_retry, local_session, type_schema
 
 try:
     import jsonpatch
@@ -35,17 +36,29 @@ class Diff(Filter):
 
     Revisions can be selected by date, against the previous version, and
     against a locked version (requires use of is-locked filter).
+
+    Revisions are fetched concurrently and cached per resource and
+    selector in the policy cache. With the previous selector, ``batch``
+    fetches the latest recorded revisions a hundred resources at a time.
     """
 
     schema = type_schema(
         'diff',
         selector={'enum': ['previous', 'date', 'locked']},
         # For date selectors allow value specification
-        selector_value={'type': 'string'})
+        selector_value={'type': 'string'},
+        batch={'type': 'boolean'})
 
     permissions = ('config:GetResourceConfigHistory',)
 
     selector_value = mode = parser = resource_shape = None
+    max_workers = 4
+    retry = staticmethod(get_retry(('ThrottlingException',)))
+
+    def get_permissions(self):
+        if self.data.get('batch'):
+            return ('config:BatchGetResourceConfig',)
+        return self.permissions
 
     def validate(self):
         if 'selector' in self.data and self.data['selector'] == 'date':
@@ -71,17 +84,20 @@ class Diff(Filter):
                 raise PolicyValidationError(
                     "locked selector needs previous use of is-locked filter on %s" % (
                         self.manager.data))
+        if self.data.get('batch') and self.data.get('selector', 'previous') != 'previous':
+            raise PolicyValidationError(
+                "batch is only supported with the previous selector on %s" % (
+                    self.manager.data))
         return self
 
     def process(self, resources, event=None):
-        session = local_session(self.manager.session_factory)
-        config = session.client('config')
         self.model = self.manager.get_model()
+        revisions = self.get_resource_revisions(resources)
 
         results = []
         for r in resources:
-            revisions = self.get_revisions(config, r)
-            r['c7n:previous-revision'] = rev = self.select_revision(revisions)
+            r['c7n:previous-revision'] = rev = self.select_revision(
+                revisions.get(self.get_revision_key(r), ()))
             if not rev:
                 continue
             delta = self.diff(rev['resource'], r)
@@ -90,14 +106,74 @@ class Diff(Filter):
                 results.append(r)
         return results
 
+    def get_resource_revisions(self, resources):
+        """Get the config revisions of resources, keyed by revision key."""
+        cache_key = self.get_revisions_cache_key()
+        with self.manager._cache:
+            revisions = self.manager._cache.get(cache_key) or {}
+        pending = {}
+        for r in resources:
+            rkey = self.get_revision_key(r)
+            if rkey not in revisions:
+                pending[rkey] = r
+        if not pending:
+            return revisions
+
+        config = local_session(self.manager.session_factory).client('config')
+        if self.data.get('batch'):
+            fetched = self.get_batch_revisions(config, list(pending.values()))
+            for rkey, r in pending.items():
+                revisions[rkey] = fetched.get(r[self.model.id], [])
+        else:
+            with self.executor_factory(max_workers=self.max_workers) as w:
+                futures = {
+                    w.submit(self.get_revisions, config, r): rkey
+                    for rkey, r in pending.items()}
+                for f in as_completed(futures):
+                    revisions[futures[f]] = f.result()
+        with self.manager._cache:
+            self.manager._cache.save(cache_key, revisions)
+        return revisions
+
+    def get_revisions_cache_key(self):
+        return {
+            'account': self.manager.config.account_id,
+            'region': self.manager.config.region,
+            'resource': 'config-revisions:%s' % self.model.config_type,
+            'selector': self.data.get('selector', 'previous'),
+            'selector_value': self.data.get('selector_value'),
+            'batch': bool(self.data.get('batch'))}
+
+    def get_revision_key(self, resource):
+        if self.data.get('selector') == 'locked':
+            return "%s:%s" % (resource[self.model.id], resource.get('c7n:locked_date'))
+        return resource[self.model.id]
+
+    def get_batch_revisions(self, config, resources):
+        """Get the latest recorded revision of resources, keyed by resource id."""
+        revisions = {}
+        for resource_set in chunks(resources, 100):
+            keys = [{'resourceType': self.model.config_type,
+                     'resourceId': r[self.model.id]} for r in resource_set]
+            # unprocessed keys are retried a few times before giving up on them.
+            for attempt in range(3):
+                response = self.retry(config.batch_get_resource_config, resourceKeys=keys)
+                for item in response.get('baseConfigurationItems', ()):
+                    item.setdefault('relatedEvents', [])
+                    revisions[item['resourceId']] = [item]
+                keys = response.get('unprocessedResourceKeys')
+                if not keys:
+                    break
+        return revisions
+
     def get_revisions(self, config, resource):
         params = dict(
             resourceType=self.model.config_type,
             resourceId=resource[self.model.id])
         params.update(self.get_selector_params(resource))
         try:
-            revisions = config.get_resource_config_history(
-                **params)['configurationItems']
+            revisions = self.retry(
+                config.get_resource_config_history, **params)['configurationItems']
         except ClientError as e:
             if e.response['Error']['Code'] == 'ResourceNotDiscoveredException':
                 return []
@@ -153,7 +229,8 @@ class JsonDiff(Diff):
         'json-diff',
         selector={'enum': ['previous', 'date', 'locked']},
         # For date selectors allow value specification
-        selector_value={'type': 'string'})
+        selector_value={'type': 'string'},
+        batch={'type': 'boolean'})
 
     def diff(self, source, target):
         source, target = (
@@ -6,12 +6,16 @@ Cloud-Custodian AWS Lambda Entry Point
 import os
 import logging
 import json
+import time
 
 from c7n.config import Config
+from c7n.ctx import ExecutionContext
+from c7n.filters import ValueFilter
 from c7n.structure import StructureParser
-from c7n.resources import load_resources
+from c7n.resources import load_index, load_resources
 from c7n.policy import PolicyCollection
-from c7n.utils import format_event, get_account_id_from_sts, local_session
+from c7n.utils import (
+    format_event, get_account_id_from_sts, local_session, reset_session_cache)
 
 import boto3
 
@@ -40,6 +44,11 @@ C7N_DEBUG_EVENT = True
 # Set with `export C7N_CATCH_ERR=yes`
 C7N_CATCH_ERR = False
 
+# Control whether policies are constructed and validated once per
+# container and reused across warm invocations.
+# Set with `export C7N_REUSE_POLICIES=no` to rebuild them per invocation.
+C7N_REUSE_POLICIES = True
+
 
 ##########################################
 #
@@ -52,13 +61,22 @@ policy_data = None
 # execution options for the policy
 policy_config = None
 
+# validated policies, reused across warm invocations
+policies = None
+
+# per policy state reset on each invocation
+policy_state = {}
+
+# initialization time of a cold start, pending its metric.
+cold_start = None
+
 
 def init_env_globals():
     """Set module level values from environment variables.
 
     Encapsulated here to enable better testing.
     """
-    global C7N_SKIP_EVTERR, C7N_DEBUG_EVENT, C7N_CATCH_ERR
+    global C7N_SKIP_EVTERR, C7N_DEBUG_EVENT, C7N_CATCH_ERR, C7N_REUSE_POLICIES
 
     C7N_SKIP_EVTERR = os.environ.get(
         'C7N_SKIP_ERR_EVENT', 'yes') == 'yes' and True or False
@@ -69,6 +87,9 @@ def init_env_globals():
     C7N_CATCH_ERR = os.environ.get(
         'C7N_CATCH_ERR', 'no').strip().lower() == 'yes' and True or False
 
+    C7N_REUSE_POLICIES = os.environ.get(
+        'C7N_REUSE_POLICIES', 'yes').strip().lower() == 'yes' and True or False
+
 
 def init_config(policy_config):
     """Get policy lambda execution configuration.
@@ -142,12 +163,16 @@ def dispatch_event(event, context):
         return
 
     # one time initialization for cold starts.
-    global policy_config, policy_data
+    global policy_config, policy_data, policies, cold_start
     if policy_config is None:
+        cold_start = time.time()
         with open('config.json') as f:
             policy_data = json.load(f)
         policy_config = init_config(policy_data)
-        load_resources(StructureParser().get_resource_types(policy_data))
+        if policy_data.get('resource-index'):
+            load_index(policy_data['resource-index'])
+        else:
+            load_resources(StructureParser().get_resource_types(policy_data))
 
     if C7N_DEBUG_EVENT:
         event['debug'] = True
@@ -156,16 +181,78 @@ def dispatch_event(event, context):
     if not policy_data or not policy_data.get('policies'):
         return False
 
-    policies = PolicyCollection.from_data(policy_data, policy_config)
+    if policies is None or not C7N_REUSE_POLICIES:
+        policies = PolicyCollection.from_data(policy_data, policy_config)
+        policy_state.clear()
+
+    init_start, cold_start = cold_start, None
     for p in policies:
         try:
-            # validation provides for an initialization point for
-            # some filters/actions.
-            p.validate()
-            p.push(event, context)
+            if p.name not in policy_state:
+                # validation provides for an initialization point for
+                # some filters/actions.
+                p.validate()
+                policy_state[p.name] = get_policy_state(p)
+            else:
+                reset_policy_state(p, policy_state[p.name])
+            metrics = put_start_metrics(p, init_start)
+            try:
+                p.push(event, context)
+            finally:
+                # lambda modes only enter the policy context, which flushes
+                # its metrics, when resources match.
+                metrics.flush()
         except Exception:
             log.exception("error during policy execution")
             if C7N_CATCH_ERR:
                 continue
             raise
     return True
+
+
+def get_policy_state(p):
+    """Capture the policy state an invocation may modify.
+
+    Member account execution updates the policy's options and session
+    factory for the event's account and region.
+    """
+    return (dict(p.options),
+            {k: getattr(p.session_factory, k, None) for k in ('region', 'assume_role')})
+
+
+def reset_policy_state(p, state):
+    """Restore a reused policy's state for a new invocation.
+
+    Each invocation also gets a new execution context, so metrics and
+    outputs aren't carried over from previous invocations, and value
+    filters re-read their value_from content.
+    """
+    options, session_options = state
+    p.options.update(options)
+    p.ctx = p.resource_manager.ctx = ExecutionContext(p.session_factory, p, p.options)
+    for f in p.resource_manager.iter_filters():
+        if isinstance(f, ValueFilter) and 'value_from' in f.data:
+            f.v = None
+            f.__dict__.pop('content_initialized', None)
+    changed = False
+    for k, v in session_options.items():
+        if getattr(p.session_factory, k, None) != v:
+            setattr(p.session_factory, k, v)
+            changed = True
+    if changed:
+        reset_session_cache()
+
+
+def put_start_metrics(p, init_start=None):
+    """Record whether an invocation was a cold start.
+
+    Metrics are buffered with the policy's execution metrics, the
+    returned metrics output is flushed once the policy has run.
+    """
+    metrics = p.ctx.metrics
+    metrics.put_metric('ColdStart', init_start is not None and 1 or 0, 'Count')
+    if init_start is not None:
+        init_time = time.time() - init_start
+        log.info("policy:%s cold start initialization %0.2fs", p.name, init_time)
+        metrics.put_metric('InitTime', init_time, 'Seconds')
+    return metrics
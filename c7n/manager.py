@@ -100,12 +100,14 @@ class ResourceManager:
             return klass(self.ctx, {'source': self.source_type})
         return klass(self.ctx, data or {})
 
-    def filter_resources(self, resources, event=None):
+    def filter_resources(self, resources, event=None, filters=None):
         original = len(resources)
+        if filters is None:
+            filters = self.filters
         if event and event.get('debug', False):
             self.log.info(
-                "Filtering resources using %d filters", len(self.filters))
-        for idx, f in enumerate(self.filters, start=1):
+                "Filtering resources using %d filters", len(filters))
+        for idx, f in enumerate(filters, start=1):
             if not resources:
                 break
             rcount = len(resources)
@@ -6,6 +6,7 @@ Cloud Custodian Lambda Provisioning Support
 docs/lambda.rst
 """
 import abc
+import ast
 import base64
 import hashlib
 import importlib
@@ -13,6 +14,7 @@ import io
 import json
 import logging
 import os
+import re
 import shutil
 import time
 import tempfile
@@ -35,10 +37,17 @@ except ImportError:
 # Static event mapping to help simplify cwe rules creation
 from c7n.exceptions import ClientError
 from c7n.cwe import CloudWatchEvents
+from c7n.provider import clouds
+from c7n.structure import StructureParser
 from c7n.utils import parse_s3, local_session, get_retry, merge_dict
+from c7n.version import version
 
 log = logging.getLogger('custodian.serverless')
 
+# Module archives are built once per content digest and reused from here.
+ARCHIVE_CACHE_DIR = os.environ.get('C7N_ARCHIVE_CACHE', '~/.cache/c7n-archives')
+ARCHIVE_CACHE_SIZE = int(os.environ.get('C7N_ARCHIVE_CACHE_SIZE', 10))
+
 LambdaRetry = get_retry(('InsufficientPermissionsException',
                          'InvalidParameterValueException',), max_attempts=5)
 LambdaConflictRetry = get_retry(('ResourceConflictException',), max_attempts=3)
@@ -66,7 +75,8 @@ class PythonPackageArchive:
 
     zip_compression = zipfile.ZIP_DEFLATED
 
-    def __init__(self, modules=(), cache_file=None):
+    def __init__(self, modules=(), cache_file=None, prefix=''):
+        self.prefix = prefix
         self._temp_archive_file = tempfile.NamedTemporaryFile(delete=False)
         if cache_file:
             with open(cache_file, 'rb') as fin:
@@ -104,7 +114,7 @@ class PythonPackageArchive:
 
     def create_zinfo(self, file):
         if not isinstance(file, zipfile.ZipInfo):
-            file = zinfo(file)
+            file = zinfo(self.prefix + file)
 
         # Ensure we apply the compression
         file.compress_type = self.zip_compression
@@ -360,10 +370,257 @@ def custodian_archive(packages=None):
     packages: List of additional packages to include in the lambda archive.
 
     """
+    modules = custodian_modules(packages)
+    cache_file = get_archive_cache(modules)
+    if cache_file is None:
+        return PythonPackageArchive(modules)
+    return PythonPackageArchive(cache_file=cache_file)
+
+
+def custodian_layer_archive(packages=None):
+    """Create a lambda layer archive of custodian and additional packages.
+
+    Layer contents are extracted under /opt, with the python directory
+    added to the function's ``sys.path``.
+    """
+    modules = custodian_modules(packages)
+    cache_file = get_archive_cache(modules, prefix='python/')
+    if cache_file is None:
+        return PythonPackageArchive(modules, prefix='python/').close()
+    return PythonPackageArchive(cache_file=cache_file).close()
+
+
+def custodian_minimal_archive(index, packages=None):
+    """Create a lambda archive with only the custodian modules a policy uses.
+
+    index: policy resource index, see :py:func:`get_policy_index`.
+    packages: List of additional packages to include in the lambda archive.
+    """
+    archive = PythonPackageArchive(
+        [m for m in custodian_modules(packages) if m != 'c7n'])
+    roots = ['c7n.handler', 'c7n.resources.resource_map']
+    roots.extend(index['modules'])
+    for dest, src in sorted(get_module_closure(roots).items()):
+        archive.add_file(src, dest)
+    return archive
+
+
+def get_policy_index(policy):
+    """Return the resource types and modules providing a policy's plugins.
+
+    The index is written to the policy's lambda config, allowing the handler
+    to import just these modules instead of a provider's default set.
+    """
+    manager = policy.resource_manager
+    modules = {
+        clouds[policy.provider_name].__module__,
+        type(manager).__module__,
+        type(manager.source).__module__}
+    mode = policy.get_execution_mode()
+    if mode is not None:
+        modules.add(type(mode).__module__)
+    plugins = list(manager.iter_filters())
+    plugins.extend(policy.conditions.iter_filters())
+    plugins.extend(manager.actions)
+    modules.update(type(p).__module__ for p in plugins)
+    return {
+        'providers': [policy.provider_name],
+        'resources': sorted(StructureParser().get_resource_types(
+            {'policies': [policy.data]})),
+        'modules': sorted(modules)}
+
+
+# Modules whose imports are governed by the resource index, only their
+# module level imports are followed.
+INDEX_MODULES = ('c7n.resources', 'c7n.resources.resource_map')
+
+MODULE_REF = re.compile(r'^[a-zA-Z_][\w]*(\.[a-zA-Z_][\w]*)+$')
+
+_module_refs = {}
+_resource_modules = {}
+
+
+def get_resource_modules():
+    """Return a mapping of aws resource type names to their modules.
+
+    Resource managers are often fetched by their short name, which
+    resource_map resolves to the module providing them.
+    """
+    if not _resource_modules:
+        from c7n.resources.resource_map import ResourceMap
+        for rtype, path in ResourceMap.items():
+            module = path.rsplit('.', 1)[0]
+            _resource_modules[rtype] = module
+            _resource_modules[rtype.split('.', 1)[1]] = module
+    return _resource_modules
+
+
+def get_module_closure(modules, package='c7n'):
+    """Return the source files of the package modules used by modules.
+
+    Imports are found statically, including function level imports, dotted
+    path strings (ie. related resource filters) and resource type names
+    (ie. ``get_resource_manager('ebs')``), giving a superset of what's
+    imported at runtime. Returns a mapping of archive path to source path.
+    """
+    base = os.path.dirname(os.path.dirname(
+        importlib.import_module(package).__file__))
+    found = {}
+    queue = list(modules)
+    while queue:
+        name = queue.pop()
+        if name in found or name.split('.', 1)[0] != package:
+            continue
+        path = os.path.join(base, *name.split('.'))
+        if os.path.isfile(os.path.join(path, '__init__.py')):
+            path = os.path.join(path, '__init__.py')
+        elif os.path.isfile(path + '.py'):
+            path += '.py'
+        else:
+            continue
+        found[name] = path
+        queue.append(name.rsplit('.', 1)[0])
+        queue.extend(get_module_refs(name, path))
+    return {os.path.relpath(p, base): p for p in found.values()}
+
+
+def get_module_refs(name, path):
+    """Return the names a module's imports may refer to."""
+    if path in _module_refs:
+        return _module_refs[path]
+    with open(path, 'rb') as fh:
+        tree = ast.parse(fh.read(), path)
+    package = name
+    if not path.endswith('__init__.py'):
+        package = name.rsplit('.', 1)[0]
+
+    refs = set()
+    # resource modules fetch each other's managers by type name
+    resource_modules = {}
+    if package == 'c7n.resources':
+        resource_modules = get_resource_modules()
+    nodes = name in INDEX_MODULES and tree.body or ast.walk(tree)
+    for node in nodes:
+        if isinstance(node, ast.Import):
+            refs.update(a.name for a in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = node.module
+            if node.level:
+                module = package.rsplit('.', node.level - 1)[0]
+                if node.module:
+                    module = "%s.%s" % (module, node.module)
+            refs.add(module)
+            refs.update("%s.%s" % (module, a.name) for a in node.names)
+        elif (isinstance(node, ast.Constant) and isinstance(node.value, str) and
+                MODULE_REF.match(node.value)):
+            parts = node.value.split('.')
+            refs.update('.'.join(parts[:i]) for i in range(2, len(parts) + 1))
+            if node.value in resource_modules:
+                refs.add(resource_modules[node.value])
+        elif (isinstance(node, ast.Constant) and isinstance(node.value, str) and
+                node.value in resource_modules):
+            refs.add(resource_modules[node.value])
+    _module_refs[path] = refs
+    return refs
+
+
+def custodian_modules(packages=None):
     modules = {'c7n'}
     if packages:
         modules = filter(None, modules.union(packages))
-    return PythonPackageArchive(sorted(modules))
+    return sorted(modules)
+
+
+_module_digests = {}
+
+
+def get_modules_digest(modules):
+    """Return a digest of the source files of the given modules."""
+    key = tuple(modules)
+    if key in _module_digests:
+        return _module_digests[key]
+    hasher = hashlib.sha256(version.encode('utf8'))
+    for module_name in modules:
+        module = importlib.import_module(module_name)
+        hasher.update(module_name.encode('utf8'))
+        paths = list(getattr(module, '__path__', ()))
+        if not paths and getattr(module, '__file__', None):
+            paths = [module.__file__]
+        for path in paths:
+            walk = os.path.isdir(path) and os.walk(path) or [
+                (os.path.dirname(path), [], [os.path.basename(path)])]
+            for root, dirs, files in walk:
+                dirs.sort()
+                for f in sorted(files):
+                    if f.endswith('.pyc'):
+                        continue
+                    hasher.update(os.path.relpath(os.path.join(root, f), path).encode('utf8'))
+                    with open(os.path.join(root, f), 'rb') as fh:
+                        hasher.update(checksum(fh, hashlib.sha256()))
+    digest = _module_digests[key] = hasher.hexdigest()
+    return digest
+
+
+def get_archive_cache(modules, prefix=''):
+    """Return the path of a cached archive of modules, building it if needed.
+
+    Archives are content addressed by the digest of the modules' sources
+    and custodian version, so policies deploying the same packages share
+    one build. Only the most recently used builds are kept, see
+    :py:func:`prune_archive_cache`. Returns None if the cache directory
+    isn't writable.
+    """
+    cache_dir = os.path.abspath(os.path.expanduser(ARCHIVE_CACHE_DIR))
+    digest = hashlib.sha256(("%s:%s" % (
+        prefix, get_modules_digest(modules))).encode('utf8')).hexdigest()
+    path = os.path.join(cache_dir, "%s.zip" % digest)
+    if os.path.exists(path):
+        try:
+            # track use for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError as e:
+        log.debug("unable to cache lambda archive %s", e)
+        return None
+    archive = PythonPackageArchive(modules, prefix=prefix).close()
+    try:
+        # copy then rename, for concurrent deployments sharing the cache.
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as fh, archive.get_stream() as src:
+            shutil.copyfileobj(src, fh)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log.debug("unable to cache lambda archive %s", e)
+        archive.remove()
+        return None
+    archive.remove()
+    prune_archive_cache(cache_dir)
+    return path
+
+
+def prune_archive_cache(cache_dir, size=None):
+    """Remove all but the most recently used cached archives.
+
+    Keeps ``C7N_ARCHIVE_CACHE_SIZE`` (default 10) archives.
+    """
+    size = ARCHIVE_CACHE_SIZE if size is None else size
+    archives = []
+    for n in os.listdir(cache_dir):
+        if not n.endswith('.zip'):
+            continue
+        try:
+            archives.append((os.path.getmtime(os.path.join(cache_dir, n)), n))
+        except OSError:
+            continue
+    for _, n in sorted(archives, reverse=True)[size:]:
+        try:
+            os.remove(os.path.join(cache_dir, n))
+        except OSError as e:
+            log.debug("unable to remove cached lambda archive %s", e)
 
 
 class LambdaManager:
@@ -385,6 +642,10 @@ class LambdaManager:
                     yield f
 
     def publish(self, func, alias=None, role=None, s3_uri=None):
+        if getattr(func, 'custodian_layer', False):
+            func.layer_arn = self.publish_layer(
+                func.layer_name, func.layer_description, func.runtime,
+                func.get_layer_archive)
         result, changed = self._create_or_update(
             func, role, s3_uri, qualifier=alias)
         func.arn = result['FunctionArn']
@@ -404,6 +665,26 @@ class LambdaManager:
 
     add = publish
 
+    def publish_layer(self, name, description, runtime, get_archive):
+        """Publish a layer version, reusing an existing version if present.
+
+        Versions are matched on description, which should identify the
+        layer contents, the archive is only built when publishing.
+        """
+        paginator = self.client.get_paginator('list_layer_versions')
+        for page in paginator.paginate(LayerName=name, CompatibleRuntime=runtime):
+            for v in page.get('LayerVersions', ()):
+                if v.get('Description') == description:
+                    log.debug("Using existing layer version %s", v['LayerVersionArn'])
+                    return v['LayerVersionArn']
+        log.info("Publishing layer %s", name)
+        result = self.client.publish_layer_version(
+            LayerName=name,
+            Description=description,
+            Content={'ZipFile': get_archive().get_bytes()},
+            CompatibleRuntimes=[runtime])
+        return result['LayerVersionArn']
+
     def remove(self, func, alias=None):
         for e in func.get_events(self.session_factory):
             e.remove(func, func_deleted=True)
@@ -854,7 +1135,16 @@ class PolicyLambda(AbstractLambdaFunction):
 
     def __init__(self, policy):
         self.policy = policy
-        self.archive = custodian_archive(packages=self.packages)
+        self.layer_arn = None
+        self.index = None
+        if self.minimal_package:
+            self.index = get_policy_index(policy)
+        if self.custodian_layer:
+            self.archive = PythonPackageArchive()
+        elif self.minimal_package:
+            self.archive = custodian_minimal_archive(self.index, self.packages)
+        else:
+            self.archive = custodian_archive(packages=self.packages)
 
     @property
     def name(self):
@@ -926,7 +1216,28 @@ class PolicyLambda(AbstractLambdaFunction):
 
     @property
     def layers(self):
-        return self.policy.data['mode'].get('layers', ())
+        layers = list(self.policy.data['mode'].get('layers', ()))
+        if self.layer_arn:
+            layers.append(self.layer_arn)
+        return layers
+
+    @property
+    def custodian_layer(self):
+        return self.policy.data['mode'].get('custodian-layer', False)
+
+    @property
+    def minimal_package(self):
+        return self.policy.data['mode'].get('minimal-package', False)
+
+    @property
+    def layer_name(self):
+        prefix = self.policy.data['mode'].get('function-prefix', 'custodian-')
+        return "%sruntime" % prefix
+
+    @property
+    def layer_description(self):
+        return "cloud-custodian %s %s" % (
+            version, get_modules_digest(custodian_modules(self.packages)))
 
     @property
     def packages(self):
@@ -958,14 +1269,18 @@ class PolicyLambda(AbstractLambdaFunction):
         return events
 
     def get_archive(self):
-        self.archive.add_contents(
-            'config.json', json.dumps(
-                {'execution-options': get_exec_options(self.policy.options),
-                 'policies': [self.policy.data]}, indent=2))
+        config = {'execution-options': get_exec_options(self.policy.options),
+                  'policies': [self.policy.data]}
+        if self.index:
+            config['resource-index'] = self.index
+        self.archive.add_contents('config.json', json.dumps(config, indent=2))
         self.archive.add_contents('custodian_policy.py', PolicyHandlerTemplate)
         self.archive.close()
         return self.archive
 
+    def get_layer_archive(self):
+        return custodian_layer_archive(packages=self.packages)
+
 
 def zinfo(fname):
     """Amazon lambda exec environment setup can break itself
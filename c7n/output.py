@@ -8,6 +8,7 @@ See docs/usage/outputs.rst
 
 """
 import contextlib
+import contextvars
 import datetime
 import gzip
 import logging
@@ -314,6 +315,21 @@ class LogMetrics(Metrics):
         return res
 
 
+# The log output of the policy running in the current context, worker
+# threads of c7n.executor.ThreadPoolExecutor inherit it from the submitter.
+log_output_context = contextvars.ContextVar('c7n_log_output', default=None)
+
+
+class PolicyLogFilter:
+    """Only pass records logged while running the given log output's policy."""
+
+    def __init__(self, output):
+        self.output = output
+
+    def filter(self, record):
+        return log_output_context.get() is self.output
+
+
 class LogOutput:
 
     log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -342,12 +358,20 @@ class LogOutput:
             return
         self.handler.setLevel(logging.DEBUG)
         self.handler.setFormatter(logging.Formatter(self.log_format))
+        # With concurrent policy execution, keep other policies' logs out.
+        options = getattr(self.ctx, 'options', None)
+        if getattr(options, 'jobs', 1) > 1:
+            self.context_token = log_output_context.set(self)
+            self.handler.addFilter(PolicyLogFilter(self))
         mlog = logging.getLogger('custodian')
         mlog.addHandler(self.handler)
 
     def leave_log(self):
         if self.handler is None:
             return
+        if getattr(self, 'context_token', None) is not None:
+            log_output_context.reset(self.context_token)
+            self.context_token = None
         mlog = logging.getLogger('custodian')
         mlog.removeHandler(self.handler)
         self.handler.flush()
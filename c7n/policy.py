@@ -396,6 +396,8 @@ class LambdaMode(ServerlessExecutionMode):
             'function-prefix': {'type': 'string'},
             'member-role': {'type': 'string'},
             'packages': {'type': 'array', 'items': {'type': 'string'}},
+            'custodian-layer': {'type': 'boolean'},
+            'minimal-package': {'type': 'boolean'},
             # Lambda passthrough config
             'layers': {'type': 'array', 'items': {'type': 'string'}},
             'concurrency': {'type': 'integer'},
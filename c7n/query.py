@@ -14,8 +14,10 @@ from typing import List
 import jmespath
 import os
 
+from c7n import cache
 from c7n.actions import ActionRegistry
 from c7n.exceptions import ClientError, ResourceLimitExceeded, PolicyExecutionError
+from c7n.executor import get_adaptive_limit
 from c7n.filters import FilterRegistry, MetricsFilter
 from c7n.manager import ResourceManager
 from c7n.registry import PluginRegistry
@@ -48,6 +50,19 @@ class ResourceQuery:
             m = resource_type
         return m
 
+    def _iter_client_enum(self, client, enum_op, params, path, retry=None):
+        if not path or not client.can_paginate(enum_op):
+            yield self._invoke_client_enum(
+                client, enum_op, params, path, retry) or []
+            return
+
+        p = client.get_paginator(enum_op)
+        if retry:
+            p.PAGE_ITERATOR_CLS = RetryPageIterator
+        path = jmespath.compile(path)
+        for page in p.paginate(**params):
+            yield path.search(page) or []
+
     def _invoke_client_enum(self, client, enum_op, params, path, retry=None):
         if client.can_paginate(enum_op):
             p = client.get_paginator(enum_op)
@@ -65,8 +80,7 @@ class ResourceQuery:
 
         return data
 
-    def filter(self, resource_manager, **params):
-        """Query a set of resources."""
+    def _get_enum(self, resource_manager, params):
         m = self.resolve(resource_manager.resource_type)
         if resource_manager.get_client:
             client = resource_manager.get_client()
@@ -76,10 +90,22 @@ class ResourceQuery:
         enum_op, path, extra_args = m.enum_spec
         if extra_args:
             params.update(extra_args)
+        return client, enum_op, path
+
+    def filter(self, resource_manager, **params):
+        """Query a set of resources."""
+        client, enum_op, path = self._get_enum(resource_manager, params)
         return self._invoke_client_enum(
             client, enum_op, params, path,
             getattr(resource_manager, 'retry', None)) or []
 
+    def iter_filter(self, resource_manager, **params):
+        """Query a set of resources, yielding a list per page of results."""
+        client, enum_op, path = self._get_enum(resource_manager, params)
+        return self._iter_client_enum(
+            client, enum_op, params, path,
+            getattr(resource_manager, 'retry', None))
+
     def get(self, resource_manager, identities):
         """Get resources by identities
         """
@@ -173,6 +199,9 @@ class ChildResourceQuery(ResourceQuery):
     def get_parent_parameters(self, params, parent_id, parent_key):
         return dict(params, **{parent_key: parent_id})
 
+    def iter_filter(self, resource_manager, **params):
+        yield self.filter(resource_manager, **params)
+
 
 class QueryMeta(type):
 
@@ -229,6 +258,14 @@ class DescribeSource:
     def resources(self, query):
         return self.query.filter(self.manager, **query)
 
+    def iter_resources(self, query):
+        """Yield resources a page at a time."""
+        # sources with a custom enumeration can only be consumed as a whole.
+        if self.__class__.resources is not DescribeSource.resources:
+            yield self.resources(query)
+            return
+        yield from self.query.iter_filter(self.manager, **query)
+
     def get_query(self):
         return self.resource_query_factory(self.manager.session_factory)
 
@@ -261,6 +298,8 @@ class DescribeSource:
             _augment = _batch_augment
         else:
             return resources
+        if getattr(self.manager.config, 'adaptive_augment', False):
+            return self._adaptive_augment(_augment, model, detail_spec, resources)
         _augment = functools.partial(
             _augment, self.manager, model, detail_spec)
         with self.manager.executor_factory(
@@ -269,6 +308,24 @@ class DescribeSource:
                 _augment, chunks(resources, self.manager.chunk_size)))
             return list(itertools.chain(*results))
 
+    def _adaptive_augment(self, _augment, model, detail_spec, resources):
+        """Augment with concurrency adapted to the service's throttling.
+
+        Calls to the service in the region share a limit on in flight
+        requests that rises while calls succeed and backs off on throttles,
+        scalar detail calls are issued per resource rather than per chunk.
+        """
+        limit = get_adaptive_limit(model.service, self.manager.config.region)
+        _augment = functools.partial(
+            _augment, self.manager, model, detail_spec, limit=limit)
+        chunk_size = _augment.func is _scalar_augment and 1 or self.manager.chunk_size
+        with self.manager.executor_factory(max_workers=limit.maximum) as w:
+            results = list(w.map(_augment, chunks(resources, chunk_size)))
+        self.manager.log.debug(
+            "augmented %d %s, concurrency limit:%d throttles:%d",
+            len(resources), model.service, limit.limit, limit.throttles)
+        return list(itertools.chain(*results))
+
 
 @sources.register('describe-child')
 class ChildDescribeSource(DescribeSource):
@@ -441,6 +498,8 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
     # TODO Check if we can move to describe source
     max_workers = 3
     chunk_size = 20
+    # resources per batch augmented and filtered when streaming
+    stream_batch_size = 1000
 
     permissions = ()
 
@@ -504,19 +563,68 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
         return perms
 
     def get_cache_key(self, query):
-        return {
+        key = {
             'account': self.account_id,
             'region': self.config.region,
             'resource': str(self.__class__.__name__),
             'source': self.source_type,
             'q': query
         }
+        attributes = self.get_augment_attributes()
+        if attributes is not None:
+            key['attributes'] = sorted(attributes)
+        return key
+
+    def get_augment_attributes(self):
+        """Return the resource attributes the policy reads, None for all.
+
+        Only applies with projected augment enabled, for the policy's own
+        resource manager, when all of its filters and actions declare the
+        attributes they use.
+        """
+        if not getattr(self.config, 'projected_augment', False):
+            return None
+        if self.data != self.ctx.policy.data:
+            return None
+        attributes = set()
+        for e in itertools.chain(self.iter_filters(), self.actions):
+            e_attributes = e.get_augment_attributes()
+            if e_attributes is None:
+                return None
+            attributes.update(e_attributes)
+        return attributes
+
+    @property
+    def streaming(self):
+        return bool(getattr(self.config, 'stream', False))
 
     def resources(self, query=None, augment=True) -> List[dict]:
         query = self.source.get_query_params(query)
         cache_key = self.get_cache_key(query)
-        resources = None
 
+        if augment and self.streaming:
+            resources, resource_count = self._stream_resources(query, cache_key)
+        else:
+            # Within a run, share augmented populations across policies.
+            snapshots = cache.get_snapshots()
+            if augment and snapshots is not None:
+                resources = snapshots.get(
+                    cache_key, functools.partial(
+                        self._load_resources, query, cache_key, augment))
+            else:
+                resources = self._load_resources(query, cache_key, augment)
+
+            resource_count = len(resources)
+            with self.ctx.tracer.subsegment('filter'):
+                resources = self.filter_resources(resources)
+
+        # Check if we're out of a policies execution limits.
+        if self.data == self.ctx.policy.data:
+            self.check_resource_limit(len(resources), resource_count)
+        return resources
+
+    def _load_resources(self, query, cache_key, augment):
+        resources = None
         with self._cache:
             resources = self._cache.get(cache_key)
             if resources is not None:
@@ -533,16 +641,59 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
                     with self.ctx.tracer.subsegment('resource-augment'):
                         resources = self.augment(resources)
                     # Don't pollute cache with unaugmented resources.
-                    self._cache.save(cache_key, resources)
+                    self._cache.save(
+                        cache_key, resources, id_key=self.get_model().id)
+        return resources
+
+    def _stream_resources(self, query, cache_key):
+        """Augment and filter resources a batch at a time as they're enumerated.
 
-        resource_count = len(resources)
+        Only the resources matching the filters applied per batch are kept in
+        memory, the remaining set level filters are applied to those.
+        """
+        with self._cache:
+            resources = self._cache.get(cache_key)
+        if resources is not None:
+            with self.ctx.tracer.subsegment('filter'):
+                return self.filter_resources(resources), len(resources)
+
+        batch_filters, filters = self.get_stream_filters()
+        resources, resource_count = [], 0
+        with self.ctx.tracer.subsegment('resource-stream'):
+            for batch in self.iter_resources(query):
+                resource_count += len(batch)
+                for f in batch_filters:
+                    if not batch:
+                        break
+                    with self.ctx.tracer.subsegment("filter:%s" % f.type):
+                        batch = f.process(batch)
+                resources.extend(batch)
+
+        self.log.debug("Streamed %d of %d resources to filters", len(resources), resource_count)
         with self.ctx.tracer.subsegment('filter'):
-            resources = self.filter_resources(resources)
+            resources = self.filter_resources(resources, filters=filters)
+        return resources, resource_count
 
-        # Check if we're out of a policies execution limits.
-        if self.data == self.ctx.policy.data:
-            self.check_resource_limit(len(resources), resource_count)
-        return resources
+    def get_stream_filters(self):
+        """Split filters into those applied per batch and those after streaming.
+        """
+        for idx, f in enumerate(self.filters):
+            if f.set_level:
+                return self.filters[:idx], self.filters[idx:]
+        return self.filters, []
+
+    def iter_resources(self, query=None):
+        """Yield augmented resources in batches of up to stream_batch_size."""
+        pages = getattr(self.source, 'iter_resources', None)
+        pages = pages(query or {}) if pages else [self.source.resources(query or {})]
+        batch = []
+        for page in pages:
+            batch.extend(page)
+            while len(batch) >= self.stream_batch_size:
+                yield self.augment(batch[:self.stream_batch_size])
+                batch = batch[self.stream_batch_size:]
+        if batch:
+            yield self.augment(batch)
 
     def check_resource_limit(self, selection_count, population_count):
         """Check if policy's execution affects more resources then its limit.
@@ -556,14 +707,18 @@ class QueryResourceManager(ResourceManager, metaclass=QueryMeta):
 
     def _get_cached_resources(self, ids):
         key = self.get_cache_key(None)
+        snapshots = cache.get_snapshots()
+        resources = snapshots.peek(key) if snapshots is not None else None
+        if resources is not None:
+            self.log.debug("Using run snapshot for get_resources")
+            m = self.get_model()
+            id_set = set(ids)
+            return [r for r in resources if r[m.id] in id_set]
         with self._cache:
-            resources = self._cache.get(key)
+            resources = self._cache.get_by_ids(key, ids, self.get_model().id)
             if resources is not None:
                 self.log.debug("Using cached results for get_resources")
-                m = self.get_model()
-                id_set = set(ids)
-                return [r for r in resources if r[m.id] in id_set]
-        return None
+        return resources
 
     def get_resources(self, ids, cache=True, augment=True):
         if not ids:
@@ -709,11 +864,13 @@ class ChildResourceManager(QueryResourceManager):
         return self.get_resource_manager(self.resource_type.parent_spec[0])
 
 
-def _batch_augment(manager, model, detail_spec, resource_set):
+def _batch_augment(manager, model, detail_spec, resource_set, limit=None):
     detail_op, param_name, param_key, detail_path, detail_args = detail_spec
     client = local_session(manager.session_factory).client(
         model.service, region_name=manager.config.region)
     op = getattr(client, detail_op)
+    if limit is not None:
+        op = functools.partial(limit.call, op)
     if manager.retry:
         args = (op,)
         op = manager.retry
@@ -726,11 +883,13 @@ def _batch_augment(manager, model, detail_spec, resource_set):
     return response[detail_path]
 
 
-def _scalar_augment(manager, model, detail_spec, resource_set):
+def _scalar_augment(manager, model, detail_spec, resource_set, limit=None):
     detail_op, param_name, param_key, detail_path = detail_spec
     client = local_session(manager.session_factory).client(
         model.service, region_name=manager.config.region)
     op = getattr(client, detail_op)
+    if limit is not None:
+        op = functools.partial(limit.call, op)
     if manager.retry:
         args = (op,)
         op = manager.retry
@@ -1,102 +1,225 @@
 # This module calls the API gateway, extracts email addresses based on resource tags, account, account's cost center information, and updates resource details with the relevant email data to enhance communication capabilities.
 
-import os
 import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
 import requests
 import boto3
 from botocore.auth import SigV4Auth
 from botocore.awsrequest import AWSRequest
 
+from c7n.cache import SqlKvCache, resolve_path
+from c7n.config import Bag
+from c7n.utils import chunks, get_tag_map
+
+log = logging.getLogger('custodian.owner-lookup')
+
 PROVIDERS = {
     "AWS": 0,
     "Azure": 1,
     "GCP": 2,
 }
 
+OWNER_LOOKUP_ENDPOINT = 'https://ownerlookupapi.services.dowjones.io'
+
+
 def extract_appids(resource_list):
-    appids = {tag.get("Value") for resource in resource_list for tag in resource.get("Tags", []) if tag.get("Key") == "appid"}
+    appids = {get_tag_map(resource).get("appid") for resource in resource_list}
+    appids.discard(None)
     return {"appid": list(appids)}
 
-def call_api_and_update_resources(self, resources, event=None):
-    try: 
-        appids_data = extract_appids(resources)
-        # If the "appid" tag is missing , then skip the API call
-        # Used to avoid api calls for non-DJ accounts 
-        if appids_data != []: 
+
+def extract_emails(data_dict, parent_key="", email_address=None):
+    """Flatten an owner lookup response to {parent key: {field: email}}.
+
+    ie. {'appid': {'a1': {'owner': 'x@y.com'}}} -> {'appid.a1': {'owner': 'x@y.com'}}
+    """
+    if email_address is None:
+        email_address = {}
+    for key, value in data_dict.items():
+        current_key = f"{parent_key}.{key}" if parent_key else key
+        if isinstance(value, dict):
+            extract_emails(value, current_key, email_address)
+        elif isinstance(value, str) and "@" in value:
+            email_address.setdefault(parent_key, {})[key] = value
+    return email_address
+
+
+class OwnerLookup:
+    """Owner email lookup client shared by all policies in a process.
+
+    Lookups are cached per appid and per account, in memory and when a
+    file cache is configured in a sqlite cache next to it (shared by
+    c7n-org workers). Only ids not already cached are requested, in
+    batches, over a pooled http session. Repeated request failures open
+    a circuit breaker which skips lookups for a cooldown period.
+    """
+
+    region = 'us-east-1'
+    service = 'execute-api'
+    resource_path = '/service'
+
+    batch_size = 100
+    timeout = (3.05, 10)
+    # cache ttl in minutes
+    cache_period = 60
+    failure_threshold = 3
+    cooldown = 300
+
+    def __init__(self, endpoint=OWNER_LOOKUP_ENDPOINT):
+        self.endpoint = endpoint
+        self.http = requests.Session()
+        self.credentials = None
+        self.entries = {}
+        self.failures = 0
+        self.open_until = 0
+        self._lock = threading.Lock()
+
+    def get_credentials(self):
+        if self.credentials is None:
+            self.credentials = boto3.Session(
+                region_name=self.region).get_credentials()
+        return self.credentials
+
+    def get_store(self, options):
+        """Persistent cache for lookups, if the run has a file cache."""
+        cache_path = options and getattr(options, 'cache', None)
+        if not cache_path or cache_path == 'memory' or not getattr(
+                options, 'cache_period', None):
+            return None
+        return SqlKvCache(Bag(
+            cache=os.path.join(
+                os.path.dirname(resolve_path(cache_path)), 'owner-lookup.cache'),
+            cache_period=self.cache_period))
+
+    def lookup(self, appids, accounts, options=None):
+        """Return flattened owner emails for the given appids and accounts."""
+        keys = [('appid', a) for a in appids if a] + [
+            ('account', a) for a in accounts if a]
+        # serialize fetches so concurrent policies don't request the same ids.
+        with self._lock:
+            now = time.time()
+            missing = [k for k in keys if self.entries.get(k, (0,))[0] < now]
+            if missing:
+                self._fetch(missing, options)
+
+        emails = {}
+        for k in keys:
+            emails.update(self.entries.get(k, (0, {}))[1])
+        return emails
+
+    def _fetch(self, keys, options):
+        store = self.get_store(options)
+        expires = time.time() + self.cache_period * 60
+        if store is not None:
+            try:
+                with store:
+                    for k in list(keys):
+                        value = store.get(k)
+                        if value is not None:
+                            self.entries[k] = (expires, value)
+                            keys.remove(k)
+            except sqlite3.Error as e:
+                log.debug("owner lookup cache unavailable: %s", e)
+                store = None
+        if not keys:
+            return
+        if self.open_until > time.time():
+            log.debug("owner lookup circuit open, skipping %d ids", len(keys))
+            return
+
+        fetched = {}
+        for key_set in chunks(keys, self.batch_size):
             try:
-                # endpoint = os.environ.get('api_endpoint')
-                endpoint = 'https://ownerlookupapi.services.dowjones.io'
-                if not endpoint:
-                    raise ValueError("API endpoint not defined in environment variables.")
-                    
-                resource_path = '/service'
-                region = 'us-east-1'
-                service = 'execute-api'
-
-                session = boto3.Session(region_name=region)
-                credentials = session.get_credentials()
-
-                appids_data = extract_appids(resources)
-                if self.account_id:
-                    appids_data["account"] = [self.account_id]
-
-                request = AWSRequest(method='POST', url=endpoint + resource_path, headers={'Content-Type': 'application/json'})
-                request.data = json.dumps(appids_data)
-                SigV4Auth(credentials, service, region).add_auth(request)
-
-                response = requests.post(
-                    request.url,
-                    headers=request.headers,
-                    data=request.data
-                )
-                response.raise_for_status()
-                response_data = response.json()
-
-                email_address = {}
-                def extract_from_dict(data_dict, parent_key=""):
-                    nonlocal email_address
-                    for key, value in data_dict.items():
-                        current_key = f"{parent_key}.{key}" if parent_key else key
-                        if isinstance(value, dict):
-                            extract_from_dict(value, parent_key=current_key)
-                        elif isinstance(value, str) and "@" in value:
-                            if parent_key not in email_address:
-                                email_address[parent_key] = {}
-                            email_address[parent_key][key] = value
-
-                extract_from_dict(response_data)
-
-                for resource in resources:
-                    tags = resource.get("Tags", [])
-                    app_id = next((tag.get("Value") for tag in tags if tag.get("Key") == "appid"), None)
-                    owner_id = self.account_id
-
-                    if app_id:
-                        app_email_data = email_address.get(f"appid.{app_id}", {})
-                        for key, value in app_email_data.items():
-                            if isinstance(value, str) and "@" in value:
-                                resource[key] = value
-
-                    if owner_id:
-                        email_data = email_address.get(f"account.{owner_id}", {})
-                        for key, value in email_data.items():
-                            if isinstance(value, str) and "@" in value:
-                                resource[key] = value
-
-                        cost_cc_email_data = email_address.get(f"account.{owner_id}.cost_center_info", {})
-                        for key, value in cost_cc_email_data.items():
-                            if isinstance(value, str) and "@" in value:
-                                resource[key] = value
-
-                return resources
-
-            except requests.exceptions.RequestException as req_error:
-                raise ValueError(f"Error making API request: {req_error}")
-            except (ValueError, json.JSONDecodeError) as json_error:
-                raise ValueError(f"Error processing API response: {json_error}")
-            except Exception as error:
-                raise ValueError(f"Unexpected error occurred: {error}")
-    except:
-        resources = resources
+                emails = self._request(key_set)
+            except Exception as e:
+                self.failures += 1
+                if self.failures >= self.failure_threshold:
+                    self.open_until = time.time() + self.cooldown
+                    log.warning(
+                        "owner lookup failed %d times, disabled for %ds: %s",
+                        self.failures, self.cooldown, e)
+                else:
+                    log.warning("owner lookup failed: %s", e)
+                break
+            self.failures = 0
+            for kind, ident in key_set:
+                prefix = f"{kind}.{ident}"
+                fetched[(kind, ident)] = {
+                    k: v for k, v in emails.items()
+                    if k == prefix or k.startswith(prefix + '.')}
+
+        for k, v in fetched.items():
+            self.entries[k] = (expires, v)
+        if fetched and store is not None:
+            try:
+                with store:
+                    for k, v in fetched.items():
+                        store.save(k, v)
+            except sqlite3.Error as e:
+                log.debug("owner lookup cache unavailable: %s", e)
+
+    def _request(self, keys):
+        params = {"appid": [i for k, i in keys if k == 'appid']}
+        accounts = [i for k, i in keys if k == 'account']
+        if accounts:
+            params["account"] = accounts
+
+        request = AWSRequest(
+            method='POST', url=self.endpoint + self.resource_path,
+            headers={'Content-Type': 'application/json'})
+        request.data = json.dumps(params)
+        SigV4Auth(self.get_credentials(), self.service, self.region).add_auth(request)
+
+        response = self.http.post(
+            request.url, headers=dict(request.headers), data=request.data,
+            timeout=self.timeout)
+        response.raise_for_status()
+        return extract_emails(response.json())
+
+    def update_resources(self, manager, resources):
+        account_id = getattr(manager, 'account_id', None)
+        appids = extract_appids(resources)["appid"]
+        email_address = self.lookup(
+            appids, [account_id], getattr(manager, 'config', None))
+        if not email_address:
+            return resources
+
+        for resource in resources:
+            app_id = get_tag_map(resource).get("appid")
+            if app_id:
+                app_email_data = email_address.get(f"appid.{app_id}", {})
+                for key, value in app_email_data.items():
+                    resource[key] = value
+
+            if account_id:
+                for key, value in email_address.get(f"account.{account_id}", {}).items():
+                    resource[key] = value
+                cost_cc_email_data = email_address.get(f"account.{account_id}.cost_center_info", {})
+                for key, value in cost_cc_email_data.items():
+                    resource[key] = value
+        return resources
+
+
+_owner_lookup = None
+_owner_lookup_lock = threading.Lock()
+
+
+def get_owner_lookup():
+    global _owner_lookup
+    with _owner_lookup_lock:
+        if _owner_lookup is None:
+            _owner_lookup = OwnerLookup()
+    return _owner_lookup
+
+
+def call_api_and_update_resources(self, resources, event=None):
+    try:
+        return get_owner_lookup().update_resources(self, resources)
+    except Exception as error:
+        log.warning("unable to update resources with owner emails: %s", error)
         return resources
-        pass
@@ -3,6 +3,8 @@
 #
 # AWS resources to manage
 #
+import importlib
+
 from c7n.provider import clouds
 
 LOADED = set()
@@ -28,6 +30,18 @@ def load_resources(resource_types=('*',)):
     return missing
 
 
+def load_index(index):
+    """Load resources from a policy resource index.
+
+    The index records the modules providing a policy's resources and
+    plugins, so we import those instead of each provider's default set.
+    """
+    for module in index['modules']:
+        importlib.import_module(module)
+    LOADED.update(index['providers'])
+    return load_resources(index['resources'])
+
+
 def should_load_provider(name, provider_types, no_wild=False):
     global LOADED
     if (name not in LOADED and
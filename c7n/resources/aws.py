@@ -554,12 +554,18 @@ class ApiStats(DeltaStats):
     def __init__(self, ctx, config=None):
         super(ApiStats, self).__init__(ctx, config)
         self.api_calls = Counter()
+        self.retries = 0
+        self.retry_sleep = 0
 
     def get_snapshot(self):
         return dict(self.api_calls)
 
     def get_metadata(self):
-        return self.get_snapshot()
+        md = self.get_snapshot()
+        if self.retries or self.retry_sleep:
+            md['Retries'] = self.retries
+            md['RetrySleep'] = round(self.retry_sleep, 2)
+        return md
 
     def __enter__(self):
         if isinstance(self.ctx.session_factory, credentials.SessionFactory):
@@ -572,8 +578,11 @@ class ApiStats(DeltaStats):
 
         # With cached sessions, we need to unregister any events subscribers
         # on extant sessions to allow for the next registration.
-        utils.local_session(self.ctx.session_factory).events.unregister(
+        session = utils.local_session(self.ctx.session_factory)
+        session.events.unregister(
             'after-call.*.*', self._record, unique_id='c7n-api-stats')
+        session.events.unregister(
+            'c7n-retry.*', self._record_retry, unique_id='c7n-api-stats-retry')
 
         self.ctx.metrics.put_metric(
             "ApiCalls", sum(self.api_calls.values()), "Count")
@@ -582,11 +591,17 @@ class ApiStats(DeltaStats):
     def __call__(self, s):
         s.events.register(
             'after-call.*.*', self._record, unique_id='c7n-api-stats')
+        s.events.register(
+            'c7n-retry.*', self._record_retry, unique_id='c7n-api-stats-retry')
 
     def _record(self, http_response, parsed, model, **kwargs):
         self.api_calls["%s.%s" % (
             model.service_model.endpoint_prefix, model.name)] += 1
 
+    def _record_retry(self, retries, slept, **kwargs):
+        self.retries += retries
+        self.retry_sleep += slept
+
 
 @blob_outputs.register('s3')
 class S3Output(BlobOutput):
@@ -100,6 +100,15 @@ class TableCost(Infracost):
         }
         return params
 
+    def get_price_params(self, resource):
+        billingMode = resource.get("BillingModeSummary", {}).get("BillingMode")
+        rcu = resource["ProvisionedThroughput"]["ReadCapacityUnits"]
+        wcu = resource["ProvisionedThroughput"]["WriteCapacityUnits"]
+        if billingMode == "PAY_PER_REQUEST" or rcu + wcu == 0:
+            return []
+        return [dict(self.get_params(resource), group=group)
+                for group in ("DDB-ReadUnits", "DDB-WriteUnits")]
+
     def get_price(self, resource, client, query):
         price = {"USD": 0.0}
         billingMode = resource.get("BillingModeSummary", {}).get("BillingMode")
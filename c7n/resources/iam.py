@@ -19,14 +19,16 @@ from dateutil.parser import parse as parse_date
 
 from botocore.exceptions import ClientError
 
-from c7n import deprecated
+from c7n import cache, deprecated
 from c7n.actions import BaseAction
 from c7n.exceptions import PolicyValidationError
 from c7n.filters import ValueFilter, Filter
 from c7n.filters.multiattr import MultiAttrFilter
 from c7n.filters.iamaccess import CrossAccountAccessFilter
 from c7n.manager import resources
-from c7n.query import ConfigSource, QueryResourceManager, DescribeSource, TypeInfo
+from c7n.query import (
+    ConfigSource, QueryResourceManager, DescribeSource, RetryPageIterator, TypeInfo, sources
+)
 from c7n.resolver import ValuesFrom
 from c7n.tags import TagActionFilter, TagDelayedAction, Tag, RemoveTag, universal_augment
 from c7n.utils import (
@@ -38,6 +40,91 @@ from c7n.resources.aws import Arn
 from c7n.resources.securityhub import OtherResourcePostFinding
 
 
+def get_authorization_details(manager, entities=('User', 'Group', 'Role', 'LocalManagedPolicy')):
+    """Return the account's iam entities from get_account_authorization_details.
+
+    The details are paged once and shared by the policies of a run, or
+    else by the resource manager's filters, as a mapping of entity type
+    to entities by name (or arn for policies).
+    """
+    def fetch():
+        client = local_session(manager.session_factory).client('iam')
+        paginator = client.get_paginator('get_account_authorization_details')
+        paginator.PAGE_ITERATOR_CLS = RetryPageIterator
+        results = paginator.paginate(Filter=list(entities)).build_full_result()
+        return [{
+            'User': {u['UserName']: u for u in results.get('UserDetailList', ())},
+            'Group': {g['GroupName']: g for g in results.get('GroupDetailList', ())},
+            'Role': {r['RoleName']: r for r in results.get('RoleDetailList', ())},
+            'Policy': {p['Arn']: p for p in results.get('Policies', ())}}]
+
+    key = {'account': manager.config.account_id,
+           'resource': 'iam-authorization-details',
+           'entities': sorted(entities)}
+    snapshots = cache.get_snapshots()
+    if snapshots is not None:
+        return snapshots.get(key, fetch)[0]
+    details = manager.__dict__.setdefault('_authorization_details', {})
+    ekey = cache.encode(key)
+    if ekey not in details:
+        details[ekey] = fetch()[0]
+    return details[ekey]
+
+
+def resource_details(manager):
+    """Whether a manager's resources are sourced from authorization details."""
+    return manager.source_type == 'authorization-details'
+
+
+@sources.register('authorization-details')
+class DescribeAuthorizationDetails(DescribeSource):
+    """Source iam users, groups, roles and policies from a snapshot of the
+    account's authorization details.
+
+    A handful of paged get_account_authorization_details calls replace
+    per entity calls, for both enumeration and filters that inspect a
+    user's, group's or role's policies and group memberships.
+    """
+
+    def get_permissions(self):
+        return ['iam:GetAccountAuthorizationDetails']
+
+    def get_entities(self, query):
+        if self.manager.resource_type.arn_type != 'policy':
+            return ('User', 'Group', 'Role', 'LocalManagedPolicy')
+        scope = query.get('Scope', 'Local')
+        return {
+            'Local': ('User', 'Group', 'Role', 'LocalManagedPolicy'),
+            'AWS': ('AWSManagedPolicy',),
+            'All': ('LocalManagedPolicy', 'AWSManagedPolicy')}[scope]
+
+    def get_query_params(self, query):
+        if self.manager.resource_type.arn_type != 'policy':
+            return query
+        qfilters = PolicyQueryParser.parse(self.manager.data.get('query', []))
+        return query or {t['Name']: t['Value'] for t in qfilters}
+
+    def resources(self, query):
+        details = get_authorization_details(self.manager, self.get_entities(query or {}))
+        resources = [
+            dict(r) for r in
+            details[self.manager.resource_type.arn_type.title()].values()]
+        if query and query.get('OnlyAttached'):
+            resources = [r for r in resources if r['AttachmentCount']]
+        if query and query.get('PathPrefix'):
+            resources = [r for r in resources if r['Path'].startswith(query['PathPrefix'])]
+        return resources
+
+    def get_resources(self, resource_ids, cache=True):
+        id_key = self.manager.resource_type.id
+        resource_ids = set(resource_ids)
+        return [r for r in self.resources({})
+                if r[id_key] in resource_ids or r['Arn'] in resource_ids]
+
+    def augment(self, resources):
+        return resources
+
+
 class DescribeGroup(DescribeSource):
 
     def get_resources(self, resource_ids, cache=True):
@@ -71,7 +158,8 @@ class Group(QueryResourceManager):
 
     source_mapping = {
         'describe': DescribeGroup,
-        'config': ConfigSource
+        'config': ConfigSource,
+        'authorization-details': DescribeAuthorizationDetails
     }
 
 
@@ -108,7 +196,8 @@ class Role(QueryResourceManager):
 
     source_mapping = {
         'describe': DescribeRole,
-        'config': ConfigSource
+        'config': ConfigSource,
+        'authorization-details': DescribeAuthorizationDetails
     }
 
 
@@ -261,7 +350,8 @@ class User(QueryResourceManager):
 
     source_mapping = {
         'describe': DescribeUser,
-        'config': ConfigSource
+        'config': ConfigSource,
+        'authorization-details': DescribeAuthorizationDetails
     }
 
 
@@ -413,7 +503,8 @@ class Policy(QueryResourceManager):
 
     source_mapping = {
         'describe': DescribePolicy,
-        'config': ConfigSource
+        'config': ConfigSource,
+        'authorization-details': DescribeAuthorizationDetails
     }
 
 
@@ -966,8 +1057,11 @@ class IamRoleInlinePolicy(Filter):
     permissions = ('iam:ListRolePolicies',)
 
     def _inline_policies(self, client, resource):
-        policies = client.list_role_policies(
-            RoleName=resource['RoleName'])['PolicyNames']
+        if resource_details(self.manager):
+            policies = [p['PolicyName'] for p in resource['RolePolicyList']]
+        else:
+            policies = client.list_role_policies(
+                RoleName=resource['RoleName'])['PolicyNames']
         resource['c7n:InlinePolicies'] = policies
         return resource
 
@@ -1006,6 +1100,8 @@ class SpecificIamRoleManagedPolicy(Filter):
     permissions = ('iam:ListAttachedRolePolicies',)
 
     def _managed_policies(self, client, resource):
+        if resource_details(self.manager):
+            return [r['PolicyName'] for r in resource['AttachedManagedPolicies']]
         return [r['PolicyName'] for r in client.list_attached_role_policies(
             RoleName=resource['RoleName'])['AttachedPolicies']]
 
@@ -1038,6 +1134,8 @@ class NoSpecificIamRoleManagedPolicy(Filter):
     permissions = ('iam:ListAttachedRolePolicies',)
 
     def _managed_policies(self, client, resource):
+        if resource_details(self.manager):
+            return [r['PolicyName'] for r in resource['AttachedManagedPolicies']]
         return [r['PolicyName'] for r in client.list_attached_role_policies(
             RoleName=resource['RoleName'])['AttachedPolicies']]
 
@@ -1798,6 +1896,10 @@ class IamUserInlinePolicy(Filter):
     permissions = ('iam:ListUserPolicies',)
 
     def _inline_policies(self, client, resource):
+        if resource_details(self.manager):
+            resource['c7n:InlinePolicies'] = [
+                p['PolicyName'] for p in resource['UserPolicyList']]
+            return resource
         resource['c7n:InlinePolicies'] = client.list_user_policies(
             UserName=resource['UserName'])['PolicyNames']
         return resource
@@ -1841,13 +1943,28 @@ class UserPolicy(ValueFilter):
         for u in user_set:
             if 'c7n:Policies' not in u:
                 u['c7n:Policies'] = []
+            if resource_details(self.manager):
+                for ap in u['AttachedManagedPolicies']:
+                    u['c7n:Policies'].append(self.get_policy(client, ap['PolicyArn']))
+                continue
             aps = client.list_attached_user_policies(
                 UserName=u['UserName'])['AttachedPolicies']
             for ap in aps:
                 u['c7n:Policies'].append(
                     client.get_policy(PolicyArn=ap['PolicyArn'])['Policy'])
 
+    def get_policy(self, client, arn):
+        # aws managed policies aren't part of the authorization details we
+        # fetch, those are fetched once per filter.
+        p = get_authorization_details(self.manager)['Policy'].get(arn)
+        if p is not None:
+            return {k: v for k, v in p.items() if k != 'PolicyVersionList'}
+        if arn not in self.policies:
+            self.policies[arn] = client.get_policy(PolicyArn=arn)['Policy']
+        return self.policies[arn]
+
     def process(self, resources, event=None):
+        self.policies = {}
         user_set = chunks(resources, size=50)
         with self.executor_factory(max_workers=2) as w:
             self.log.debug(
@@ -1885,6 +2002,12 @@ class GroupMembership(ValueFilter):
 
     def get_user_groups(self, client, user_set):
         for u in user_set:
+            if resource_details(self.manager):
+                groups = get_authorization_details(self.manager)['Group']
+                u['c7n:Groups'] = [
+                    select_keys(groups[g], ('Path', 'GroupName', 'GroupId', 'Arn', 'CreateDate'))
+                    for g in u['GroupList'] if g in groups]
+                continue
             u['c7n:Groups'] = client.list_groups_for_user(
                 UserName=u['UserName'])['Groups']
 
@@ -83,10 +83,27 @@ RDSCluster.filter_registry.register('onhour', OnHour)
 
 @RDSCluster.filter_registry.register('infracost')
 class RdsClusterCost(RdsCost):
+
+    cluster_instances = None
+
+    def process(self, resources, event=None):
+        # db instances are loaded once, and looked up by cluster.
+        self.cluster_instances = {}
+        for i in self.manager.get_resource_manager('rds').resources():
+            if i.get('DBClusterIdentifier'):
+                self.cluster_instances.setdefault(i['DBClusterIdentifier'], []).append(i)
+        try:
+            return super().process(resources, event)
+        finally:
+            self.cluster_instances = None
+
     def get_cluster_members(self, r):
-        all = self.manager.get_resource_manager('rds').resources()
         memberIds = set([m["DBInstanceIdentifier"] for m in r["DBClusterMembers"]])
-        return [i for i in all if i["DBInstanceIdentifier"] in memberIds]
+        return [i for i in self.cluster_instances.get(r['DBClusterIdentifier'], ())
+                if i["DBInstanceIdentifier"] in memberIds]
+
+    def get_price_params(self, resource):
+        return [self.get_params(m) for m in self.get_cluster_members(resource)]
 
     def get_price(self, resource, client, query):
         members = self.get_cluster_members(resource)
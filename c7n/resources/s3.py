@@ -78,11 +78,19 @@ MAX_COPY_SIZE = 1024 * 1024 * 1024 * 2
 class DescribeS3(query.DescribeSource):
 
     def augment(self, buckets):
+        methods = S3_AUGMENT_TABLE
+        attributes = self.manager.get_augment_attributes()
+        if attributes is not None:
+            # location is always needed to talk to the bucket's region.
+            methods = tuple(
+                m for m in S3_AUGMENT_TABLE
+                if m[1] == 'Location' or m[1] in attributes)
         with self.manager.executor_factory(
                 max_workers=min((10, len(buckets) + 1))) as w:
             results = w.map(
                 assemble_bucket,
-                zip(itertools.repeat(self.manager.session_factory), buckets))
+                zip(itertools.repeat(self.manager.session_factory), buckets,
+                    itertools.repeat(methods)))
             results = list(filter(None, results))
             return results
 
@@ -422,12 +430,12 @@ def assemble_bucket(item):
 
     TODO: Refactor this, the logic here feels quite muddled.
     """
-    factory, b = item
+    factory, b = item[:2]
     s = factory()
     c = s.client('s3')
     # Bucket Location, Current Client Location, Default Location
     b_location = c_location = location = "us-east-1"
-    methods = list(S3_AUGMENT_TABLE)
+    methods = list(len(item) > 2 and item[2] or S3_AUGMENT_TABLE)
     for minfo in methods:
         m, k, default, select = minfo[:4]
         try:
@@ -592,6 +600,7 @@ class S3CrossAccountFilter(CrossAccountAccessFilter):
                   - type: cross-account
     """
     permissions = ('s3:GetBucketPolicy',)
+    augment_attributes = ('Policy',)
 
     def get_accounts(self):
         """add in elb access by default
@@ -816,6 +825,9 @@ class BucketFinding(PostFinding):
 
 @S3.filter_registry.register('has-statement')
 class HasStatementFilter(polstmt_filter.HasStatementFilter):
+
+    augment_attributes = ('Policy',)
+
     def get_std_format_args(self, bucket):
         return {
             'account_id': self.manager.config.account_id,
@@ -850,6 +862,7 @@ class EncryptionEnabledFilter(Filter):
     """
     schema = type_schema(
         'no-encryption-statement')
+    augment_attributes = ('Policy',)
 
     def get_permissions(self):
         perms = self.manager.get_resource_manager('s3').get_permissions()
@@ -903,6 +916,7 @@ class MissingPolicyStatementFilter(Filter):
         'missing-policy-statement',
         aliases=('missing-statement',),
         statement_ids={'type': 'array', 'items': {'type': 'string'}})
+    augment_attributes = ('Policy',)
 
     def __call__(self, b):
         p = b.get('Policy')
@@ -950,6 +964,7 @@ class BucketNotificationFilter(ValueFilter):
         rinherit=ValueFilter.schema)
     schema_alias = False
     annotation_key = 'c7n:MatchedNotificationConfigurationIds'
+    augment_attributes = ('Notification',)
 
     permissions = ('s3:GetBucketNotification',)
 
@@ -1104,6 +1119,7 @@ class DeleteBucketNotification(BucketActionBase):
 class NoOp(BucketActionBase):
 
     schema = type_schema('no-op')
+    augment_attributes = ()
     permissions = ('s3:ListAllMyBuckets',)
 
     def process(self, buckets):
@@ -2495,6 +2511,8 @@ class BucketTag(Tag):
                     value: us-east-1
     """
 
+    augment_attributes = ('Tags',)
+
     def process_resource_set(self, client, resource_set, tags):
         modify_bucket_tags(self.manager.session_factory, resource_set, tags)
 
@@ -2522,6 +2540,7 @@ class MarkBucketForOp(TagDelayedAction):
 
     schema = type_schema(
         'mark-for-op', rinherit=TagDelayedAction.schema)
+    augment_attributes = ('Tags',)
 
 
 @actions.register('unmark')
@@ -2542,6 +2561,7 @@ class RemoveBucketTag(RemoveTag):
                   - type: remove-tag
                     tags: ['BucketOwner']
     """
+    augment_attributes = ('Tags',)
 
     def process_resource_set(self, client, resource_set, tags):
         modify_bucket_tags(
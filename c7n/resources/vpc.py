@@ -1217,7 +1217,7 @@ class SGPermission(Filter):
         self.vfilters = []
         fattrs = list(sorted(self.perm_attrs.intersection(self.data.keys())))
         self.ports = 'Ports' in self.data and self.data['Ports'] or ()
-        self.only_ports = (
+        self.only_ports = frozenset(
             'OnlyPorts' in self.data and self.data['OnlyPorts'] or ())
         for f in fattrs:
             fv = self.data.get(f)
@@ -1228,20 +1228,53 @@ class SGPermission(Filter):
             vf = ValueFilter(fv, self.manager)
             vf.annotate = False
             self.vfilters.append(vf)
+
+        # Compile the filters evaluated against each expanded permission
+        # once, rather than per permission.
+        self.cidr_filters = {}
+        for cidr_key, cidr_type in (('CidrV6', 'CidrIpv6'), ('Cidr', 'CidrIp')):
+            if cidr_key in self.data:
+                self.cidr_filters[cidr_key] = self.get_value_filter(
+                    self.data[cidr_key], cidr_type)
+        self.description_filter = None
+        if 'Description' in self.data:
+            self.description_filter = self.get_value_filter(
+                dict(self.data['Description']), 'Description')
+        if self.data.get('SGReferences'):
+            self.sg_references = self.get_sg_references(resources)
+            self.sg_references_filter = ValueFilter(self.data['SGReferences'], self.manager)
+            self.sg_references_filter.annotate = False
         return super(SGPermission, self).process(resources, event)
 
+    def get_value_filter(self, data, key):
+        if isinstance(data, dict):
+            data = dict(data, key=key)
+        else:
+            data = {key: data}
+        vf = ValueFilter(data, self.manager)
+        vf.annotate = False
+        return vf.compile() or vf
+
+    def get_sg_references(self, resources):
+        """Resolve the same account groups referenced by permissions in one lookup.
+        """
+        group_ids = set()
+        for r in resources:
+            for perm in r.get(self.ip_permissions_key, ()):
+                group_ids.update(
+                    p['GroupId'] for p in perm.get('UserIdGroupPairs', ())
+                    if p.get('UserId', '') == r['OwnerId'])
+        if not group_ids:
+            return {}
+        return {g['GroupId']: g for g in self.manager.get_resources(sorted(group_ids))}
+
     def process_ports(self, perm):
         found = None
         if 'FromPort' in perm and 'ToPort' in perm:
-            for port in self.ports:
-                if port >= perm['FromPort'] and port <= perm['ToPort']:
-                    found = True
-                    break
-                found = False
-            only_found = False
-            for port in self.only_ports:
-                if port == perm['FromPort'] and port == perm['ToPort']:
-                    only_found = True
+            from_port, to_port = perm['FromPort'], perm['ToPort']
+            if self.ports:
+                found = any(from_port <= port <= to_port for port in self.ports)
+            only_found = from_port == to_port and from_port in self.only_ports
             if self.only_ports and not only_found:
                 found = found is None or found and True or False
             if self.only_ports and only_found:
@@ -1255,16 +1288,7 @@ class SGPermission(Filter):
         if not ip_perms:
             return False
 
-        match_range = self.data[cidr_key]
-
-        if isinstance(match_range, dict):
-            match_range['key'] = cidr_type
-        else:
-            match_range = {cidr_type: match_range}
-
-        vf = ValueFilter(match_range, self.manager)
-        vf.annotate = False
-
+        vf = self.cidr_filters[cidr_key]
         for ip_range in ip_perms:
             found = vf(ip_range)
             if found:
@@ -1286,19 +1310,13 @@ class SGPermission(Filter):
         return match_op(cidr_match)
 
     def process_description(self, perm):
-        if 'Description' not in self.data:
+        if self.description_filter is None:
             return None
 
-        d = dict(self.data['Description'])
-        d['key'] = 'Description'
-
-        vf = ValueFilter(d, self.manager)
-        vf.annotate = False
-
         for k in ('Ipv6Ranges', 'IpRanges', 'UserIdGroupPairs', 'PrefixListIds'):
             if k not in perm or not perm[k]:
                 continue
-            return vf(perm[k][0])
+            return self.description_filter(perm[k][0])
         return False
 
     def process_self_reference(self, perm, sg_id):
@@ -1324,13 +1342,9 @@ class SGPermission(Filter):
         if not sg_perm:
             return False
 
-        sg_group_ids = [p['GroupId'] for p in sg_perm if p.get('UserId', '') == owner_id]
-        sg_resources = self.manager.get_resources(sg_group_ids)
-        vf = ValueFilter(sg_refs, self.manager)
-        vf.annotate = False
-
-        for sg in sg_resources:
-            if vf(sg):
+        for p in sg_perm:
+            sg = p.get('UserId', '') == owner_id and self.sg_references.get(p['GroupId'])
+            if sg and self.sg_references_filter(sg):
                 return True
         return False
 
@@ -15,15 +15,19 @@ from datetime import datetime, timedelta
 from dateutil import tz as tzutil
 from dateutil.parser import parse
 
+import functools
 import jmespath
+import logging
 import time
 
 from c7n.manager import resources as aws_resources
 from c7n.actions import BaseAction as Action, AutoTagUser
-from c7n.exceptions import PolicyValidationError, PolicyExecutionError
+from c7n.exceptions import ClientError, PolicyValidationError, PolicyExecutionError
 from c7n.filters import Filter, OPERATORS
 from c7n.filters.offhours import Time
-from c7n import deprecated, utils
+from c7n import cache, deprecated, utils
+
+log = logging.getLogger('custodian.tags')
 
 DEFAULT_TAG = "maid_status"
 
@@ -85,6 +89,18 @@ def universal_augment(self, resources):
 
     rfetch = [r for r in resources if 'Tags' not in r]
 
+    # Within a run, use the region's shared tag snapshot, falling back
+    # to fetching by arn if the resource type couldn't be swept.
+    snapshots = cache.get_snapshots()
+    if rfetch and snapshots is not None:
+        snapshot = snapshots.get_tags(
+            {'account': self.config.account_id, 'region': region})
+        if snapshot.sweep(
+                get_universal_tag_type(self), functools.partial(sweep_tags, paginator)):
+            for arn, r in zip(self.get_arns(rfetch), rfetch):
+                r['Tags'] = list(snapshot.tags.get(arn, ()))
+            return resources
+
     for arn_resource_set in utils.chunks(
             zip(self.get_arns(rfetch), rfetch), 100):
         arn_resource_map = dict(arn_resource_set)
@@ -99,6 +115,52 @@ def universal_augment(self, resources):
     return resources
 
 
+def get_universal_tag_type(manager):
+    """Return the tagging api resource type filter for a resource manager."""
+    m = manager.resource_type
+    service = m.arn_service or m.service
+    return m.arn_type and "%s:%s" % (service, m.arn_type) or service
+
+
+def get_universal_tag_types(policies):
+    """Return the tagging api resource types used by a set of policies."""
+    types = set()
+    for p in policies:
+        if p.provider_name != 'aws':
+            continue
+        m = p.resource_manager.resource_type
+        if getattr(m, 'universal_taggable', False) and not m.global_resource:
+            types.add(get_universal_tag_type(p.resource_manager))
+    return types
+
+
+def sweep_tags(paginator, types):
+    """Page through the tags of all resources of the given types.
+
+    Returns a map of arns to tags, and the types that were swept.
+    """
+    tags, swept = {}, set()
+    for type_set in utils.chunks(types, 100):
+        try:
+            results = paginator.paginate(ResourceTypeFilters=type_set).build_full_result()
+        except ClientError as e:
+            if len(type_set) > 1:
+                # isolate the type(s) the api doesn't support.
+                for t in type_set:
+                    t_tags, t_swept = sweep_tags(paginator, [t])
+                    tags.update(t_tags)
+                    swept.update(t_swept)
+                continue
+            log.warning(
+                "unable to sweep tags for %s error:%s",
+                type_set[0], e.response['Error']['Message'])
+            continue
+        for r in results.get('ResourceTagMappingList', ()):
+            tags[r['ResourceARN']] = r['Tags']
+        swept.update(type_set)
+    return tags, swept
+
+
 def _common_tag_processer(executor_factory, batch_size, concurrency, client,
                           process_resource_set, id_key, resources, tags,
                           log):
@@ -292,12 +354,7 @@ class TagActionFilter(Filter):
         skew_hours = self.data.get('skew_hours', 0)
         tz = tzutil.gettz(Time.TZ_ALIASES.get(self.data.get('tz', 'utc')))
 
-        v = None
-        for n in i.get('Tags', ()):
-            if n['Key'] == tag:
-                v = n['Value']
-                break
-
+        v = utils.get_tag_map(i).get(tag)
         if v is None:
             return False
         if ':' not in v or '@' not in v:
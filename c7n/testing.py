@@ -19,7 +19,7 @@ import yaml
 
 from distutils.util import strtobool
 
-from c7n import deprecated, policy
+from c7n import credentials, deprecated, policy
 from c7n.exceptions import DeprecationError
 from c7n.loader import PolicyLoader
 from c7n.ctx import ExecutionContext
@@ -247,6 +247,7 @@ class TestUtils(unittest.TestCase, CustodianTestCore):
     def cleanUp(self):
         # Clear out thread local session cache
         reset_session_cache()
+        credentials.CREDENTIAL_CACHE.clear()
 
 
 class TextTestIO(io.StringIO):
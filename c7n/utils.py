@@ -290,10 +290,21 @@ def get_account_id_from_sts(session):
     return response.get('Account')
 
 
+# Account aliases by credential access key.
+ACCOUNT_ALIASES = {}
+
+
 def get_account_alias_from_sts(session):
+    credentials = session.get_credentials()
+    key = credentials is not None and credentials.access_key or None
+    if key in ACCOUNT_ALIASES:
+        return ACCOUNT_ALIASES[key]
     response = session.client('iam').list_account_aliases()
     aliases = response.get('AccountAliases', ())
-    return aliases and aliases[0] or ''
+    alias = aliases and aliases[0] or ''
+    if key:
+        ACCOUNT_ALIASES[key] = alias
+    return alias
 
 
 def query_instances(session, client=None, **query):
@@ -331,6 +342,7 @@ def local_session(factory, region=None):
 def reset_session_cache():
     for k in [k for k in dir(CONN_CACHE) if not k.startswith('_')]:
         setattr(CONN_CACHE, k, {})
+    ACCOUNT_ALIASES.clear()
 
 
 def annotation(i, k):
@@ -358,6 +370,98 @@ def set_annotation(i, k, v):
         i[k] = v
 
 
+class TagIndex:
+    """Memoized key -> value maps of resource tags.
+
+    Resources carry tags either as a list of {'Key': k, 'Value': v}
+    (aws `Tags`) or as a mapping (azure `tags`, gcp `labels`). Within a
+    run (see :py:func:`c7n.cache.snapshot_scope`) maps are built lazily on
+    first lookup and shared by every filter evaluating the resource,
+    outside of one they're built on each lookup. They're keyed by the
+    identity of the tag collection, so assigning new tags to a resource
+    invalidates its map, in place mutation of tags needs an explicit
+    `invalidate`.
+    """
+
+    max_size = 50000
+
+    def __init__(self):
+        self._maps = None
+
+    def get(self, resource, normalize=False):
+        """Return a tag map for the resource, with lower cased keys if normalize.
+
+        Keys resolve to the first matching tag, as a scan of the tags would.
+        """
+        tags = resource.get('Tags')
+        if tags is None:
+            tags = resource.get('labels')
+            if tags is None:
+                tags = resource.get('tags')
+        if not tags:
+            return {}
+        if not normalize and isinstance(tags, dict):
+            return tags
+
+        maps = self._maps
+        if maps is None:
+            return self._build(tags, normalize)
+
+        entry = maps.get(id(tags))
+        # the entry holds a reference to the tags, so the id can't be
+        # reused while its cached, length catches appends to the tags.
+        if entry is None or entry[0] is not tags or entry[1] != len(tags):
+            if len(maps) >= self.max_size:
+                maps.clear()
+            entry = maps[id(tags)] = [tags, len(tags), None, None]
+
+        idx = normalize and 3 or 2
+        if entry[idx] is None:
+            entry[idx] = self._build(tags, normalize)
+        return entry[idx]
+
+    def _build(self, tags, normalize):
+        if isinstance(tags, dict):
+            items = tags.items()
+        else:
+            items = [(t.get('Key'), t.get('Value')) for t in tags]
+        tag_map = {}
+        for k, v in items:
+            if normalize:
+                if not isinstance(k, str):
+                    continue
+                k = k.lower()
+            tag_map.setdefault(k, v)
+        return tag_map
+
+    def invalidate(self, resource):
+        maps = self._maps
+        if maps is None:
+            return
+        for k in ('Tags', 'labels', 'tags'):
+            if k in resource:
+                maps.pop(id(resource[k]), None)
+
+    def start(self):
+        """Memoize tag maps until :py:meth:`clear`."""
+        self._maps = {}
+
+    def clear(self):
+        self._maps = None
+
+
+tag_index = TagIndex()
+
+
+def get_tag_map(resource, normalize=False):
+    """Return the resource's tags as a key -> value mapping.
+
+    >>> get_tag_map({'Tags': [{'Key': 'Env', 'Value': 'dev'}]}, normalize=True)
+    {'env': 'dev'}
+    """
+    return tag_index.get(resource, normalize)
+
+
 def parse_s3(s3_path):
     if not s3_path.startswith('s3://'):
         raise ValueError("invalid s3 path")
@@ -417,6 +521,120 @@ def snapshot_identifier(prefix, db_identifier):
 
 retry_log = logging.getLogger('c7n.retry')
 
+THROTTLE_CODES = (
+    'TooManyRequestsException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+    'Throttled',
+    'ThrottledException',
+    'Throttling',
+    'Client.RequestLimitExceeded',
+    'LimitExceededException',
+    'RequestThrottledException',
+    'SlowDown')
+
+
+class TokenBucket:
+    """Adaptive client side rate limit for an api.
+
+    Calls are unlimited until the api throttles, then the rate is set to
+    a fraction of the measured call rate and halved on each subsequent
+    throttle. Successful calls raise the rate additively, once it's well
+    above what was measured the limit is lifted again. Callers sharing a
+    bucket are paced together instead of retrying in lock step.
+    """
+
+    min_rate = 0.5
+    increase = 0.1
+    capacity = 10
+
+    def __init__(self):
+        self.rate = None
+        self.tokens = 0
+        self.measured = 0
+        self.last_refill = time.monotonic()
+        self._interval = self.last_refill
+        self._interval_calls = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take a token, sleeping if needed. Returns the time slept."""
+        with self._lock:
+            now = time.monotonic()
+            self._measure(now)
+            if self.rate is None:
+                return 0
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+            self.tokens -= 1
+            wait = self.tokens < 0 and -self.tokens / self.rate or 0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def throttled(self):
+        with self._lock:
+            if self.rate is None:
+                self.rate = max(self.min_rate, self.measured * 0.7)
+                self.tokens = 0
+            else:
+                self.rate = max(self.min_rate, self.rate / 2)
+
+    def succeeded(self):
+        if self.rate is None:
+            return
+        with self._lock:
+            if self.rate is None:
+                return
+            self.rate += self.increase
+            if self.rate > max(self.measured, self.min_rate) * 2:
+                self.rate = None
+
+    def _measure(self, now):
+        # smoothed calls per second, over half second intervals
+        elapsed = now - self._interval
+        if elapsed >= 0.5:
+            self.measured = (
+                0.8 * self._interval_calls / elapsed + 0.2 * self.measured)
+            self._interval = now
+            self._interval_calls = 0
+        self._interval_calls += 1
+
+
+class RateLimits:
+    """Token buckets per identity, region and service, shared by a process.
+
+    A client's identity is the credentials its session was created with,
+    see :py:meth:`c7n.credentials.SessionFactory.share_clients`, so the
+    buckets of concurrently executing accounts are kept apart.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self._lock = threading.Lock()
+
+    def get(self, service, region, identity=None):
+        key = (identity, region, service)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self.buckets.setdefault(key, TokenBucket())
+        return bucket
+
+    def get_client_bucket(self, func):
+        """Return the bucket for a bound client api method, if it is one."""
+        meta = getattr(getattr(func, '__self__', None), 'meta', None)
+        service_model = getattr(meta, 'service_model', None)
+        if service_model is None:
+            return None
+        return self.get(
+            service_model.service_name, meta.region_name,
+            getattr(meta, 'c7n_identity', None))
+
+
+rate_limits = RateLimits()
+
 
 def get_retry(retry_codes=(), max_attempts=8, min_delay=1, log_retries=False):
     """Decorator for retry boto3 api call on transient errors.
@@ -424,6 +642,10 @@ def get_retry(retry_codes=(), max_attempts=8, min_delay=1, log_retries=False):
     https://www.awsarchitectureblog.com/2015/03/backoff.html
     https://en.wikipedia.org/wiki/Exponential_backoff
 
+    Client api calls are also paced by the shared token bucket of their
+    account, region and service (see `TokenBucket`), and retries are
+    reported to the client's event hooks, ie. for api stats.
+
     :param codes: A sequence of retryable error codes.
     :param max_attempts: The max number of retries, by default the delay
            time is proportional to the max number of attempts.
@@ -439,23 +661,41 @@ def get_retry(retry_codes=(), max_attempts=8, min_delay=1, log_retries=False):
     max_delay = max(min_delay, 2) ** max_attempts
 
     def _retry(func, *args, ignore_err_codes=(), **kw):
-        for idx, delay in enumerate(
-                backoff_delays(min_delay, max_delay, jitter=True)):
-            try:
-                return func(*args, **kw)
-            except ClientError as e:
-                if e.response['Error']['Code'] in ignore_err_codes:
-                    return
-                elif e.response['Error']['Code'] not in retry_codes:
-                    raise
-                elif idx == max_attempts - 1:
-                    raise
-                if log_retries:
-                    retry_log.log(
-                        log_retries,
-                        "retrying %s on error:%s attempt:%d last delay:%0.2f",
-                        func, e.response['Error']['Code'], idx, delay)
-            time.sleep(delay)
+        bucket = rate_limits.get_client_bucket(func)
+        retries = slept = 0
+        try:
+            for idx, delay in enumerate(
+                    backoff_delays(min_delay, max_delay, jitter=True)):
+                slept += bucket and bucket.acquire() or 0
+                try:
+                    result = func(*args, **kw)
+                    if bucket:
+                        bucket.succeeded()
+                    return result
+                except ClientError as e:
+                    code = e.response['Error']['Code']
+                    if code in ignore_err_codes:
+                        return
+                    elif code not in retry_codes:
+                        raise
+                    if bucket and code in THROTTLE_CODES:
+                        bucket.throttled()
+                    if idx == max_attempts - 1:
+                        raise
+                    if log_retries:
+                        retry_log.log(
+                            log_retries,
+                            "retrying %s on error:%s attempt:%d last delay:%0.2f",
+                            func, code, idx, delay)
+                retries += 1
+                slept += delay
+                time.sleep(delay)
+        finally:
+            if bucket and slept:
+                meta = func.__self__.meta
+                meta.events.emit(
+                    'c7n-retry.%s' % meta.service_model.service_name,
+                    retries=retries, slept=slept)
     return _retry
 
 
@@ -516,15 +756,31 @@ class IPv4Network(ipaddress.IPv4Network):
 class IPv4List:
     def __init__(self, ipv4_list):
         self.ipv4_list = ipv4_list
+        # Index networks by prefix length, so containment checks are a
+        # lookup of the candidate supernet per distinct prefix length
+        # rather than a scan of the list.
+        self.networks = {}
+        self.addresses = set()
+        for y_elem in ipv4_list:
+            if isinstance(y_elem, IPv4Network):
+                self.networks.setdefault(y_elem.prefixlen, set()).add(y_elem)
+            elif isinstance(y_elem, ipaddress.IPv4Address):
+                self.addresses.add(y_elem)
 
     def __contains__(self, other):
-        if other is None:
+        if other is None or other.version != 4:
             return False
-        in_networks = any([other in y_elem for y_elem in self.ipv4_list
-          if isinstance(y_elem, IPv4Network)])
-        in_addresses = any([other == y_elem for y_elem in self.ipv4_list
-          if isinstance(y_elem, ipaddress.IPv4Address)])
-        return any([in_networks, in_addresses])
+        if isinstance(other, ipaddress._BaseNetwork):
+            address, prefixlen = other.network_address, other.prefixlen
+        elif other in self.addresses:
+            return True
+        else:
+            address, prefixlen = other, other.max_prefixlen
+        for p, networks in self.networks.items():
+            if p <= prefixlen and ipaddress.IPv4Network(
+                    (address, p), strict=False) in networks:
+                return True
+        return False
 
 
 def reformat_schema(model):
@@ -9,6 +9,7 @@ from .constants import ACCOUNT_ID
 
 try:
     from .zpill import PillTest
+    from c7n import credentials
     from c7n.testing import PyTestUtils, reset_session_cache
     from pytest_terraform.tf import LazyPluginCacheDir, LazyReplay
 except ImportError: # noqa
@@ -54,8 +55,23 @@ def pytest_configure(config):
         config.pluginmanager.register(TerraformAWSRewriteHooks())
 
 
+@pytest.fixture(scope='session', autouse=True)
+def archive_cache_dir(tmp_path_factory):
+    """Keep lambda archives built by tests out of the user's cache directory."""
+    try:
+        from c7n import mu
+    except ImportError: # noqa
+        yield
+        return
+    cache_dir, mu.ARCHIVE_CACHE_DIR = (
+        mu.ARCHIVE_CACHE_DIR, str(tmp_path_factory.mktemp('c7n-archives')))
+    yield
+    mu.ARCHIVE_CACHE_DIR = cache_dir
+
+
 @pytest.fixture(scope='function')
 def test(request):
     test_utils = CustodianAWSTesting(request)
     test_utils.addCleanup(reset_session_cache)
+    test_utils.addCleanup(credentials.CREDENTIAL_CACHE.clear)
     return test_utils
@@ -1,11 +1,13 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import os
 import pickle
 import sqlite3
 import sys
+import threading
 from unittest import TestCase
 
 import pytest
@@ -66,19 +68,67 @@ def test_sqlkv_get_expired(tmp_path):
 def test_sqlkv_load_gc(tmp_path):
     kv = cache.SqlKvCache(config.Bag(cache=tmp_path / "cache.db", cache_period=60))
 
-    # seed old values with manual connection
-    kv.conn = sqlite3.connect(kv.cache_path)
-    kv.conn.execute(kv.create_table)
+    # seed old values, expired entries are removed on the next load
+    kv.load()
     kv1 = {'a': 'b', 'c': 'd'}
     kv2 = {'b': 'a', 'd': 'c'}
-    kv.save(kv1, kv1, datetime.utcnow() - timedelta(days=10))
+    kv.save(kv1, [kv1], datetime.utcnow() - timedelta(days=10))
     kv.save(kv2, kv2, datetime.utcnow() - timedelta(minutes=5))
+    kv.close()
 
     kv.load()
+    assert kv.conn.execute('select count(*) from c7n_cache_chunk').fetchone() == (0,)
     assert kv.get(kv1) is None
     assert kv.get(kv2) == kv2
 
 
+def test_sqlkv_chunks(tmp_path):
+    kv = cache.SqlKvCache(config.Bag(cache=tmp_path / "cache.db", cache_period=60))
+    kv.chunk_size = 2
+    kv.load()
+    k1 = {"account": "12345678901234", "region": "us-west-2", "resource": "ec2"}
+    v1 = [{'id': 'r%d' % i} for i in range(5)]
+    kv.save(k1, v1, id_key='id')
+    kv.save({'resource': 'ec2', 'region': 'us-west-2', 'account': '12345678901234'}, v1,
+            id_key='id')
+    assert kv.conn.execute('select count(*) from c7n_cache_chunk').fetchone() == (3,)
+    assert kv.get(k1) == v1
+    assert kv.get_by_ids(k1, ['r4', 'r0', 'x'], 'id') == [{'id': 'r0'}, {'id': 'r4'}]
+    assert kv.get_by_ids({'resource': 'rds'}, ['r4'], 'id') is None
+    # values saved without an index are scanned
+    kv.save(k1, v1)
+    assert kv.get_by_ids(k1, ['r4'], 'id') == [{'id': 'r4'}]
+    kv.save(k1, [])
+    assert kv.get(k1) == []
+    assert (kv.hits, kv.misses) == (4, 1)
+    assert kv.bytes_read and kv.bytes_written
+    kv.close()
+
+
+def test_sqlkv_schema_upgrade(tmp_path):
+    cache_path = tmp_path / "cache.db"
+    conn = sqlite3.connect(cache_path)
+    conn.execute(
+        "create table c7n_cache (key blob primary key, value blob, create_date timestamp)")
+    conn.commit()
+    conn.close()
+
+    kv = cache.SqlKvCache(config.Bag(cache=cache_path, cache_period=60))
+    kv.load()
+    assert kv.get({'a': 'b'}) is None
+    kv.save({'a': 'b'}, {'c': 'd'})
+    assert kv.get({'a': 'b'}) == {'c': 'd'}
+    assert kv.conn.execute('pragma journal_mode').fetchone() == ('wal',)
+    kv.close()
+
+
+def test_cache_get_by_ids():
+    mem_cache = cache.InMemoryCache({})
+    mem_cache.save({'resource': 'ids'}, [{'id': 'a'}, {'id': 'b'}], id_key='id')
+    assert mem_cache.get_by_ids({'resource': 'ids'}, ['b'], 'id') == [{'id': 'b'}]
+    assert cache.NullCache(None).get_by_ids({'resource': 'ids'}, ['b'], 'id') is None
+
+
 def test_sqlkv_parent_dir_create(tmp_path):
     cache_path = tmp_path / ".cache" / "cache.db"
     kv = cache.SqlKvCache(config.Bag(cache=cache_path, cache_period=60))
@@ -99,3 +149,85 @@ def test_sqlkv_convert(tmp_path):
     kv.close()
     with open(cache_path, 'rb') as fh:
         assert fh.read(15) == b"SQLite format 3"
+
+
+def test_snapshots_get():
+    snapshots = cache.ResourceSnapshots()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return [{'id': 'a'}, {'id': 'b'}]
+
+    key = {'account': '123', 'region': 'us-east-1', 'resource': 'ec2', 'q': None}
+    r1 = snapshots.get(key, fetch)
+    r1[0]['c7n:MatchedFilters'] = ['tag:App']
+    r2 = snapshots.get(dict(key), fetch)
+    assert calls == [1]
+    assert r2 == [{'id': 'a'}, {'id': 'b'}]
+    assert snapshots.peek(key) == r2
+    assert snapshots.peek(dict(key, region='us-west-2')) is None
+    assert (snapshots.hits, snapshots.misses) == (1, 1)
+
+
+def test_snapshots_fetch_error():
+    snapshots = cache.ResourceSnapshots()
+
+    def fetch():
+        raise ValueError('throttled')
+
+    with pytest.raises(ValueError):
+        snapshots.get({'resource': 'ec2'}, fetch)
+    assert snapshots.size() == 0
+    assert snapshots.get({'resource': 'ec2'}, lambda: [{'id': 'a'}]) == [{'id': 'a'}]
+
+
+def test_snapshots_coalesce():
+    snapshots = cache.ResourceSnapshots()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return [{'id': 'a'}]
+
+    with ThreadPoolExecutor(max_workers=2) as w:
+        first = w.submit(snapshots.get, {'resource': 'ec2'}, fetch)
+        started.wait(5)
+        second = w.submit(snapshots.get, {'resource': 'ec2'}, fetch)
+        release.set()
+        assert first.result() == second.result() == [{'id': 'a'}]
+    assert calls == [1]
+
+
+def test_snapshot_scope():
+    assert cache.get_snapshots() is None
+    with cache.snapshot_scope(enabled=False) as snapshots:
+        assert snapshots is None
+    with cache.snapshot_scope() as snapshots:
+        assert cache.get_snapshots() is snapshots
+        with cache.snapshot_scope() as nested:
+            assert nested is snapshots
+    assert cache.get_snapshots() is None
+
+
+def test_tag_snapshot_sweep():
+    snapshot = cache.ResourceSnapshots(tag_types=['sqs', 'bogus']).get_tags(
+        {'account': '123', 'region': 'us-east-1'})
+    calls = []
+
+    def fetch(types):
+        calls.append(types)
+        return {'arn:sqs': [{'Key': 'App', 'Value': 'x'}]}, {'sqs', 'glue:job'} & set(types)
+
+    assert snapshot.sweep('glue:job', fetch) is True
+    assert snapshot.sweep('sqs', fetch) is True
+    assert calls == [['bogus', 'glue:job', 'sqs']]
+    # unsupported types aren't swept again, callers fallback to arn lookups.
+    assert snapshot.sweep('bogus', fetch) is False
+    assert snapshot.sweep('kms:key', fetch) is False
+    assert calls[-1] == ['kms:key']
+    assert snapshot.tags == {'arn:sqs': [{'Key': 'App', 'Value': 'x'}]}
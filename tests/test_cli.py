@@ -8,6 +8,7 @@ from argparse import ArgumentTypeError
 from datetime import datetime, timedelta
 
 from c7n import cli, version, commands
+from c7n.config import Config
 from c7n.resolver import ValuesFrom
 from c7n.resources import aws
 from c7n.schema import ElementSchema, generate
@@ -558,6 +559,62 @@ class RunTest(CliTest):
             ["custodian", "run", "-s", temp_dir, "--debug", yaml_file], CustomError
         )
 
+    def test_jobs(self):
+        from c7n.policy import Policy
+
+        ran = []
+
+        def run_policy(p):
+            ran.append(p.name)
+            if p.name == "error":
+                raise Exception("foobar")
+
+        self.patch(Policy, "__call__", run_policy)
+        temp_dir = self.get_temp_dir()
+        yaml_file = self.write_policy_file(
+            {
+                "policies": [
+                    {"name": "error", "resource": "ec2"},
+                    {"name": "ok", "resource": "ec2"},
+                    {"name": "volumes", "resource": "ebs"},
+                ]
+            }
+        )
+        log_output = self.capture_logging('custodian.commands')
+        self.run_and_expect_failure(
+            ["custodian", "run", "--jobs", "2", "-s", temp_dir, yaml_file], 2)
+        self.assertEqual(sorted(ran), ["error", "ok", "volumes"])
+        self.assertIn(
+            "The following policies had errors while executing\n - error\n",
+            log_output.getvalue())
+
+    def test_jobs_schedule(self):
+        from c7n.commands import _policy_schedule
+
+        collection = self.load_policy_set({
+            "policies": [
+                {"name": "ec2-tag", "resource": "ec2",
+                 "actions": [{"type": "tag", "key": "x", "value": "y"}]},
+                {"name": "ec2-stop", "resource": "ec2", "actions": ["stop"]},
+                {"name": "ebs-a", "resource": "ebs"},
+                {"name": "ebs-b", "resource": "ebs"},
+                {"name": "lambda", "resource": "ec2",
+                 "mode": {"type": "periodic", "schedule": "rate(1 day)"}},
+            ]})
+        schedule = [
+            [p.name for p in unit] for unit in
+            _policy_schedule(Config.empty(dryrun=False), list(collection))]
+        self.assertEqual(
+            schedule,
+            [["ec2-tag", "ec2-stop"], ["ebs-a"], ["lambda"], ["ebs-b"]])
+
+        schedule = [
+            [p.name for p in unit] for unit in
+            _policy_schedule(Config.empty(dryrun=True), list(collection))]
+        self.assertEqual(
+            schedule,
+            [["ec2-tag"], ["ebs-a"], ["ec2-stop"], ["ebs-b"], ["lambda"]])
+
 
 class MetricsTest(CliTest):
 
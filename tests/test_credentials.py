@@ -1,13 +1,18 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 import os
+from datetime import datetime, timedelta
+from unittest import mock
+
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from dateutil.tz import tzutc
 import placebo
 
-from c7n import credentials
+from c7n import credentials, utils
 from c7n.credentials import SessionFactory, assumed_session, get_sts_client
 from c7n.version import version
-from c7n.utils import local_session
+from c7n.utils import get_account_alias_from_sts, local_session
 
 from .common import BaseTest
 
@@ -82,3 +87,65 @@ class Credential(BaseTest):
         client = local_session(factory).client('ec2')
         self.assertTrue(
             'check-ec2' in client._client_config.user_agent)
+
+    def test_session_factory_shared_clients(self):
+        factory = SessionFactory('us-east-1')
+        s1, s2 = factory(), factory()
+        self.assertIsNot(s1, s2)
+        self.assertIs(s1.client('ec2'), s2.client('ec2'))
+        self.assertIsNot(s1.client('ec2'), s1.client('ec2', region_name='us-west-2'))
+        self.assertIsNot(
+            s1.client('ec2'), s1.client('ec2', config=Config(retries={'max_attempts': 2})))
+
+        # clients with another user agent or event subscribers aren't shared.
+        factory.policy_name = 'check-ec2'
+        self.assertIsNot(s1.client('ec2'), factory().client('ec2'))
+        factory.set_subscribers((lambda s: None,))
+        self.assertIsNot(s1.client('ec2'), factory().client('ec2'))
+
+    def test_session_factory_shared_clients_evicted(self):
+        factory = SessionFactory('us-east-1')
+        for i in range(5):
+            stats = mock.MagicMock()
+            factory.set_subscribers((stats,))
+            session = factory()
+            stats.assert_called_once_with(session)
+            for service in ('ec2', 's3'):
+                self.assertIs(session.client(service), factory().client(service))
+            self.assertEqual(len(factory._clients), 2)
+            factory.set_subscribers(())
+            self.assertEqual(len(factory._clients), 0)
+
+    def test_session_factory_rate_limits(self):
+        # concurrent executions against other identities don't share buckets.
+        dev, prod = (SessionFactory('us-east-1', external_id=e) for e in ('dev', 'prod'))
+        get_bucket = utils.rate_limits.get_client_bucket
+        dev_bucket = get_bucket(dev().client('ec2').describe_instances)
+        self.assertIs(
+            dev_bucket, get_bucket(dev().client('ec2', region_name='us-east-1').describe_instances))
+        self.assertIsNot(dev_bucket, get_bucket(prod().client('ec2').describe_instances))
+
+    def test_assumed_session_credential_cache(self):
+        sts = mock.MagicMock()
+        sts.assume_role.return_value = {'Credentials': {
+            'AccessKeyId': 'xyz', 'SecretAccessKey': 'abc', 'SessionToken': 'token',
+            'Expiration': datetime.now(tzutc()) + timedelta(hours=1)}}
+        self.patch(credentials, 'get_sts_client', lambda session, region: sts)
+        role = 'arn:aws:iam::644160558196:role/CustodianGuardDuty'
+        s1 = assumed_session(role, 'custodian-dev', region='us-east-1')
+        s2 = assumed_session(role, 'custodian-dev', region='us-west-2')
+        self.assertEqual(sts.assume_role.call_count, 1)
+        self.assertIs(s1.get_credentials(), s2.get_credentials())
+        self.assertEqual(s2.region_name, 'us-west-2')
+
+        assumed_session(role, 'custodian-prod', region='us-east-1')
+        self.assertEqual(sts.assume_role.call_count, 2)
+
+    def test_account_alias_cache(self):
+        session = mock.MagicMock()
+        session.get_credentials.return_value.access_key = 'xyz'
+        session.client.return_value.list_account_aliases.return_value = {
+            'AccountAliases': ['dev']}
+        self.assertEqual(get_account_alias_from_sts(session), 'dev')
+        self.assertEqual(get_account_alias_from_sts(session), 'dev')
+        self.assertEqual(session.client.call_count, 1)
@@ -29,6 +29,7 @@ class DynamodbTest(BaseTest):
     def test_table_cost(self):
         aws_region = 'ap-southeast-2'
         session_factory = self.replay_flight_data('table_cost', region=aws_region)
+        self.patch(c7n.resources.dynamodb.TableCost, "executor_factory", MainThreadExecutor)
         policy = self.load_policy(
             {
                 "name": "table-cost",
@@ -1,6 +1,7 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 import logging
+import os
 import unittest
 import time
 
@@ -11,7 +12,11 @@ import jmespath
 from mock import mock
 
 from c7n.testing import mock_datetime_now
+from c7n.cache import InMemoryCache
+from c7n.filters.cost import PRICE_NOT_FOUND
+from c7n.config import Config
 from c7n.exceptions import PolicyValidationError, ClientError
+from c7n.executor import MainThreadExecutor
 from c7n.resources import ec2
 from c7n.resources.ec2 import actions, QueryFilter
 from c7n import tags, utils
@@ -133,6 +138,7 @@ def test_ec2_stop_protection_filter_permissions(test):
 def test_ec2_cost(test):
     aws_region = 'ap-southeast-2'
     session_factory = test.replay_flight_data('ec2_cost', region=aws_region)
+    test.patch(ec2.Ec2Cost, "executor_factory", MainThreadExecutor)
     policy = test.load_policy(
         {
             "name": "ec2-cost",
@@ -160,6 +166,73 @@ def test_ec2_cost(test):
         'description': '$0.0528 per On Demand Linux t3.medium Instance Hour'}.items())
 
 
+def test_ec2_cost_price_catalog(test):
+    aws_region = 'ap-southeast-2'
+    session_factory = test.replay_flight_data('ec2_cost', region=aws_region)
+    cache_dir = test.get_temp_dir()
+    policy_data = {
+        "name": "ec2-cost",
+        "resource": "ec2",
+        "filters": [{
+            "type": "infracost",
+            "api_key": "xyz",
+            "quantity": 730,
+        }]
+    }
+    config = Config.empty(
+        region=aws_region, output_dir=cache_dir,
+        cache=os.path.join(cache_dir, 'cloud-custodian.cache'), cache_period=15)
+    prices = {
+        't3.nano': {'USD': '0.00660000'},
+        't3.medium': {'USD': '0.05280000'}}
+
+    def invoke(client, query, params):
+        return dict(prices[params['instanceType']])
+
+    for idx in range(2):
+        # start each run without the process wide in-memory price cache
+        test.patch(InMemoryCache, "_InMemoryCache__shared_state", {})
+        policy = test.load_policy(
+            policy_data, session_factory=session_factory, config=config)
+        with patch("c7n.filters.cost.Infracost.invoke_infracost") as infracost:
+            infracost.side_effect = invoke
+            resources = policy.run()
+        assert sorted(r['c7n:Cost']['USD'] for r in resources) == [4.818, 38.544]
+        # one query per distinct price, the next run reads the price catalog
+        assert infracost.call_count == (idx == 0 and 2 or 0)
+    assert os.path.exists(os.path.join(cache_dir, 'cloud-custodian-prices.cache'))
+
+
+def test_ec2_cost_price_catalog_not_found(test):
+    aws_region = 'ap-southeast-2'
+    session_factory = test.replay_flight_data('ec2_cost', region=aws_region)
+    cache_dir = test.get_temp_dir()
+    config = Config.empty(
+        region=aws_region, output_dir=cache_dir,
+        cache=os.path.join(cache_dir, 'cloud-custodian.cache'), cache_period=15)
+    prices = {'t3.medium': {'USD': '0.05280000'}}
+
+    def invoke(client, query, params):
+        if params['instanceType'] in prices:
+            return dict(prices[params['instanceType']])
+        return {'USD': '0.0', 'unit': 'N/A', 'description': PRICE_NOT_FOUND}
+
+    for idx in range(2):
+        test.patch(InMemoryCache, "_InMemoryCache__shared_state", {})
+        policy = test.load_policy({
+            "name": "ec2-cost",
+            "resource": "ec2",
+            "filters": [{"type": "infracost", "api_key": "xyz", "quantity": 730}]},
+            session_factory=session_factory, config=config)
+        with patch("c7n.filters.cost.Infracost.invoke_infracost") as infracost:
+            infracost.side_effect = invoke
+            resources = policy.run()
+        assert sorted(r['c7n:Cost']['USD'] for r in resources) == [0.0, 38.544]
+        # the missing price isn't kept in the catalog, and is queried again
+        assert sorted(c[0][2]['instanceType'] for c in infracost.call_args_list) == (
+            idx == 0 and ['t3.medium', 't3.nano'] or ['t3.nano'])
+
+
 @pytest.mark.parametrize(
     'botocore_version',
     ['1.26.6', '1.25.8', '0.27.27']
@@ -1,7 +1,11 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 from c7n import executor
+from c7n.exceptions import ClientError
 
+import functools
+import threading
+import time
 import unittest
 
 
@@ -42,5 +46,50 @@ class MainExecutorTest(ExecutorBase, unittest.TestCase):
     executor_factory = executor.MainThreadExecutor
 
 
+class AdaptiveLimitTest(unittest.TestCase):
+
+    def fail(self, code='Throttling'):
+        raise ClientError({'Error': {'Code': code}}, 'Describe')
+
+    def test_adaptive_limit(self):
+        limit = executor.AdaptiveLimit(initial=2, maximum=3)
+        for i in range(5):
+            self.assertEqual(limit.call(Foo.run, i), ((i,), {}))
+        self.assertEqual(limit.limit, 3)
+
+        self.assertRaises(ClientError, limit.call, self.fail)
+        self.assertRaises(ClientError, limit.call, self.fail)
+        self.assertEqual((limit.limit, limit.throttles, limit.in_flight), (1, 2, 0))
+
+        self.assertRaises(ClientError, limit.call, self.fail, 'AccessDenied')
+        # other errors aren't throttling, the service is keeping up.
+        self.assertEqual((limit.limit, limit.throttles), (2, 2))
+
+    def test_adaptive_limit_bounds_calls(self):
+        limit = executor.AdaptiveLimit(initial=2, maximum=2)
+        active, peak = [], []
+        lock = threading.Lock()
+
+        def call(i):
+            with lock:
+                active.append(i)
+                peak.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.remove(i)
+
+        with executor.ThreadPoolExecutor(max_workers=8) as w:
+            list(w.map(functools.partial(limit.call, call), range(16)))
+        self.assertEqual(max(peak), 2)
+
+    def test_get_adaptive_limit(self):
+        self.assertIs(
+            executor.get_adaptive_limit('sqs', 'us-east-1'),
+            executor.get_adaptive_limit('sqs', 'us-east-1'))
+        self.assertIsNot(
+            executor.get_adaptive_limit('sqs', 'us-east-1'),
+            executor.get_adaptive_limit('sqs', 'us-west-2'))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -10,6 +10,7 @@ import random
 import unittest
 import os
 
+from c7n.cache import snapshot_scope
 from c7n.exceptions import PolicyValidationError
 from c7n.executor import MainThreadExecutor
 from c7n import filters as base_filters
@@ -31,6 +32,10 @@ class BaseFilterTest(unittest.TestCase):
         """
         try:
             self.assertEqual(filters.factory(f)(i), v)
+            # compiled evaluation must agree with match
+            matcher = filters.factory(f).compile()
+            if matcher is not None:
+                self.assertEqual(matcher(copy.deepcopy(i)), v)
         except AssertionError:
             print(f, i["LaunchTime"], i["Tags"], v)
             raise
@@ -114,6 +119,73 @@ class TestAndFilter(unittest.TestCase):
         self.assertEqual(f.process([instance(Architecture="x86_64")]), [])
 
 
+class TestCompiledFilter(unittest.TestCase):
+
+    def test_compile_value(self):
+        f = filters.factory({
+            "type": "value", "key": "tag:Env", "op": "in", "value": ["dev", "qa"]})
+        matcher = f.compile()
+        i = instance(Tags=[{"Key": "Env", "Value": "qa"}])
+        self.assertTrue(matcher(i))
+        self.assertEqual(i["c7n:MatchedFilters"], ["tag:Env"])
+        self.assertFalse(matcher(instance(Tags=[{"Key": "Env", "Value": "prod"}])))
+        self.assertFalse(matcher(instance(Tags=[{"Key": "Env", "Value": ["qa"]}])))
+        self.assertEqual(f.process([i, instance(Tags=[])]), [i])
+
+    def test_compile_regex(self):
+        f = filters.factory({
+            "type": "value", "key": "InstanceId", "op": "regex", "value": "I-ab.*"})
+        matcher = f.compile()
+        self.assertTrue(matcher(instance(InstanceId="i-abc")))
+        self.assertFalse(matcher(instance(InstanceId=None)))
+
+    def test_not_compiled(self):
+        self.assertIsNone(filters.factory({
+            "type": "value", "key": "tag:Env", "op": "in",
+            "value_from": {"url": "s3://bucket/envs.txt"}}).compile())
+        self.assertIsNone(filters.factory({
+            "type": "value", "value_type": "resource_count",
+            "op": "gt", "value": 1}).compile())
+        self.assertIsNone(filters.factory({
+            "or": [{"Architecture": "x86_64"}]}).compile())
+
+        class CustomValue(base_filters.ValueFilter):
+            def get_resource_value(self, k, i):
+                return "x86_64"
+        self.assertIsNone(CustomValue({"Architecture": "x86_64"}).compile())
+
+    def test_and_fused(self):
+        f = filters.factory({"and": [
+            {"Architecture": "x86_64"},
+            {"and": [{"Color": "green"}, {"type": "value", "key": "Size",
+                                          "op": "gte", "value": 2}]}]})
+        matcher = f.compile()
+        self.assertTrue(matcher(instance(Architecture="x86_64", Color="green", Size=3)))
+        self.assertFalse(matcher(instance(Architecture="x86_64", Color="green", Size=1)))
+
+        f = filters.factory({"and": [
+            {"Architecture": "x86_64"}, {"or": [{"Color": "green"}]}]})
+        self.assertIsNone(f.compile())
+
+
+class TestCompiledRelatedFilter(BaseTest):
+
+    def test_and_related_not_fused(self):
+        p = self.load_policy({
+            'name': 'ec2-default-sg',
+            'resource': 'ec2',
+            'filters': [{'and': [
+                {'type': 'security-group', 'key': 'GroupName', 'value': 'default'}]}]})
+        f = p.resource_manager.filters[0]
+        self.assertIsNone(f.filters[0].compile())
+        self.assertIsNone(f.compile())
+
+        related = {'sg-1': {'GroupId': 'sg-1', 'GroupName': 'default'}}
+        self.patch(type(f.filters[0]), 'get_related', lambda self, resources: related)
+        i = instance(SecurityGroups=[{'GroupId': 'sg-1'}])
+        self.assertEqual(f.process([i]), [i])
+
+
 class TestNotFilter(unittest.TestCase):
 
     def test_not(self):
@@ -285,6 +357,34 @@ class TestValueFilter(unittest.TestCase):
             "key": "ingress"})
         self.assertRaises(TypeError, vf.match(resource))
 
+    def test_augment_attributes(self):
+        self.assertEqual(
+            filters.factory({"tag:ASV": "absent"}).get_augment_attributes(),
+            ("Tags",))
+        self.assertEqual(
+            filters.factory({"Versioning.Status": "Enabled"}).get_augment_attributes(),
+            ("Versioning",))
+        self.assertEqual(
+            filters.factory({
+                "type": "value", "key": "Grants[].Permission",
+                "value": "READ", "op": "in", "value_type": "swap"}
+            ).get_augment_attributes(),
+            ("Grants",))
+        self.assertEqual(
+            filters.factory({
+                "type": "value", "value_type": "resource_count",
+                "op": "gt", "value": 1}).get_augment_attributes(),
+            ())
+        self.assertEqual(
+            filters.factory({
+                "type": "value", "key": "a", "value": "b",
+                "value_type": "expr"}).get_augment_attributes(),
+            None)
+        self.assertEqual(
+            filters.factory({"length(Tags)": 2}).get_augment_attributes(), None)
+        self.assertEqual(
+            filters.factory({"or": [{"a": 1}]}).get_augment_attributes(), ())
+
 
 class TestAgeFilter(unittest.TestCase):
 
@@ -1109,6 +1209,82 @@ class TestMetricsFilter(BaseTest):
                 for res in resources)
         )
 
+    def test_batch_metrics(self):
+        session_factory = self.replay_flight_data("test_batch_metrics")
+        policy_data = {
+            "name": "elb-batch-metrics",
+            "resource": "elb",
+            "filters": [
+                {
+                    "type": "metrics",
+                    "value": 0,
+                    "name": "RequestCount",
+                    "op": "eq",
+                    "statistics": "Sum",
+                    "missing-value": 0,
+                }
+            ],
+        }
+        config = {"account_id": "644160558196", "batch_metrics": True}
+
+        with snapshot_scope() as snapshots:
+            p = self.load_policy(
+                policy_data, config=config, session_factory=session_factory)
+            self.assertEqual(
+                p.resource_manager.filters[0].get_permissions(),
+                ("cloudwatch:GetMetricData",))
+            resources = p.run()
+            self.assertEqual(
+                sorted(r["LoadBalancerName"] for r in resources),
+                ["test-elb-missing-metrics", "test-elb-zero-metrics"])
+            store = snapshots.get_store("metrics", base_filters.metrics.MetricDataStore)
+            # one query per load balancer, over two pages of results.
+            self.assertEqual(store.calls, 2)
+
+            # another policy in the run reuses the queries' results
+            policy_data["name"] = "elb-batch-metrics-2"
+            policy_data["filters"][0]["op"] = "gt"
+            p = self.load_policy(
+                policy_data, config=config, session_factory=session_factory)
+            resources = p.run()
+            self.assertEqual(
+                [r["LoadBalancerName"] for r in resources], ["test-elb-nonzero-metrics"])
+            self.assertEqual(
+                [(m["Timestamp"].day, m["Sum"])
+                 for m in resources[0]["c7n.metrics"]["AWS/ELB.RequestCount.Sum.14"]],
+                [(2, 12.0), (1, 30.0)])
+            self.assertEqual(store.calls, 2)
+
+    def test_batch_metrics_file_cache(self):
+        session_factory = self.replay_flight_data("test_batch_metrics")
+        p = self.load_policy(
+            {
+                "name": "elb-batch-metrics",
+                "resource": "elb",
+                "filters": [{
+                    "type": "metrics",
+                    "value": 0,
+                    "name": "RequestCount",
+                    "op": "eq",
+                    "statistics": "Sum",
+                    "missing-value": 0}],
+            },
+            config={"account_id": "644160558196", "batch_metrics": True},
+            session_factory=session_factory,
+            cache=True)
+        self.assertEqual(type(p.resource_manager._cache).__name__, "SqlKvCache")
+        resources = p.run()
+        self.assertEqual(
+            sorted(r["LoadBalancerName"] for r in resources),
+            ["test-elb-missing-metrics", "test-elb-zero-metrics"])
+
+        # later lookups are served from the file cache
+        def get(*args, **kw):
+            raise AssertionError("unexpected metric query")
+        self.patch(base_filters.metrics.MetricDataStore, "get", get)
+        f = p.resource_manager.filters[0]
+        self.assertTrue(f.get_metric_data(resources))
+
     def test_metric_period_rounding(self):
         """Round metrics start and end times to align with CloudWatch retention periods"""
 
@@ -4,11 +4,15 @@ import json
 import logging
 import mock
 import os
+import shutil
+import time
 
 from .common import BaseTest
 from c7n.exceptions import PolicyExecutionError
-from c7n.policy import Policy
+from c7n.output import LogMetrics
+from c7n.policy import CloudTrailMode, Policy
 from c7n import handler
+from c7n.utils import local_session
 
 
 class HandleTest(BaseTest):
@@ -61,6 +65,8 @@ class HandleTest(BaseTest):
         work_dir = self.change_cwd()
         self.patch(handler, 'policy_data', None)
         self.patch(handler, 'policy_config', None)
+        self.patch(handler, 'policies', None)
+        self.patch(handler, 'policy_state', {})
 
         # don't require api creds to resolve account id
         if 'execution-options' not in policy_data:
@@ -134,6 +140,136 @@ class HandleTest(BaseTest):
         handler.dispatch_event({'detail': {'xyz': 'oui'}}, None)
         self.assertEqual(output.getvalue().count('error during'), 2)
 
+    def test_dispatch_resource_index(self):
+        index = {'providers': ['aws'], 'resources': ['aws.ec2'],
+                 'modules': ['c7n.resources.aws', 'c7n.resources.ec2']}
+        output, executions = self.setupLambdaEnv({
+            'policies': [{'resource': 'ec2', 'name': 'xyz'}],
+            'resource-index': index})
+        load_index = mock.MagicMock()
+        load_resources = mock.MagicMock()
+        self.patch(handler, 'load_index', load_index)
+        self.patch(handler, 'load_resources', load_resources)
+        handler.dispatch_event({'detail': {}}, None)
+        load_index.assert_called_once_with(index)
+        load_resources.assert_not_called()
+        self.assertTrue(executions)
+
+    def test_dispatch_warm_reuse(self):
+        output, executions = self.setupLambdaEnv({
+            'policies': [{'resource': 'ec2', 'name': 'xyz', 'mode': {
+                'type': 'cloudtrail',
+                'member-role': 'arn:aws:iam::{account_id}:role/member'}}]})
+        validate = mock.MagicMock()
+        self.patch(Policy, 'validate', validate)
+        metrics = []
+        self.patch(
+            handler, 'put_start_metrics',
+            lambda p, init_start=None: metrics.append(init_start is not None) or p.ctx.metrics)
+
+        handler.dispatch_event({'detail': {}}, None)
+        p = handler.policies.policies[0]
+        # simulate member account execution updating policy state
+        p.options['account_id'] = '008'
+        p.session_factory.assume_role = 'arn:aws:iam::008:role/member'
+
+        handler.dispatch_event({'detail': {}}, None)
+        self.assertIs(handler.policies.policies[0], p)
+        self.assertEqual(p.options['account_id'], '007')
+        self.assertEqual(p.session_factory.assume_role, None)
+        self.assertEqual(validate.call_count, 1)
+        self.assertEqual(metrics, [True, False])
+        self.assertEqual(len(executions), 2)
+
+        self.patch(handler, 'C7N_REUSE_POLICIES', False)
+        handler.dispatch_event({'detail': {}}, None)
+        self.assertIsNot(handler.policies.policies[0], p)
+        self.assertEqual(validate.call_count, 2)
+
+    def test_dispatch_warm_state(self):
+        output, executions = self.setupLambdaEnv({
+            'policies': [{'resource': 'ec2', 'name': 'warm-state',
+                          'filters': [{'type': 'offhour', 'default_tz': 'et'}]}]})
+        output_dir = os.path.join('/tmp', 'warm-state')  # nosec
+        self.addCleanup(shutil.rmtree, output_dir, True)
+        contexts, metrics = [], []
+
+        def push(p, event, context):
+            metrics.append([m['MetricName'] for m in p.ctx.metrics.buf])
+            with p.ctx:
+                contexts.append(p.ctx)
+                self.assertIs(p.resource_manager.ctx, p.ctx)
+                for service in ('ec2', 's3'):
+                    local_session(p.session_factory).client(service)
+                p.resource_manager.filters[0].process(
+                    [{'InstanceId': 'i-1', 'State': {'Name': 'running'}, 'Tags': [
+                        {'Key': 'maid_offhours', 'Value': 'off=bad'}]}])
+            executions.append(event)
+
+        self.patch(Policy, 'push', push)
+        for i in range(5):
+            handler.dispatch_event({'detail': {}}, None)
+        p = handler.policies.policies[0]
+        self.assertEqual(len(executions), 5)
+        self.assertEqual(len({c.execution_id for c in contexts}), 5)
+        self.assertEqual(metrics, [['ColdStart', 'InitTime']] + [['ColdStart']] * 4)
+        self.assertEqual(p.session_factory._clients, {})
+        self.assertEqual(p.resource_manager.filters[0].enabled_count, 1)
+        with open(os.path.join(output_dir, 'parse_errors.json')) as fh:
+            self.assertEqual(json.load(fh), [['i-1', 'off=bad']])
+
+    def test_dispatch_warm_value_from(self):
+        allowed_path = os.path.join(self.get_temp_dir(), 'allowed.json')
+        output, executions = self.setupLambdaEnv({
+            'policies': [{'resource': 'ec2', 'name': 'allowed', 'filters': [{
+                'InstanceId': 'present'}, {
+                'type': 'value', 'key': 'InstanceId', 'op': 'in',
+                'value_from': {'url': 'file://%s' % allowed_path}}]}]})
+        matched = []
+
+        def push(p, event, context):
+            matched.append([r['InstanceId'] for r in p.resource_manager.filter_resources(
+                [{'InstanceId': 'i-1'}, {'InstanceId': 'i-2'}])])
+
+        self.patch(Policy, 'push', push)
+        for allowed in (['i-1'], ['i-2']):
+            with open(allowed_path, 'w') as fh:
+                json.dump(allowed, fh)
+            handler.dispatch_event({'detail': {}}, None)
+        self.assertEqual(matched, [['i-1'], ['i-2']])
+
+    def test_dispatch_start_metrics_no_match(self):
+        push = Policy.push
+        output, executions = self.setupLambdaEnv({
+            'policies': [{'resource': 'ec2', 'name': 'no-match', 'mode': {
+                'type': 'cloudtrail', 'events': ['RunInstances']},
+                'filters': [{'InstanceId': 'i-2'}]}]})
+        self.patch(Policy, 'push', push)
+        resolved = [[], [{'InstanceId': 'i-1'}]]
+        self.patch(
+            CloudTrailMode, 'resolve_resources', lambda mode, event: resolved.pop(0))
+        published = []
+        self.patch(
+            LogMetrics, '_put_metrics',
+            lambda m, ns, metrics: published.append([d['MetricName'] for d in metrics]))
+
+        # neither invocation enters the policy context, as nothing matched.
+        handler.dispatch_event({'detail': {}}, None)
+        handler.dispatch_event({'detail': {}}, None)
+        self.assertEqual(published, [['ColdStart', 'InitTime'], ['ColdStart']])
+
+    def test_start_metrics(self):
+        output, executions = self.setupLambdaEnv({
+            'policies': [{'resource': 'ec2', 'name': 'xyz'}]})
+        p = Policy({'resource': 'ec2', 'name': 'xyz'}, handler.init_config(
+            {'policies': [{}], 'execution-options': {'account_id': '007'}}))
+        handler.put_start_metrics(p, time.time())
+        handler.put_start_metrics(p)
+        self.assertEqual(
+            [(m['MetricName'], m['Value']) for m in p.ctx.metrics.buf[:1] + p.ctx.metrics.buf[2:]],
+            [('ColdStart', 1), ('ColdStart', 0)])
+        self.assertEqual(p.ctx.metrics.buf[1]['MetricName'], 'InitTime')
+
     def test_handler(self):
         output, executions = self.setupLambdaEnv({
             'policies': [{
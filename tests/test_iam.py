@@ -14,6 +14,7 @@ import pytest
 from pytest_terraform import terraform
 from dateutil import parser
 
+from c7n import cache
 from c7n.exceptions import PolicyValidationError
 from c7n.executor import MainThreadExecutor
 from c7n.filters.iamaccess import CrossAccountAccessFilter, PolicyChecker
@@ -1066,6 +1067,72 @@ class IamUserGroupMembership(BaseTest):
         self.assertTrue(resources[0]["c7n:Groups"])
 
 
+class IamAuthorizationDetailsTest(BaseTest):
+
+    def test_user_filters(self):
+        session_factory = self.replay_flight_data("test_iam_authorization_details")
+        self.patch(UserPolicy, "executor_factory", MainThreadExecutor)
+        self.patch(GroupMembership, "executor_factory", MainThreadExecutor)
+        p = self.load_policy(
+            {
+                "name": "iam-admin-users",
+                "resource": "iam-user",
+                "source": "authorization-details",
+                "filters": [
+                    {"type": "group", "key": "GroupName", "value": "admins"},
+                    {"type": "policy", "key": "PolicyName", "value": "AdministratorAccess"},
+                    {"type": "has-inline-policy", "value": True}],
+            },
+            session_factory=session_factory,
+        )
+        self.assertEqual(
+            p.resource_manager.get_permissions(), ['iam:GetAccountAuthorizationDetails'])
+        resources = p.run()
+        self.assertEqual([r["UserName"] for r in resources], ["alice"])
+        self.assertEqual(resources[0]["c7n:Groups"][0]["GroupId"], "AGPAADMINS")
+        self.assertEqual(resources[0]["c7n:InlinePolicies"], ["alice-inline"])
+        self.assertEqual(
+            p.resource_manager.get_resources(["bob"])[0]["UserId"], "AIDABOB")
+
+    def test_shared_snapshot(self):
+        session_factory = self.replay_flight_data("test_iam_authorization_details")
+        policies = [
+            self.load_policy(
+                {
+                    "name": "iam-inline-roles",
+                    "resource": "iam-role",
+                    "source": "authorization-details",
+                    "filters": [
+                        {"type": "has-inline-policy", "value": True},
+                        {"type": "has-specific-managed-policy", "value": "app-read"}],
+                },
+                session_factory=session_factory),
+            self.load_policy(
+                {
+                    "name": "iam-unused-policies",
+                    "resource": "iam-policy",
+                    "source": "authorization-details",
+                    "filters": ["unused"],
+                },
+                session_factory=session_factory),
+            self.load_policy(
+                {
+                    "name": "iam-readers",
+                    "resource": "iam-group",
+                    "source": "authorization-details",
+                    "filters": [{"GroupName": "readers"}],
+                },
+                session_factory=session_factory)]
+
+        with cache.snapshot_scope() as snapshots:
+            self.assertEqual(
+                [[r[p.resource_manager.resource_type.name] for r in p.run()]
+                 for p in policies],
+                [["app"], ["app-unused"], ["readers"]])
+            # the policies share a single authorization details sweep.
+            self.assertEqual(snapshots.hits, 2)
+
+
 class IamInstanceProfileFilterUsage(BaseTest):
 
     def test_iam_instance_profile_inuse(self):
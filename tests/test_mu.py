@@ -8,6 +8,7 @@ import platform
 import py_compile
 import shutil
 import site
+import subprocess
 import sys
 import tempfile
 import time
@@ -18,8 +19,10 @@ import mock
 from mock import patch
 
 from c7n.config import Config
+from c7n import mu
 from c7n.mu import (
     custodian_archive,
+    custodian_layer_archive,
     generate_requirements,
     get_exec_options,
     BucketLambdaNotification,
@@ -153,6 +156,125 @@ class PolicyLambdaProvision(Publish):
         self.assertEqual(result["FunctionName"], "custodian-sg-modified")
         self.addCleanup(mgr.remove, pl)
 
+    def test_custodian_layer(self):
+        self.patch(mu, 'ARCHIVE_CACHE_DIR', tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, mu.ARCHIVE_CACHE_DIR)
+        factory = self.replay_flight_data('test_mu_custodian_layer')
+        p = self.load_policy({
+            'name': 'ec2-layer',
+            'resource': 'ec2',
+            'mode': {'type': 'cloudtrail',
+                     'custodian-layer': True,
+                     'layers': ['arn:aws:lambda:us-east-1:644160558196:layer:Deps:2'],
+                     'events': ['RunInstances']}},
+            session_factory=factory)
+        pl = PolicyLambda(p)
+        self.assertEqual(
+            sorted(pl.get_archive().get_filenames()),
+            ['config.json', 'custodian_policy.py'])
+        self.assertEqual(pl.layer_name, 'custodian-runtime')
+        self.assertTrue(pl.layer_description.startswith('cloud-custodian'))
+
+        layer_archive = pl.get_layer_archive()
+        self.assertIn('python/c7n/__init__.py', layer_archive.get_filenames())
+
+        mgr = LambdaManager(factory)
+        arn = 'arn:aws:lambda:us-east-1:644160558196:layer:custodian-runtime:1'
+        self.assertEqual(
+            mgr.publish_layer(
+                pl.layer_name, 'cloud-custodian', pl.runtime, lambda: layer_archive),
+            arn)
+        # an existing version with the same contents is reused, without
+        # building its archive.
+        publish, get_archive = mock.MagicMock(), mock.MagicMock()
+        self.patch(mgr.client, 'publish_layer_version', publish)
+        self.assertEqual(
+            mgr.publish_layer(pl.layer_name, 'cloud-custodian', pl.runtime, get_archive),
+            arn)
+        publish.assert_not_called()
+        get_archive.assert_not_called()
+
+        pl.layer_arn = arn
+        self.assertEqual(
+            pl.layers,
+            ['arn:aws:lambda:us-east-1:644160558196:layer:Deps:2', arn])
+
+    def test_minimal_package(self):
+        p = self.load_policy({
+            'name': 'ec2-minimal',
+            'resource': 'ec2',
+            'mode': {'type': 'cloudtrail',
+                     'minimal-package': True,
+                     'events': ['RunInstances']},
+            'filters': [
+                {'or': [
+                    {'tag:Owner': 'absent'},
+                    {'type': 'security-group', 'key': 'GroupName', 'value': 'default'}]}],
+            'actions': [{'type': 'mark-for-op', 'op': 'stop'}, 'post-item']})
+        pl = PolicyLambda(p)
+        self.assertEqual(
+            pl.index,
+            {'providers': ['aws'],
+             'resources': ['aws.ec2'],
+             'modules': ['c7n.filters.core', 'c7n.policy', 'c7n.resources.aws', 'c7n.resources.ec2',
+                         'c7n.resources.ssm', 'c7n.tags']})
+        archive = pl.get_archive()
+        filenames = archive.get_filenames()
+        for f in ('c7n/__init__.py', 'c7n/handler.py', 'c7n/resources/__init__.py',
+                  'c7n/resources/ec2.py', 'c7n/resources/vpc.py', 'c7n/resources/ssm.py',
+                  'config.json', 'custodian_policy.py'):
+            self.assertIn(f, filenames)
+        self.assertNotIn('c7n/resources/rds.py', filenames)
+        self.assertNotIn('c7n/resources/dynamodb.py', filenames)
+        with archive.get_reader() as reader:
+            config = json.loads(reader.read('config.json'))
+        self.assertEqual(config['resource-index'], pl.index)
+
+    def test_minimal_package_resource_refs(self):
+        # the ebs and image filters get their managers by type name
+        p = self.load_policy({
+            'name': 'ec2-minimal-refs',
+            'resource': 'ec2',
+            'mode': {'type': 'cloudtrail',
+                     'minimal-package': True,
+                     'events': ['RunInstances']},
+            'filters': [
+                {'type': 'ebs', 'key': 'Encrypted', 'value': False},
+                {'type': 'image', 'key': 'Public', 'value': True}]})
+        pl = PolicyLambda(p)
+        archive = pl.get_archive()
+        filenames = archive.get_filenames()
+        self.assertIn('c7n/resources/ebs.py', filenames)
+        self.assertIn('c7n/resources/ami.py', filenames)
+        self.assertNotIn('c7n/resources/dynamodb.py', filenames)
+
+        # the policy loads and resolves its related managers from the
+        # archive contents alone.
+        bench = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, bench)
+        with archive.get_reader() as reader:
+            reader.extractall(bench)
+        script = "\n".join((
+            "import json, c7n",
+            "from c7n.config import Config",
+            "from c7n.policy import PolicyCollection",
+            "from c7n.resources import load_index",
+            "import c7n.handler",
+            "data = json.load(open('config.json'))",
+            "load_index(data['resource-index'])",
+            "p = list(PolicyCollection.from_data(data, Config.empty()))[0]",
+            "p.validate()",
+            "p.get_permissions()",
+            "print(c7n.__file__)"))
+        env = dict(os.environ)
+        env.pop('PYTHONPATH', None)
+        output = subprocess.check_output(
+            [sys.executable, '-c', script], cwd=bench, env=env,
+            stderr=subprocess.STDOUT).decode('utf8')
+        self.assertTrue(
+            output.strip().splitlines()[-1].startswith(os.path.realpath(bench)),
+            output)
+
     def test_published_lambda_architecture(self):
         session_factory = self.replay_flight_data("test_published_lambda_architecture")
         with patch('platform.machine', return_value="arm64"):
@@ -1261,6 +1383,59 @@ class PythonArchiveTest(unittest.TestCase):
         filenames = archive.get_filenames()
         self.assertTrue("c7n/__init__.py" in filenames)
 
+    def test_custodian_archive_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        with patch.object(mu, 'ARCHIVE_CACHE_DIR', cache_dir):
+            archive = custodian_archive()
+            self.addCleanup(archive.remove)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            with patch.object(mu.PythonPackageArchive, 'add_modules') as add_modules:
+                cached = custodian_archive()
+                self.addCleanup(cached.remove)
+                for call in add_modules.call_args_list:
+                    self.assertEqual(call[0][1], ())
+            cached.add_contents('config.json', '{}')
+            cached.close()
+            self.assertIn('c7n/__init__.py', cached.get_filenames())
+            self.assertIn('config.json', cached.get_filenames())
+
+            layer = custodian_layer_archive()
+            self.addCleanup(layer.remove)
+            self.assertEqual(len(os.listdir(cache_dir)), 2)
+            self.assertIn('python/c7n/__init__.py', layer.get_filenames())
+            self.assertNotIn('c7n/__init__.py', layer.get_filenames())
+
+    def test_custodian_archive_cache_prune(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        for i in range(4):
+            path = os.path.join(cache_dir, '%d.zip' % i)
+            open(path, 'w').close()
+            os.utime(path, (1000 + i, 1000 + i))
+        open(os.path.join(cache_dir, 'build.tmp'), 'w').close()
+        # using an archive makes it recent
+        os.utime(os.path.join(cache_dir, '0.zip'), (2000, 2000))
+        mu.prune_archive_cache(cache_dir, 2)
+        self.assertEqual(sorted(os.listdir(cache_dir)), ['0.zip', '3.zip', 'build.tmp'])
+
+        with patch.object(mu, 'ARCHIVE_CACHE_DIR', cache_dir):
+            with patch.object(mu, 'ARCHIVE_CACHE_SIZE', 2):
+                archive = custodian_archive()
+                self.addCleanup(archive.remove)
+        # the new build and the most recently used archive are kept
+        archives = [n for n in os.listdir(cache_dir) if n.endswith('.zip')]
+        self.assertEqual(len(archives), 2)
+        self.assertIn('0.zip', archives)
+
+    def test_custodian_archive_cache_unwritable(self):
+        cache_dir = os.path.join(self.make_file(), 'cache')
+        with patch.object(mu, 'ARCHIVE_CACHE_DIR', cache_dir):
+            archive = custodian_archive()
+            self.addCleanup(archive.remove)
+            archive.close()
+            self.assertIn('c7n/__init__.py', archive.get_filenames())
+
     def make_file(self):
         bench = tempfile.mkdtemp()
         path = os.path.join(bench, "foo.txt")
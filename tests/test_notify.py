@@ -292,3 +292,109 @@ class NotifyTest(BaseTest):
         self.assertEqual(len(messages), 1)
         body = json.loads(zlib.decompress(base64.b64decode(messages[0]["Body"])))
         self.assertTrue("tag:k1" in body.get("resources")[0].get("c7n:MatchedFilters"))
+
+    def record_api_calls(self, session_factory):
+        calls = []
+
+        def record(params, model, **kw):
+            calls.append((model.service_model.service_name, model.name, dict(params)))
+        session_factory().events.register('provide-client-params.*.*', record)
+        return calls
+
+    def test_notify_batched_transport(self):
+        session_factory = self.replay_flight_data("test_notify_batched_transport")
+        calls = self.record_api_calls(session_factory)
+        policy = self.load_policy(
+            {"name": "notify-batch",
+             "resource": "ec2",
+             "actions": [
+                 {"type": "notify", "to": ["noone@example.com"],
+                  "transport": {"type": "sqs", "queue": "xyz"}}]},
+            session_factory=session_factory)
+        action = policy.resource_manager.actions[0]
+        self.patch(action, 'batch_size', 1)
+        action.process([{'InstanceId': 'i-%d' % i} for i in range(12)])
+
+        # messages of one resource are sent in batches of up to ten
+        self.assertEqual(
+            [(op, len(params.get('Entries', ()))) for _, op, params in calls],
+            [('ListAccountAliases', 0), ('SendMessageBatch', 10), ('SendMessageBatch', 2)])
+        self.assertEqual(
+            calls[1][2]['QueueUrl'],
+            'https://sqs.us-east-1.amazonaws.com/644160558196/xyz')
+        # one sqs client per destination is reused across batches
+        self.assertEqual(len(action.clients), 1)
+
+    def test_notify_split_and_spill(self):
+        session_factory = self.replay_flight_data("test_notify_split_and_spill")
+        calls = self.record_api_calls(session_factory)
+        policy = self.load_policy(
+            {"name": "notify-spill",
+             "resource": "ec2",
+             "actions": [
+                 {"type": "notify", "to": ["noone@example.com"],
+                  "transport": {"type": "sns", "topic": "zebra",
+                                "s3_spill": "s3://spill-bucket/notify"}}]},
+            session_factory=session_factory)
+        action = policy.resource_manager.actions[0]
+        self.assertEqual(
+            action.get_permissions(), ('sns:Publish', 's3:PutObject'))
+        self.patch(action, 'MAX_MESSAGE_SIZE', 8 * 1024)
+        self.patch(action, 'SNS_ENVELOPE_SIZE', 0)
+        resources = [
+            {'InstanceId': 'i-%d' % i, 'Blob': os.urandom(512).hex()}
+            for i in range(6)]
+        resources.append({'InstanceId': 'i-big', 'Blob': os.urandom(8192).hex()})
+        action.process(resources)
+
+        self.assertEqual(
+            [(svc, op) for svc, op, _ in calls],
+            [('iam', 'ListAccountAliases'), ('s3', 'PutObject'), ('sns', 'PublishBatch')])
+        put = calls[1][2]
+        self.assertEqual(put['Bucket'], 'spill-bucket')
+        self.assertTrue(put['Key'].startswith('notify/notify-spill/'))
+        spilled = json.loads(zlib.decompress(base64.b64decode(put['Body'])))
+        self.assertEqual(
+            [r['InstanceId'] for r in spilled['resources']], ['i-big'])
+
+        messages = [
+            json.loads(zlib.decompress(base64.b64decode(e['Message'])))
+            for e in calls[2][2]['PublishBatchRequestEntries']]
+        self.assertTrue(all(
+            len(e['Message']) <= 8 * 1024
+            for e in calls[2][2]['PublishBatchRequestEntries']))
+        self.assertEqual(
+            sorted(r['InstanceId'] for m in messages for r in m.get('resources', ())),
+            ['i-%d' % i for i in range(6)])
+        self.assertEqual(
+            messages[-1]['c7n:payload'], 's3://spill-bucket/%s' % put['Key'])
+
+    def test_notify_batch_failed_entries(self):
+        policy = self.load_policy(
+            {"name": "notify-batch-retry",
+             "resource": "ec2",
+             "actions": [
+                 {"type": "notify", "to": ["noone@example.com"],
+                  "transport": {"type": "sqs", "queue": "xyz"}}]})
+        action = policy.resource_manager.actions[0]
+        receipts = action.send_batches(
+            ['a', 'b', 'c'],
+            lambda entries: {
+                'Successful': [{'Id': '0', 'MessageId': 'm-0'}],
+                'Failed': [{'Id': '1', 'Code': 'x'}, {'Id': '2', 'Code': 'x'}]},
+            lambda body: 'm-%s' % body)
+        self.assertEqual(receipts, ['m-0', 'm-b', 'm-c'])
+
+    def test_notify_batch_attributes_size(self):
+        policy = self.load_policy(
+            {"name": "notify-batch-attributes",
+             "resource": "ec2",
+             "actions": [
+                 {"type": "notify", "to": ["noone@example.com"],
+                  "transport": {"type": "sns", "topic": "zebra",
+                                "attributes": {"owner": "x" * 1000}}}]})
+        action = policy.resource_manager.actions[0]
+        self.patch(action, 'MAX_MESSAGE_SIZE', 4096)
+        # the bodies alone fit in one batch, with their attributes they don't.
+        self.assertEqual(
+            [len(b) for b in action.get_batches(['a' * 1000] * 4)], [2, 2])
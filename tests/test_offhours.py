@@ -196,6 +196,29 @@ class OffHoursFilterTest(BaseTest):
             i = instance(Tags=[{"Key": "maid_offhours", "Value": "tz=est"}])
             self.assertEqual(f(i), False)
 
+    def test_process_shared_schedules(self):
+        t = datetime.datetime.now(tzutil.gettz("America/New_York"))
+        t = t.replace(year=2015, month=12, day=1, hour=19, minute=5)
+        f = OffHour({"skip-days": ["2015-12-25"]})
+        tz_lookups = []
+        get_tz = f.get_tz
+
+        def lookup(tz):
+            tz_lookups.append(tz)
+            return get_tz(tz)
+
+        f.get_tz = lookup
+        resources = [
+            instance(InstanceId=str(n), Tags=[{"Key": "maid_offhours", "Value": v}])
+            for n, v in enumerate(["tz=est", "tz=pt", "tz=est", "bad=x", "tz=pt", "tz=est"])]
+        with mock_datetime_now(t, datetime):
+            self.assertEqual(
+                [r["InstanceId"] for r in f.process(resources)], ["0", "1", "2", "4", "5"])
+        self.assertEqual(sorted(tz_lookups), ["est", "pt"])
+        self.assertEqual(f.parse_errors, [("3", "bad=x")])
+        self.assertEqual(len(f.schedules), 3)
+        self.assertIsNone(f.now)
+
     def test_time_filter_usage_errors(self):
         self.assertRaises(NotImplementedError, Time, {})
 
@@ -6,6 +6,7 @@ import logging
 import mock
 import shutil
 import os
+import threading
 
 from contextlib import nullcontext as no_exception
 from dateutil.parser import parse as date_parse
@@ -13,7 +14,9 @@ from dateutil.parser import parse as date_parse
 from c7n.ctx import ExecutionContext
 from c7n.config import Config
 from c7n.exceptions import InvalidOutputConfig
-from c7n.output import DirectoryOutput, BlobOutput, LogFile, metrics_outputs
+from c7n.executor import ThreadPoolExecutor
+from c7n.output import (
+    DirectoryOutput, BlobOutput, LogFile, log_output_context, metrics_outputs)
 from c7n.resources.aws import S3Output, MetricsOutput, get_bucket_region_clientless
 from c7n.testing import mock_datetime_now, TestUtils
 
@@ -123,6 +126,33 @@ class S3OutputTest(TestUtils):
             content = fh.read().strip()
             self.assertTrue(content.endswith("hello world"))
 
+    def test_join_log_concurrent(self):
+        temp_dir = self.get_temp_dir()
+        output = LogFile(Bag(log_dir=temp_dir, options=Bag(jobs=4)), {})
+        logging.getLogger('custodian').setLevel(logging.INFO)
+        output.join_log()
+
+        l = logging.getLogger("custodian.s3") # NOQA
+        v = l.manager.disable
+        l.manager.disable = 0
+
+        l.info("hello world")
+        # the policy's worker threads log to its output, other threads don't.
+        with ThreadPoolExecutor(max_workers=1) as w:
+            w.submit(l.info, "policy worker").result()
+        t = threading.Thread(target=l.info, args=("other policy",))
+        t.start()
+        t.join()
+        output.leave_log()
+        l.manager.disable = v
+
+        with open(os.path.join(temp_dir, "custodian-run.log")) as fh:
+            content = fh.read().strip()
+            self.assertIn("hello world", content)
+            self.assertTrue(content.endswith("policy worker"))
+            self.assertNotIn("other policy", content)
+        self.assertIsNone(log_output_context.get())
+
     def test_compress(self):
         output = self.get_s3_output()
 
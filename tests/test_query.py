@@ -5,6 +5,8 @@ import logging
 import os
 
 
+from c7n import cache
+from c7n.executor import get_adaptive_limit
 from c7n.query import ResourceQuery, RetryPageIterator, TypeInfo
 from c7n.resources.vpc import InternetGateway
 
@@ -154,6 +156,77 @@ class QueryResourceManagerTest(BaseTest):
         p.run()
         self.assertTrue("Using cached internet-gateway: 3", output.getvalue())
 
+    def test_resources_snapshot(self):
+        session_factory = self.replay_flight_data("test_query_manager")
+        policy = {
+            "name": "igw-check",
+            "resource": "internet-gateway",
+            "filters": [{"InternetGatewayId": "igw-2e65104a"}]}
+        p1 = self.load_policy(policy, session_factory=session_factory)
+        p2 = self.load_policy(
+            dict(policy, name="igw-check-2"), session_factory=session_factory)
+
+        with cache.snapshot_scope() as snapshots:
+            r1 = p1.resource_manager.resources()
+            r1[0]['c7n:annotation'] = True
+            r2 = p2.resource_manager.resources()
+            self.assertEqual(
+                [r['InternetGatewayId'] for r in
+                 p2.resource_manager.get_resources(["igw-2e65104a"])],
+                ["igw-2e65104a"])
+
+        self.assertEqual((snapshots.hits, snapshots.misses), (1, 1))
+        self.assertEqual(len(r2), 1)
+        self.assertNotIn('c7n:annotation', r2[0])
+
+    def test_resources_stream(self):
+        session_factory = self.replay_flight_data("test_query_manager_stream")
+        p = self.load_policy(
+            {
+                "name": "igw-check",
+                "resource": "internet-gateway",
+                "filters": [
+                    {"tag:Name": "absent"},
+                    {"or": [
+                        {"InternetGatewayId": "igw-2e65104a"},
+                        {"InternetGatewayId": "igw-5bce113f"},
+                        {"InternetGatewayId": "igw-7c29aa18"}]}],
+            },
+            config={"stream": True},
+            session_factory=session_factory,
+        )
+        batch_filters, filters = p.resource_manager.get_stream_filters()
+        self.assertEqual([f.type for f in batch_filters], ["value"])
+        self.assertEqual([f.type for f in filters], ["or"])
+
+        batches = []
+        augment = p.resource_manager.augment
+
+        def record_augment(resources):
+            batches.append(len(resources))
+            return augment(resources)
+
+        self.patch(p.resource_manager, "stream_batch_size", 2)
+        self.patch(p.resource_manager, "augment", record_augment)
+        resources = p.run()
+        self.assertEqual(batches, [2, 1])
+        self.assertEqual(
+            sorted(r["InternetGatewayId"] for r in resources),
+            ["igw-2e65104a", "igw-7c29aa18"])
+
+    def test_resources_adaptive_augment(self):
+        session_factory = self.replay_flight_data("test_kinesis_stream_query")
+        p = self.load_policy(
+            {"name": "kstream", "resource": "kinesis"},
+            config={"adaptive_augment": True, "region": "us-east-2"},
+            session_factory=session_factory,
+        )
+        resources = p.run()
+        self.assertEqual(len(resources), 1)
+        self.assertEqual(resources[0]["StreamStatus"], "ACTIVE")
+        limit = get_adaptive_limit("kinesis", "us-east-2")
+        self.assertEqual((limit.in_flight, limit.successes, limit.throttles), (0, 1, 0))
+
     def test_get_resources(self):
         session_factory = self.replay_flight_data("test_query_manager_get")
         p = self.load_policy(
@@ -6,6 +6,7 @@ import c7n.resources.rdscluster
 import pytest
 from unittest.mock import patch
 from c7n.executor import MainThreadExecutor
+from c7n.resources.rds import RDS
 from c7n.resources.rdscluster import RDSCluster, _run_cluster_method
 from c7n.testing import mock_datetime_now
 from dateutil import parser
@@ -87,6 +88,38 @@ class RDSClusterTest(BaseTest):
         self.assertEqual(len(resources), 1)
         assert resources[0]["c7n:Cost"].items() >= {'USD': 91.25}.items()
 
+    def test_rdscluster_cost_instances_loaded_once(self):
+        aws_region = 'ap-southeast-2'
+        session_factory = self.replay_flight_data('rdscluster_cost', region=aws_region)
+        policy = self.load_policy(
+            {
+                "name": "rdscluster-cost",
+                "resource": "rds-cluster",
+                "filters": [{
+                    "type": "infracost",
+                    "api_key": "xyz",
+                    "quantity": 730,
+                }]
+            },
+            session_factory=session_factory,
+            config={'region': aws_region},
+        )
+        calls = []
+        rds_resources = RDS.resources
+
+        def resources(manager, *args, **kw):
+            calls.append(manager)
+            return rds_resources(manager, *args, **kw)
+
+        self.patch(RDS, 'resources', resources)
+        with patch("c7n.filters.cost.Infracost.invoke_infracost") as infracost:
+            infracost.return_value = {'USD': '0.1250000'}
+            resources = policy.run()
+        self.assertEqual(len(resources), 1)
+        self.assertEqual(resources[0]["c7n:Cost"]["members"], 1)
+        self.assertEqual(resources[0]["c7n:Cost"]["USD"], 91.25)
+        self.assertEqual(len(calls), 1)
+
     def test_rdscluster_security_group(self):
         self.remove_augments()
         session_factory = self.replay_flight_data("test_rdscluster_sg_filter")
@@ -0,0 +1,112 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+import json
+from unittest import mock
+
+import requests
+
+from c7n.config import Bag
+from c7n.resource_metadata_update_with_email import (
+    OwnerLookup, call_api_and_update_resources, extract_emails)
+
+
+class FakeResponse:
+
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+def owner_api(request_log, fail=False):
+    def post(url, headers, data, timeout):
+        request_log.append(json.loads(data))
+        if fail:
+            raise requests.exceptions.ConnectTimeout("timeout")
+        params = json.loads(data)
+        return FakeResponse({
+            'appid': {a: {'app_owner': '%s@example.com' % a} for a in params['appid']},
+            'account': {a: {
+                'account_owner': 'acct@example.com',
+                'cost_center_info': {'cc_owner': 'cc@example.com'}}
+                for a in params.get('account', ())}})
+    return post
+
+
+def get_lookup(request_log, fail=False):
+    lookup = OwnerLookup(endpoint='https://owner.example.com')
+    lookup.credentials = mock.MagicMock(
+        access_key='foo', secret_key='bar', token=None)
+    lookup.http = mock.MagicMock()
+    lookup.http.post.side_effect = owner_api(request_log, fail)
+    return lookup
+
+
+def tagged(appid):
+    return {'Id': appid, 'Tags': [{'Key': 'appid', 'Value': appid}]}
+
+
+def test_extract_emails():
+    assert extract_emails({
+        'appid': {'a1': {'owner': 'x@example.com', 'name': 'app'}},
+        'account': {'123': {'cost_center_info': {'cc': 'y@example.com'}}}}) == {
+            'appid.a1': {'owner': 'x@example.com'},
+            'account.123.cost_center_info': {'cc': 'y@example.com'}}
+
+
+def test_owner_lookup_update_resources():
+    request_log = []
+    lookup = get_lookup(request_log)
+    manager = Bag(account_id='123456789012', config=Bag(cache=None))
+
+    resources = lookup.update_resources(manager, [tagged('a1'), {'Id': 'untagged'}])
+    assert resources[0]['app_owner'] == 'a1@example.com'
+    assert resources[0]['cc_owner'] == 'cc@example.com'
+    assert resources[1]['account_owner'] == 'acct@example.com'
+    assert 'app_owner' not in resources[1]
+
+    # cached ids aren't requested again, only new ones.
+    lookup.update_resources(manager, [tagged('a1'), tagged('a2')])
+    assert request_log == [
+        {'appid': ['a1'], 'account': ['123456789012']},
+        {'appid': ['a2']}]
+
+
+def test_owner_lookup_persistent_cache(tmp_path):
+    options = Bag(cache=str(tmp_path / 'cloud-custodian.cache'), cache_period=15)
+    manager = Bag(account_id='123456789012', config=options)
+
+    request_log = []
+    get_lookup(request_log).update_resources(manager, [tagged('a1')])
+    assert (tmp_path / 'owner-lookup.cache').exists()
+
+    # another process, sharing the cache directory
+    resources = get_lookup(request_log).update_resources(manager, [tagged('a1')])
+    assert resources[0]['app_owner'] == 'a1@example.com'
+    assert len(request_log) == 1
+
+
+def test_owner_lookup_circuit_breaker():
+    request_log = []
+    lookup = get_lookup(request_log, fail=True)
+    manager = Bag(account_id='123456789012', config=Bag(cache=None))
+
+    for i in range(5):
+        resources = lookup.update_resources(manager, [tagged('a1')])
+        assert resources == [tagged('a1')]
+    assert len(request_log) == lookup.failure_threshold
+    assert lookup.open_until > 0
+
+
+def test_call_api_and_update_resources_error():
+    manager = Bag(account_id='123456789012', config=Bag(cache=None))
+    lookup = mock.MagicMock()
+    lookup.update_resources.side_effect = KeyError('x')
+    with mock.patch(
+            'c7n.resource_metadata_update_with_email.get_owner_lookup',
+            return_value=lookup):
+        assert call_api_and_update_resources(manager, [tagged('a1')]) == [tagged('a1')]
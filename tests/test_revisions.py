@@ -1,6 +1,8 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 # from c7n.filters import revisions
+from c7n.cache import InMemoryCache
+from c7n.exceptions import PolicyValidationError
 from c7n.resources.vpc import SecurityGroupDiff, SecurityGroupPatch
 from .common import BaseTest
 
@@ -342,3 +344,86 @@ class SGDiffLibTest(BaseTest):
         s3 = client.describe_security_groups(GroupIds=[sg_id])["SecurityGroups"][0]
 
         self.assertEqual(s1, s3)
+
+    def test_sg_diff_batch(self):
+        factory = self.replay_flight_data("test_sg_config_diff_batch")
+        p = self.load_policy(
+            {
+                "name": "sg-differ",
+                "resource": "security-group",
+                "filters": [
+                    {"GroupId": "sg-a38ed1de"},
+                    {"type": "diff", "batch": True},
+                ],
+            },
+            session_factory=factory,
+        )
+        self.assertEqual(
+            p.resource_manager.filters[1].get_permissions(),
+            ('config:BatchGetResourceConfig',))
+        resources = p.run()
+        self.assertEqual(len(resources), 1)
+        self.assertEqual(
+            resources[0]["c7n:previous-revision"]["version_id"], "1481454243800")
+        self.assertEqual(
+            sorted(resources[0]["c7n:diff"]), ["egress", "ingress", "tags"])
+
+    def test_diff_batch_validate(self):
+        self.assertRaises(
+            PolicyValidationError,
+            self.load_policy,
+            {
+                "name": "sg-differ",
+                "resource": "security-group",
+                "filters": [
+                    {"type": "diff", "batch": True, "selector": "date",
+                     "selector_value": "2016/12/11 17:25Z"},
+                ],
+            },
+        )
+
+    def assert_revisions_cached(self, p):
+        f = p.resource_manager.filters[0]
+        f.model = p.resource_manager.get_model()
+        fetched = []
+
+        def get_revisions(config, resource):
+            fetched.append(resource["GroupId"])
+            return [{"configurationStateId": resource["GroupId"]}]
+
+        self.patch(f, "get_revisions", get_revisions)
+        resources = [{"GroupId": "sg-%d" % i} for i in range(10)]
+        self.assertEqual(
+            sorted(f.get_resource_revisions(resources)),
+            ["sg-%d" % i for i in range(10)])
+        self.assertEqual(sorted(fetched), ["sg-%d" % i for i in range(10)])
+
+        # only uncached revisions are fetched on later calls
+        resources.append({"GroupId": "sg-new"})
+        revisions = f.get_resource_revisions(resources)
+        self.assertEqual(len(fetched), 11)
+        self.assertEqual(revisions["sg-new"], [{"configurationStateId": "sg-new"}])
+
+    def test_diff_revisions_cached(self):
+        p = self.load_policy(
+            {
+                "name": "sg-differ",
+                "resource": "security-group",
+                "filters": [{"type": "diff"}],
+            },
+        )
+        self.patch(InMemoryCache, "_InMemoryCache__shared_state", {})
+        self.patch(p.resource_manager, "_cache", InMemoryCache({}))
+        self.assert_revisions_cached(p)
+
+    def test_diff_revisions_file_cache(self):
+        p = self.load_policy(
+            {
+                "name": "sg-differ",
+                "resource": "security-group",
+                "filters": [{"type": "diff"}],
+            },
+            cache=True,
+        )
+        self.assertEqual(type(p.resource_manager._cache).__name__, "SqlKvCache")
+        self.assert_revisions_cached(p)
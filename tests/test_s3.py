@@ -2180,6 +2180,38 @@ class S3Test(BaseTest):
         resources = p.run()
         self.assertEqual(len(resources), 1)
 
+    def test_missing_policy_statement_projected_augment(self):
+        self.patch(s3.S3, "executor_factory", MainThreadExecutor)
+        self.patch(
+            s3, "S3_AUGMENT_TABLE", [
+                ("get_bucket_policy", "Policy", None, "Policy"),
+                ("get_bucket_acl", "Acl", None, None),
+                ("get_bucket_versioning", "Versioning", None, None)]
+        )
+        # the flight data only has bucket policy responses.
+        session_factory = self.replay_flight_data("test_s3_missing_policy")
+        p = self.load_policy(
+            {
+                "name": "encrypt-keys",
+                "resource": "s3",
+                "filters": [
+                    {"Name": "custodian-encrypt-test"},
+                    {
+                        "type": "missing-policy-statement",
+                        "statement_ids": ["RequireEncryptedPutObject"],
+                    },
+                ],
+            },
+            session_factory=session_factory,
+            config={"projected_augment": True},
+        )
+        self.assertEqual(
+            p.resource_manager.get_augment_attributes(), {"Name", "Policy"})
+        resources = p.run()
+        self.assertEqual(len(resources), 1)
+        self.assertIn("Policy", resources[0])
+        self.assertNotIn("Acl", resources[0])
+
     def test_enable_versioning(self):
         self.patch(s3.S3, "executor_factory", MainThreadExecutor)
         self.patch(
@@ -7,6 +7,7 @@ import time
 from freezegun import freeze_time
 from mock import MagicMock, call
 
+from c7n import cache, tags
 from c7n.tags import universal_retry, coalesce_copy_user_tags
 from c7n.exceptions import PolicyExecutionError, PolicyValidationError
 from c7n.utils import yaml_load
@@ -157,6 +158,36 @@ class UniversalTagTest(BaseTest):
         results = policy.run()
         self.assertTrue('Tags' in results[0])
 
+    def test_universal_augment_tag_snapshot(self):
+        session_factory = self.replay_flight_data('test_tags_universal_augment_snapshot')
+        sweeps = []
+        original = tags.sweep_tags
+
+        def sweep_tags(paginator, types):
+            sweeps.append(types)
+            return original(paginator, types)
+
+        self.patch(tags, 'sweep_tags', sweep_tags)
+        policies = [
+            self.load_policy(
+                {'name': 'cache-%s' % i, 'resource': 'cache-cluster'},
+                session_factory=session_factory)
+            for i in range(2)]
+        self.assertEqual(
+            tags.get_universal_tag_types(policies), {'elasticache:cluster'})
+
+        with cache.snapshot_scope(tag_types={'elasticache:cluster', 'sqs'}) as snapshots:
+            for p in policies:
+                resources = {r['CacheClusterId']: r['Tags'] for r in p.run()}
+                self.assertEqual(
+                    resources,
+                    {'test': [{'Key': 'App', 'Value': 'cache'}], 'other': []})
+            self.assertEqual(
+                snapshots.get_tags(
+                    {'account': self.account_id, 'region': 'us-east-1'}).swept,
+                {'elasticache:cluster', 'sqs'})
+        self.assertEqual(sweeps, [['elasticache:cluster', 'sqs']])
+
     def test_retry_no_error(self):
         mock = MagicMock()
         mock.side_effect = [{"Result": 42}]
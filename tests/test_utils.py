@@ -11,7 +11,8 @@ from dateutil.parser import parse as parse_date
 import mock
 
 from c7n import utils
-from c7n.config import Config
+from c7n.cache import snapshot_scope
+from c7n.config import Bag, Config
 from .common import BaseTest
 
 
@@ -51,6 +52,55 @@ class Backoff(BaseTest):
         else:
             self.fail("should have raised")
 
+    def test_retry_rate_limit(self):
+        sleeps = []
+        self.patch(time, "sleep", sleeps.append)
+        responses = [ClientError({"Error": {"Code": "Throttling"}}, "list"), 42]
+        events = []
+
+        class Client:
+            meta = Bag(
+                c7n_identity=("test-retry",),
+                region_name="us-east-1",
+                service_model=Bag(service_name="sqs"),
+                events=Bag(emit=lambda name, **kw: events.append((name, kw))))
+
+            def list_queues(self):
+                response = responses.pop(0)
+                if isinstance(response, Exception):
+                    raise response
+                return response
+
+        retry = utils.get_retry(("Throttling",), 5)
+        self.assertEqual(retry(Client().list_queues), 42)
+        bucket = utils.rate_limits.get("sqs", "us-east-1", ("test-retry",))
+        self.assertEqual(bucket.rate, bucket.min_rate + bucket.increase)
+        self.assertIsNot(bucket, utils.rate_limits.get("sqs", "us-east-1"))
+        # a backoff delay, and pacing of the retry by the throttled bucket.
+        self.assertEqual(len(sleeps), 2)
+        self.assertEqual(
+            events, [("c7n-retry.sqs", {"retries": 1, "slept": sum(sleeps)})])
+
+    def test_token_bucket(self):
+        sleeps = []
+        self.patch(time, "sleep", sleeps.append)
+        bucket = utils.TokenBucket()
+        self.assertEqual(bucket.acquire(), 0)
+        bucket.throttled()
+        self.assertEqual(bucket.rate, bucket.min_rate)
+        # tokens are spent ahead, callers wait for their turn.
+        bucket.acquire()
+        bucket.acquire()
+        self.assertEqual(len(sleeps), 2)
+        self.assertTrue(sleeps[0] < sleeps[1] <= 2 / bucket.min_rate)
+        bucket.rate = 4
+        bucket.throttled()
+        self.assertEqual(bucket.rate, 2)
+        # once the rate is well above the measured call rate, lift the limit.
+        for i in range(20):
+            bucket.succeeded()
+        self.assertEqual(bucket.rate, None)
+
     def test_delays(self):
         self.assertEqual(
             list(utils.backoff_delays(1, 256)),
@@ -284,6 +334,16 @@ class UtilTest(BaseTest):
         IPV4_list2 = utils.IPv4List([n3, n4])
         self.assertFalse(a1 in IPV4_list2)
 
+        IPV4_list3 = utils.IPv4List([
+            ipaddress.ip_address(u"172.16.0.1"), n4,
+            utils.IPv4Network(u"10.1.0.0/16"), utils.IPv4Network(u"0.0.0.0/0")])
+        self.assertTrue(n1 in IPV4_list3)
+        self.assertTrue(ipaddress.ip_address(u"172.16.0.1") in IPV4_list3)
+        self.assertFalse(None in IPV4_list3)
+        self.assertFalse(ipaddress.ip_network(u"::/0") in IPV4_list3)
+        self.assertFalse(n1 in utils.IPv4List([n2, n3, n4]))
+        self.assertTrue(n2 in utils.IPv4List([n4, n1]))
+
     def test_chunks(self):
         self.assertEqual(
             list(utils.chunks(range(100), size=50)),
@@ -669,3 +729,40 @@ def test_parse_date_floor():
     assert utils.parse_date(1) is None
     assert utils.parse_date('3000') is None
     assert utils.parse_date('30') is None
+
+
+def test_tag_index():
+    r = {'Tags': [
+        {'Key': 'Env', 'Value': 'dev'},
+        {'Key': 'env', 'Value': 'prod'},
+        {'Key': 'App', 'Value': 'web'}]}
+    # maps are only memoized within a run.
+    assert utils.get_tag_map(r) == {'Env': 'dev', 'env': 'prod', 'App': 'web'}
+    assert utils.get_tag_map(r) is not utils.get_tag_map(r)
+
+    with snapshot_scope():
+        assert utils.get_tag_map(r) == {'Env': 'dev', 'env': 'prod', 'App': 'web'}
+        # first match wins on normalized keys, as with a scan of the tags.
+        assert utils.get_tag_map(r, normalize=True) == {'env': 'dev', 'app': 'web'}
+        assert utils.get_tag_map(r) is utils.get_tag_map(r)
+
+        # appending or replacing tags rebuilds the map.
+        r['Tags'].append({'Key': 'Owner', 'Value': 'alice'})
+        assert utils.get_tag_map(r)['Owner'] == 'alice'
+        r['Tags'] = [{'Key': 'Owner', 'Value': 'bob'}]
+        assert utils.get_tag_map(r) == {'Owner': 'bob'}
+
+        # in place updates need an invalidation.
+        r['Tags'][0]['Value'] = 'carol'
+        utils.tag_index.invalidate(r)
+        assert utils.get_tag_map(r) == {'Owner': 'carol'}
+
+    # the next run doesn't see the previous run's maps.
+    r['Tags'][0]['Value'] = 'dave'
+    with snapshot_scope():
+        assert utils.get_tag_map(r) == {'Owner': 'dave'}
+
+    assert utils.get_tag_map({'labels': {'Env': 'dev'}}, normalize=True) == {'env': 'dev'}
+    assert utils.get_tag_map({'tags': {'env': 'dev'}}) == {'env': 'dev'}
+    assert utils.get_tag_map({'Tags': []}) == {}
+    assert utils.get_tag_map({}) == {}
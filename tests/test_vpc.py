@@ -5,7 +5,9 @@ from .common import BaseTest, functional, event_data
 from unittest.mock import MagicMock
 
 from botocore.exceptions import ClientError as BotoClientError
+from c7n import utils
 from c7n.exceptions import PolicyValidationError
+from c7n.filters import core
 from c7n.resources.aws import shape_validate
 from pytest_terraform import terraform
 
@@ -2303,8 +2305,18 @@ class SecurityGroupTest(BaseTest):
             },
             session_factory=factory,
         )
+        lookups = []
+        get_resources = p.resource_manager.get_resources
+
+        def lookup(ids, *args, **kw):
+            lookups.append(ids)
+            return get_resources(ids, *args, **kw)
+
+        self.patch(p.resource_manager, 'get_resources', lookup)
         resources = p.run()
         self.assertEqual(len(resources), 1)
+        # referenced groups are resolved in a single lookup.
+        self.assertEqual(len(lookups), 1)
 
     def test_security_group_reference_egress_filter(self):
         factory = self.replay_flight_data("test_security_group_reference_egress_filter")
@@ -2570,6 +2582,37 @@ class SecurityGroupTest(BaseTest):
         self.assertEqual(resources[1]["MatchedIpPermissions"][0]['IpRanges'][0]
                 ["CidrIp"], "192.0.0.0/32")
 
+    def test_cidr_ingress_parse_once(self):
+        p = self.load_policy({
+            "name": "ingress-cidr",
+            "resource": "security-group",
+            "filters": [{
+                "type": "ingress",
+                "Cidr": {"value": ["10.0.0.0/16", "172.16.0.0/12"],
+                         "op": "in", "value_type": "cidr"}}]})
+        calls = []
+
+        def parse_cidr(value):
+            calls.append(value)
+            return utils.parse_cidr(value)
+
+        self.patch(core, "parse_cidr", parse_cidr)
+        resources = [{
+            "GroupId": "sg-1", "OwnerId": "644160558196",
+            "IpPermissions": [
+                {"IpProtocol": "tcp", "FromPort": i, "ToPort": i,
+                 "IpRanges": [{"CidrIp": "192.168.%d.0/24" % i}]}
+                for i in range(50)] + [
+                {"IpProtocol": "tcp", "FromPort": 443, "ToPort": 443,
+                 "IpRanges": [{"CidrIp": "10.0.1.0/24"}]}]}]
+        f = p.resource_manager.filters[0]
+        self.assertEqual(len(f.process(resources)), 1)
+        self.assertEqual(resources[0]["MatchedIpPermissions"][0]["FromPort"], 443)
+        # the filter's cidr list is parsed once, then once per ip range.
+        self.assertEqual(len(calls), 52)
+        self.assertEqual(
+            calls.count(["10.0.0.0/16", "172.16.0.0/12"]), 1)
+
     @functional
     def test_cidr_size_egress(self):
         factory = self.replay_flight_data("test_security_group_cidr_size")
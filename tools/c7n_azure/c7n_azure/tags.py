@@ -3,6 +3,7 @@
 import logging
 
 from azure.mgmt.resource.resources.models import GenericResource, ResourceGroupPatchable
+from c7n.utils import get_tag_map, tag_index
 from c7n_azure.utils import is_resource_group
 
 
@@ -74,6 +75,7 @@ class TagHelper:
                 new_or_updated_tags = True
 
             tags[key] = tags_to_add[key]
+        tag_index.invalidate(resource)
 
         # call the arm resource update method if there are new or updated tags
         if new_or_updated_tags:
@@ -84,8 +86,7 @@ class TagHelper:
     def get_tag_value(resource, tag, utf_8=False):
         """Get the resource's tag value."""
 
-        tags = {k.lower(): v for k, v in resource.get('tags', {}).items()}
-        value = tags.get(tag, False)
+        value = get_tag_map(resource, normalize=True).get(tag, False)
 
         if value is not False:
             if utf_8:
@@ -7,6 +7,7 @@ import click
 import json
 from c7n.credentials import assumed_session
 from c7n.utils import get_retry, dumps, chunks, get_human_size
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from dateutil.tz import tzutc, tzlocal
@@ -327,12 +328,17 @@ def process_account(account, start, end, destination, region, incremental=True):
                     account.get('name', account_id), "\n  ".join(
                         [g['logGroupName'] for g in all_groups]))
     t = time.time()
+
+    # an account has a single export slot, so its groups share a scheduler.
+    scheduler = ExportScheduler(
+        client, boto3.Session().client('s3'), destination['bucket'])
+    export_end = end.replace(tzinfo=tzlocal()).astimezone(tzutc())
     for g in groups:
-        export.callback(
-            g,
-            destination['bucket'], prefix,
-            g['exportStart'], end, account['role'],
-            name=account['name'])
+        scheduler.add_group(
+            g, "%s/%s" % (prefix, g['logGroupName'].strip('/')),
+            g['exportStart'].replace(tzinfo=tzlocal()).astimezone(tzutc()),
+            export_end, name=account['name'])
+    scheduler.run()
 
     log.info("account:%s exported %d log groups in time:%0.2f",
              account.get('name') or account_id,
@@ -751,7 +757,8 @@ def get_exports(client, bucket, prefix, latest=True):
 @click.option('--start', required=True, help="export logs from this date")
 @click.option('--end', help="export logs before this date")
 @click.option('--role', help="sts role to assume for log group access")
-@click.option('--poll-period', type=float, default=300)
+@click.option('--poll-period', type=float, default=300,
+              help="max seconds between export task status checks")
 @click.option('-r', '--region', multiple=False, help='aws region to use.')
 # @click.option('--bucket-role', help="role to scan destination bucket")
 # @click.option('--stream-prefix)
@@ -801,96 +808,184 @@ def export(group, bucket, prefix, start, end, role, poll_period=120,
         group['storedBytes'])
 
     t = time.time()
-    days = [(
-        start + timedelta(i)).replace(minute=0, hour=0, second=0, microsecond=0)
-        for i in range((end - start).days)]
-    day_count = len(days)
-    s3 = boto3.Session().client('s3')
-    days = filter_extant_exports(s3, bucket, prefix, days, start, end)
-
-    log.info("Group:%s filtering s3 extant keys from %d to %d start:%s end:%s",
-             named_group, day_count, len(days),
-             days[0] if days else '', days[-1] if days else '')
-    t = time.time()
+    scheduler = ExportScheduler(client, boto3.Session().client('s3'), bucket, poll_period)
+    days = scheduler.add_group(group, prefix, start, end, name)
+    scheduler.run()
 
-    retry = get_retry(('SlowDown',))
-
-    for idx, d in enumerate(days):
-        date = d.replace(minute=0, microsecond=0, hour=0)
-        export_prefix = "%s%s" % (prefix, date.strftime("/%Y/%m/%d"))
-        params = {
-            'taskName': "%s-%s" % ("c7n-log-exporter",
-                                   date.strftime("%Y-%m-%d")),
-            'logGroupName': group['logGroupName'],
-            'fromTime': int(time.mktime(
-                date.replace(
-                    minute=0, microsecond=0, hour=0).timetuple()) * 1000),
-            'to': int(time.mktime(
-                date.replace(
-                    minute=59, hour=23, microsecond=0).timetuple()) * 1000),
-            'destination': bucket,
-            'destinationPrefix': export_prefix
-        }
+    log.info(
+        ("Exported log group:%s time:%0.2f days:%d start:%s"
+         " end:%s bucket:%s prefix:%s"),
+        named_group,
+        time.time() - t,
+        len(days),
+        start.strftime('%Y/%m/%d'),
+        end.strftime('%Y/%m/%d'),
+        bucket,
+        prefix)
+
+
+def get_export_params(group_name, day, bucket, prefix):
+    return {
+        'taskName': "%s-%s" % ("c7n-log-exporter",
+                               day.strftime("%Y-%m-%d")),
+        'logGroupName': group_name,
+        'fromTime': int(time.mktime(
+            day.replace(
+                minute=0, microsecond=0, hour=0).timetuple()) * 1000),
+        'to': int(time.mktime(
+            day.replace(
+                minute=59, hour=23, microsecond=0).timetuple()) * 1000),
+        'destination': bucket,
+        'destinationPrefix': "%s%s" % (prefix, day.strftime("/%Y/%m/%d"))
+    }
+
+
+class ExportScheduler:
+    """Run queued log group day exports through an account's export slot.
+
+    Cloudwatch logs allows one active export task per account, instead of
+    sleeping when the slot is taken we poll the active task's status and
+    start the next export as soon as it finishes.
+
+    Each group's destination marker key is created once, and its LastExport
+    tag is written in batches as exports complete. The tag only advances
+    past completed exports, a failed export holds it for the group.
+    """
 
-        # if stream_prefix:
-        #    params['logStreamPrefix'] = stream_prefix
+    active_states = ('PENDING', 'RUNNING', 'PENDING_CANCEL')
+    min_poll_period = 2
+    tag_batch_size = 10
+
+    def __init__(self, client, s3, bucket, poll_period=120, sleep=time.sleep):
+        self.client = client
+        self.s3 = s3
+        self.bucket = bucket
+        self.poll_period = poll_period
+        self.sleep = sleep
+        self.queue = deque()
+        self.groups = {}
+        self.retry = get_retry(('SlowDown',))
+
+    def add_group(self, group, prefix, start, end, name=""):
+        """Queue exports for the days of a group not yet exported."""
+        named_group = "%s:%s" % (name, group['logGroupName'])
+        days = [(
+            start + timedelta(i)).replace(minute=0, hour=0, second=0, microsecond=0)
+            for i in range((end - start).days)]
+        day_count = len(days)
+        days = filter_extant_exports(self.s3, self.bucket, prefix, days, start, end)
+
+        log.info("Group:%s filtering s3 extant keys from %d to %d start:%s end:%s",
+                 named_group, day_count, len(days),
+                 days[0] if days else '', days[-1] if days else '')
+
+        self.groups[prefix] = {
+            'name': named_group, 'pending': len(days), 'marker': False,
+            'last_export': None, 'untagged': 0, 'failed': False}
+        for d in days:
+            self.queue.append((prefix, group['logGroupName'], d))
+        return days
+
+    def run(self):
+        backoff = self.min_poll_period
         try:
-            s3.head_object(Bucket=bucket, Key=prefix)
+            while self.queue:
+                prefix, group_name, day = self.queue[0]
+                self.ensure_marker(prefix)
+                params = get_export_params(group_name, day, self.bucket, prefix)
+                t = time.time()
+                try:
+                    result = self.client.create_export_task(**params)
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'LimitExceededException':
+                        raise
+                    # the slot is held by an export we didn't start
+                    task_id = self.get_active_task()
+                    if task_id is not None:
+                        self.wait(task_id)
+                        continue
+                    # and isn't listed, back off up to the poll period
+                    self.sleep(backoff)
+                    backoff = min(backoff * 1.5, self.poll_period)
+                    continue
+                backoff = self.min_poll_period
+                self.queue.popleft()
+                status = self.wait(result['taskId'])
+                self.complete(prefix, day, result['taskId'], status, time.time() - t)
+        finally:
+            self.flush_tags(force=True)
+
+    def get_active_task(self):
+        for code in self.active_states:
+            tasks = self.client.describe_export_tasks(
+                statusCode=code).get('exportTasks', ())
+            if tasks:
+                return tasks[0]['taskId']
+
+    def wait(self, task_id):
+        """Wait for an export task to finish, returning its status."""
+        interval = self.min_poll_period
+        while True:
+            self.sleep(interval)
+            tasks = self.client.describe_export_tasks(
+                taskId=task_id).get('exportTasks', ())
+            if not tasks:
+                return
+            if tasks[0]['status']['code'] not in self.active_states:
+                return tasks[0]['status']
+            interval = min(interval * 1.5, self.poll_period)
+
+    def complete(self, prefix, day, task_id, status, duration):
+        group = self.groups[prefix]
+        group['pending'] -= 1
+        if status and status['code'] == 'COMPLETED':
+            log.info(
+                "Log export time:%0.2f group:%s day:%s bucket:%s prefix:%s task:%s",
+                duration, group['name'], day.strftime("%Y-%m-%d"),
+                self.bucket, prefix, task_id)
+            if not group['failed']:
+                group['last_export'] = day
+                group['untagged'] += 1
+        else:
+            group['failed'] = True
+            log.error(
+                "Log export failed group:%s day:%s task:%s status:%s",
+                group['name'], day.strftime("%Y-%m-%d"), task_id,
+                status and status.get('message', status['code']))
+        self.flush_tags()
+
+    def ensure_marker(self, prefix):
+        group = self.groups[prefix]
+        if group['marker']:
+            return
+        try:
+            self.s3.head_object(Bucket=self.bucket, Key=prefix)
         except ClientError as e:
             if e.response['Error']['Code'] != '404':  # Not Found
                 raise
-            s3.put_object(
-                Bucket=bucket,
+            self.s3.put_object(
+                Bucket=self.bucket,
                 Key=prefix,
                 Body=json.dumps({}),
                 ACL="bucket-owner-full-control",
                 ServerSideEncryption="AES256")
+        group['marker'] = True
 
-        t = time.time()
-        counter = 0
-        while True:
-            counter += 1
-            try:
-                result = client.create_export_task(**params)
-            except ClientError as e:
-                if e.response['Error']['Code'] == 'LimitExceededException':
-                    time.sleep(poll_period)
-                    # log every 30m of export waiting
-                    if counter % 6 == 0:
-                        log.debug(
-                            "group:%s day:%s waiting for %0.2f minutes",
-                            named_group, d.strftime('%Y-%m-%d'),
-                            (counter * poll_period) / 60.0)
-                    continue
-                raise
-            retry(
-                s3.put_object_tagging,
-                Bucket=bucket, Key=prefix,
+    def flush_tags(self, force=False):
+        for prefix, group in self.groups.items():
+            if not group['untagged']:
+                continue
+            if not (force or group['pending'] == 0 or
+                    group['untagged'] >= self.tag_batch_size):
+                continue
+            self.retry(
+                self.s3.put_object_tagging,
+                Bucket=self.bucket, Key=prefix,
                 Tagging={
                     'TagSet': [{
                         'Key': 'LastExport',
-                        'Value': d.isoformat()}]})
-            break
-
-        log.info(
-            "Log export time:%0.2f group:%s day:%s bucket:%s prefix:%s task:%s",
-            time.time() - t,
-            named_group,
-            d.strftime("%Y-%m-%d"),
-            bucket,
-            params['destinationPrefix'],
-            result['taskId'])
-
-    log.info(
-        ("Exported log group:%s time:%0.2f days:%d start:%s"
-         " end:%s bucket:%s prefix:%s"),
-        named_group,
-        time.time() - t,
-        len(days),
-        start.strftime('%Y/%m/%d'),
-        end.strftime('%Y/%m/%d'),
-        bucket,
-        prefix)
+                        'Value': group['last_export'].isoformat()}]})
+            group['untagged'] = 0
 
 
 if __name__ == '__main__':
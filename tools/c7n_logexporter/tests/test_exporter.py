@@ -0,0 +1,156 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+from datetime import datetime, timedelta
+
+import boto3
+from botocore.stub import Stubber
+from dateutil.tz import tzutc
+
+from c7n.executor import MainThreadExecutor
+from c7n.testing import TestUtils
+
+from c7n_logexporter.exporter import ExportScheduler
+
+# the exporter turns off async for its own process, restore it for other tests.
+MainThreadExecutor.c7n_async = True
+
+
+START = datetime(2024, 3, 1, tzinfo=tzutc())
+PREFIX = 'logs/app'
+
+
+class ExportSchedulerTest(TestUtils):
+
+    def get_scheduler(self, poll_period=120):
+        session = boto3.Session(
+            region_name='us-east-1', aws_access_key_id='xyz', aws_secret_access_key='abc')
+        logs, s3 = session.client('logs'), session.client('s3')
+        self.logs, self.s3 = Stubber(logs), Stubber(s3)
+        self.logs.activate()
+        self.s3.activate()
+        self.sleeps = []
+        return ExportScheduler(logs, s3, 'exports', poll_period, sleep=self.sleeps.append)
+
+    def add_group(self, scheduler, days, prefix=PREFIX):
+        self.s3.add_client_error(
+            'get_object_tagging', 'NoSuchKey', http_status_code=404,
+            expected_params={'Bucket': 'exports', 'Key': prefix})
+        return scheduler.add_group(
+            {'logGroupName': '/' + prefix}, prefix, START, START + timedelta(days))
+
+    def add_marker(self, prefix=PREFIX):
+        self.s3.add_client_error(
+            'head_object', '404', http_status_code=404,
+            expected_params={'Bucket': 'exports', 'Key': prefix})
+        self.s3.add_response('put_object', {})
+
+    def add_export(self, task_id, *states):
+        self.logs.add_response('create_export_task', {'taskId': task_id})
+        self.add_states(task_id, *states)
+
+    def add_states(self, task_id, *states):
+        for s in states:
+            self.logs.add_response(
+                'describe_export_tasks',
+                {'exportTasks': [{'taskId': task_id, 'status': {'code': s}}]},
+                {'taskId': task_id})
+
+    def add_limit_exceeded(self, active=None, state='RUNNING'):
+        self.logs.add_client_error('create_export_task', 'LimitExceededException')
+        for code in ExportScheduler.active_states:
+            tasks = []
+            if active and code == state:
+                tasks = [{'taskId': active, 'status': {'code': code}}]
+            self.logs.add_response(
+                'describe_export_tasks', {'exportTasks': tasks}, {'statusCode': code})
+            if tasks:
+                break
+
+    def add_tag(self, day, prefix=PREFIX):
+        self.s3.add_response(
+            'put_object_tagging', {},
+            {'Bucket': 'exports', 'Key': prefix, 'Tagging': {'TagSet': [
+                {'Key': 'LastExport', 'Value': (START + timedelta(day)).isoformat()}]}})
+
+    def assert_done(self):
+        self.logs.assert_no_pending_responses()
+        self.s3.assert_no_pending_responses()
+
+    def test_export_waits_on_foreign_task(self):
+        scheduler = self.get_scheduler()
+        self.add_group(scheduler, 1)
+        self.add_marker()
+        self.add_limit_exceeded('foreign')
+        self.add_states('foreign', 'COMPLETED')
+        self.add_export('t-1', 'COMPLETED')
+        self.add_tag(0)
+        scheduler.run()
+        self.assert_done()
+        self.assertEqual(self.sleeps, [2, 2])
+
+    def test_export_waits_on_pending_cancel_task(self):
+        scheduler = self.get_scheduler()
+        self.add_group(scheduler, 1)
+        self.add_marker()
+        self.add_limit_exceeded('cancelled', 'PENDING_CANCEL')
+        self.add_states('cancelled', 'PENDING_CANCEL', 'CANCELLED')
+        self.add_export('t-1', 'COMPLETED')
+        self.add_tag(0)
+        scheduler.run()
+        self.assert_done()
+        self.assertEqual(self.sleeps, [2, 3.0, 2])
+
+    def test_export_slot_backoff(self):
+        scheduler = self.get_scheduler(poll_period=4)
+        self.add_group(scheduler, 1)
+        self.add_marker()
+        # the slot is taken by a task that isn't listed yet
+        for i in range(3):
+            self.add_limit_exceeded()
+        self.add_export('t-1', 'PENDING', 'RUNNING', 'RUNNING', 'COMPLETED')
+        self.add_tag(0)
+        scheduler.run()
+        self.assert_done()
+        self.assertEqual(self.sleeps, [2, 3.0, 4, 2, 3.0, 4, 4])
+
+    def test_failed_export_holds_tag(self):
+        scheduler = self.get_scheduler()
+        self.assertEqual(len(self.add_group(scheduler, 3)), 3)
+        self.add_marker()
+        self.add_export('t-1', 'COMPLETED')
+        self.add_export('t-2', 'FAILED')
+        self.add_export('t-3', 'COMPLETED')
+        # only the day before the failure is recorded
+        self.add_tag(0)
+        scheduler.run()
+        self.assert_done()
+
+    def test_marker_once_per_group(self):
+        scheduler = self.get_scheduler()
+        self.add_group(scheduler, 2)
+        self.add_group(scheduler, 1, 'logs/web')
+        self.add_marker()
+        self.add_export('t-1', 'COMPLETED')
+        self.add_export('t-2', 'COMPLETED')
+        self.add_tag(1)
+        self.add_marker('logs/web')
+        self.add_export('t-3', 'COMPLETED')
+        self.add_tag(0, 'logs/web')
+        scheduler.run()
+        self.assert_done()
+
+    def test_tag_flush_batches(self):
+        scheduler = self.get_scheduler()
+        scheduler.tag_batch_size = 2
+        self.add_group(scheduler, 5)
+        self.add_marker()
+        self.add_export('t-1', 'COMPLETED')
+        self.add_export('t-2', 'COMPLETED')
+        self.add_tag(1)
+        self.add_export('t-3', 'COMPLETED')
+        self.add_export('t-4', 'COMPLETED')
+        self.add_tag(3)
+        self.add_export('t-5', 'COMPLETED')
+        self.add_tag(4)
+        scheduler.run()
+        self.assert_done()
@@ -120,6 +120,8 @@ class MailerSqsQueueProcessor(MessageTargetMixin):
             except ValueError:
                 pass
             message = json.loads(zlib.decompress(base64.b64decode(body)))
+            if "c7n:payload" in message:
+                message = self.get_spilled_message(message["c7n:payload"])
 
             if parallel:
                 process_pool.apply_async(
@@ -135,6 +137,12 @@ class MailerSqsQueueProcessor(MessageTargetMixin):
         self.logger.info("No messages left on the queue, exiting c7n_mailer.")
         return
 
+    def get_spilled_message(self, payload):
+        """Retrieve a message that custodian stored in s3 as too large to send."""
+        bucket, key = payload[5:].split("/", 1)
+        body = self.session.client("s3").get_object(Bucket=bucket, Key=key)["Body"].read()
+        return json.loads(zlib.decompress(base64.b64decode(body)))
+
     # This function when processing sqs messages will only deliver messages over email or sns
     # If you explicitly declare which tags are aws_usernames (synonymous with ldap uids)
     # in the ldap_uid_tags section of your mailer.yml, we'll do a lookup of those emails
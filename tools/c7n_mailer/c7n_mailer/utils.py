@@ -178,11 +178,24 @@ def format_struct(evt):
     return json.dumps(evt, indent=2, ensure_ascii=False)
 
 
+# tag maps of recently rendered resources, keyed by id of their tag list.
+_tag_maps = {}
+_tag_maps_size = 1024
+
+
 def get_resource_tag_value(resource, k):
-    for t in resource.get('Tags', []):
-        if t['Key'] == k:
-            return t['Value']
-    return ''
+    tags = resource.get('Tags') or ()
+    entry = _tag_maps.get(id(tags))
+    # entries keep a reference to the tags, so their id stays unique, and
+    # are rebuilt when tags are added.
+    if entry is None or entry[0] is not tags or entry[1] != len(tags):
+        if len(_tag_maps) >= _tag_maps_size:
+            _tag_maps.clear()
+        tag_map = {}
+        for t in tags:
+            tag_map.setdefault(t['Key'], t['Value'])
+        entry = _tag_maps[id(tags)] = (tags, len(tags), tag_map)
+    return entry[2].get(k, '')
 
 
 def strip_prefix(value, prefix):
@@ -2,9 +2,17 @@
 # SPDX-License-Identifier: Apache-2.0
 # -*- coding: utf-8 -*-
 import argparse
+import base64
+import io
+import json
 import unittest
 import logging
+import zlib
+
 import boto3
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+from mock import MagicMock
 
 from c7n_mailer import replay
 from c7n_mailer import handle
@@ -13,6 +21,7 @@ from c7n_mailer import cli
 from c7n_mailer import deploy
 from c7n_mailer.azure_mailer import azure_queue_processor
 from c7n_mailer.gcp_mailer import gcp_queue_processor
+from c7n.actions.notify import Notify
 from c7n.mu import PythonPackageArchive
 from common import MAILER_CONFIG, MAILER_CONFIG_GCP, MAILER_CONFIG_AZURE
 
@@ -45,6 +54,38 @@ class AWSMailerTests(unittest.TestCase):
             mailer_sqs_queue_processor.__class__, sqs_queue_processor.MailerSqsQueueProcessor
         )
 
+    def test_sqs_queue_processor_spilled_message(self):
+        message = {
+            "account_id": "644160558196", "region": "us-east-1",
+            "policy": {"name": "big", "resource": "ec2"},
+            "resources": [{"InstanceId": "i-%d" % i} for i in range(3)]}
+        notify = Notify({"type": "notify", "transport": {
+            "type": "sqs", "queue": "mailer", "s3_spill": "s3://spill-bucket/notify"}})
+        notify.manager = MagicMock(data={"name": "big"})
+        notify.manager.ctx.execution_id = "exec-1"
+        sender = MagicMock()
+        notify.get_client = lambda service, region: sender
+        spilled = notify.spill_message(message, notify.pack(message))
+        stored = sender.put_object.call_args[1]
+
+        s3 = boto3.Session(
+            region_name="us-east-1", aws_access_key_id="xyz",
+            aws_secret_access_key="abc").client("s3")
+        stubber = Stubber(s3)
+        stubber.add_response(
+            "get_object",
+            {"Body": StreamingBody(io.BytesIO(stored["Body"]), len(stored["Body"]))},
+            {"Bucket": "spill-bucket", "Key": stored["Key"]})
+        stubber.activate()
+        processor = sqs_queue_processor.MailerSqsQueueProcessor(
+            MAILER_CONFIG, MagicMock(client=lambda service: s3), logging.getLogger("c7n_mailer"))
+
+        pointer = json.loads(zlib.decompress(base64.b64decode(spilled)))
+        self.assertEqual(
+            pointer["c7n:payload"], "s3://spill-bucket/%s" % stored["Key"])
+        self.assertEqual(processor.get_spilled_message(pointer["c7n:payload"]), message)
+        stubber.assert_no_pending_responses()
+
     def test_azure_queue_processor(self):
         processor = azure_queue_processor.MailerAzureQueueProcessor(
             MAILER_CONFIG_AZURE, logging.getLogger("c7n_mailer")
@@ -68,6 +68,16 @@ class GetResourceTagTargets(unittest.TestCase):
         self.assertEqual(utils.get_resource_tag_targets(r, ["Creator"]), ["Bob"])
 
 
+class GetResourceTagValue(unittest.TestCase):
+    def test_tag_value(self):
+        r = {"Tags": [{"Key": "Creator", "Value": "alice"}]}
+        self.assertEqual(utils.get_resource_tag_value(r, "Creator"), "alice")
+        self.assertEqual(utils.get_resource_tag_value(r, "Owner"), "")
+        r["Tags"].append({"Key": "Owner", "Value": "bob"})
+        self.assertEqual(utils.get_resource_tag_value(r, "Owner"), "bob")
+        self.assertEqual(utils.get_resource_tag_value({}, "Owner"), "")
+
+
 class ResourceFormat(unittest.TestCase):
     def test_efs(self):
         self.assertEqual(
@@ -14,8 +14,11 @@ from datetime import timedelta, datetime
 
 import multiprocessing
 from concurrent.futures import (
+    FIRST_COMPLETED,
     ProcessPoolExecutor,
-    as_completed)
+    as_completed,
+    wait)
+import json
 import yaml
 
 from botocore.compat import OrderedDict
@@ -23,12 +26,14 @@ from botocore.exceptions import ClientError
 import click
 import jsonschema
 
+from c7n.cache import snapshot_scope
 from c7n.credentials import assumed_session, SessionFactory
 from c7n.executor import MainThreadExecutor
 from c7n.config import Config
 from c7n.policy import PolicyCollection
 from c7n.provider import get_resource_class
 from c7n.reports.csvout import Formatter, fs_record_set, record_set, strip_output_path
+from c7n.tags import get_universal_tag_types
 from c7n.resources import load_available
 from c7n.utils import CONN_CACHE, dumps, filter_empty, format_string_values
 
@@ -624,7 +629,8 @@ def run_account(account, region, policies_config, output_path,
     success = True
     st = time.time()
 
-    with environ(**env_vars):
+    with environ(**env_vars), snapshot_scope(
+            enabled=bool(cache_period), tag_types=get_universal_tag_types(policies)):
         for p in policies:
             # Extend policy execution conditions with account information
             p.conditions.env_vars['account'] = account
@@ -672,6 +678,82 @@ def run_account(account, region, policies_config, output_path,
     return policy_counts, success
 
 
+def get_run_units(accounts_config, custodian_config, regions, split_policies=False):
+    """Split a run into units of (account, region, policy group, policies config).
+
+    By default a unit is all of the policies in an account region, when
+    splitting policies each resource type's policies are a separate unit,
+    so they still share fetched resources within the unit.
+    """
+    groups = {'*': custodian_config}
+    if split_policies:
+        groups = {}
+        for p in custodian_config.get('policies', ()):
+            groups.setdefault(p['resource'], []).append(p)
+        groups = {
+            rtype: dict(custodian_config, policies=policies)
+            for rtype, policies in groups.items()}
+
+    for a in accounts_config['accounts']:
+        for r in resolve_regions(regions or a.get('regions', ()), a):
+            for group, policies_config in groups.items():
+                yield a, r, group, policies_config
+
+
+def get_unit_key(account, region, group):
+    return "%s:%s:%s" % (account['account_id'], region, group)
+
+
+def load_timings(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except ValueError:
+        log.warning("ignoring invalid timings file %s", path)
+        return {}
+
+
+def save_timings(path, timings):
+    with open(path + '.tmp', 'w') as fh:
+        json.dump(timings, fh, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def schedule_units(w, units, submit, max_workers, account_concurrency=0, timings=None):
+    """Execute units of work, longest first, with a per account concurrency cap.
+
+    Units are handed to the executor only as workers become free, so idle
+    workers pick up the next longest pending unit. Units without a recorded
+    duration are assumed to be long. Yields (unit, future, duration) as
+    units complete.
+    """
+    timings = timings or {}
+    pending = sorted(
+        units, key=lambda u: -timings.get(get_unit_key(*u[:3]), float('inf')))
+    running, account_running = {}, Counter()
+
+    while pending or running:
+        idx, capped = 0, []
+        while idx < len(pending) and len(running) < max_workers:
+            u = pending[idx]
+            idx += 1
+            account_id = u[0]['account_id']
+            if account_concurrency and account_running[account_id] >= account_concurrency:
+                capped.append(u)
+                continue
+            account_running[account_id] += 1
+            running[submit(w, u)] = (u, time.time())
+        pending = capped + pending[idx:]
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for f in done:
+            u, started = running.pop(f)
+            account_running[u[0]['account_id']] -= 1
+            yield u, f, time.time() - started
+
+
 @cli.command(name='run')
 @click.option('-c', '--config', required=True, help="Accounts config file")
 @click.option("-u", "--use", required=True)
@@ -696,9 +778,17 @@ def run_account(account, region, policies_config, output_path,
 @click.option('--debug', default=False, is_flag=True)
 @click.option('-v', '--verbose', default=False, help="Verbose", is_flag=True)
 @click.option('--worker', default=0, type=int)
+@click.option('--split-policies', default=False, is_flag=True,
+              help="Run each resource type's policies as a separate unit of work")
+@click.option('--account-concurrency', default=0, type=int,
+              help="Max concurrent units of work per account (default unlimited)")
+@click.option('--timings', default=None, type=click.Path(),
+              help="Unit durations file used to run the longest units first "
+                   "(default CACHE_PATH/timings.json)")
 def run(config, use, output_dir, accounts, not_accounts, tags, region,
         policy, policy_tags, cache_period, cache_path, metrics,
-        dryrun, debug, verbose, worker, metrics_uri):
+        dryrun, debug, verbose, worker, metrics_uri, split_policies,
+        account_concurrency, timings):
     """run a custodian policy across accounts"""
     accounts_config, custodian_config, executor = init(
         config, use, debug, verbose, accounts, tags, policy, policy_tags=policy_tags,
@@ -713,25 +803,28 @@ def run(config, use, output_dir, accounts, not_accounts, tags, region,
         cache_path = os.path.expanduser("~/.cache/c7n-org")
         if not os.path.exists(cache_path):
             os.makedirs(cache_path)
-    if worker:
-        log.warning("--worker does not apply to the run command at the moment")
-    with executor(max_workers=WORKER_COUNT) as w:
-        futures = {}
-        for a in accounts_config['accounts']:
-            for r in resolve_regions(region or a.get('regions', ()), a):
-                futures[w.submit(
-                    run_account,
-                    a, r,
-                    custodian_config,
-                    output_dir,
-                    cache_period,
-                    cache_path,
-                    metrics,
-                    dryrun,
-                    debug)] = (a, r)
-
-        for f in as_completed(futures):
-            a, r = futures[f]
+    timings_path = timings or os.path.join(cache_path, 'timings.json')
+    timings = load_timings(timings_path)
+    units = get_run_units(accounts_config, custodian_config, region, split_policies)
+
+    def submit(w, unit):
+        a, r, group, policies_config = unit
+        return w.submit(
+            run_account,
+            a, r,
+            policies_config,
+            output_dir,
+            cache_period,
+            cache_path,
+            metrics,
+            dryrun,
+            debug)
+
+    max_workers = worker or WORKER_COUNT
+    with executor(max_workers=max_workers) as w:
+        for (a, r, group, _), f, duration in schedule_units(
+                w, units, submit, max_workers, account_concurrency, timings):
+            timings[get_unit_key(a, r, group)] = round(duration, 2)
             if f.exception():
                 if debug:
                     raise
@@ -747,6 +840,11 @@ def run(config, use, output_dir, accounts, not_accounts, tags, region,
             if not account_region_success:
                 success = False
 
+    try:
+        save_timings(timings_path, timings)
+    except OSError as e:
+        log.warning("unable to save timings %s: %s", timings_path, e)
+
     log.info("Policy resource counts %s" % policy_counts)
 
     if not success:
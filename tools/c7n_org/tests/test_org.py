@@ -1,12 +1,14 @@
 # Copyright The Cloud Custodian Authors.
 # SPDX-License-Identifier: Apache-2.0
 import copy
+import json
 import mock
 import os
 
 import pytest
 import yaml
 
+from c7n.executor import MainThreadExecutor
 from c7n.testing import TestUtils
 from click.testing import CliRunner
 
@@ -177,6 +179,54 @@ class OrgTest(TestUtils):
             log_output.getvalue().strip(),
             "Policy resource counts Counter({'compute': 96, 'serverless': 48})")
 
+    def test_cli_run_split_policies(self):
+        run_dir = self.setup_run_dir()
+        run_account = mock.MagicMock()
+        run_account.return_value = ({}, True)
+        self.patch(org, 'logging', mock.MagicMock())
+        self.patch(org, 'run_account', run_account)
+        self.change_cwd(run_dir)
+        runner = CliRunner()
+        result = runner.invoke(
+            org.cli,
+            ['run', '-c', 'accounts.yml', '-u', 'policies.yml', '--debug',
+             '-s', 'output', '--cache-path', 'cache', '--split-policies',
+             '-r', 'us-east-1', '--account-concurrency', '1', '--worker', '2'],
+            catch_exceptions=False)
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(
+            sorted((c[0][0]['name'], [p['name'] for p in c[0][2]['policies']])
+                   for c in run_account.call_args_list),
+            [('dev', ['compute']), ('dev', ['serverless']),
+             ('qa', ['compute']), ('qa', ['serverless'])])
+        with open(os.path.join(run_dir, 'cache', 'timings.json')) as fh:
+            self.assertEqual(
+                sorted(json.load(fh)),
+                ['002244668899:us-east-1:aws.ec2', '002244668899:us-east-1:aws.lambda',
+                 '112233445566:us-east-1:aws.ec2', '112233445566:us-east-1:aws.lambda'])
+
+    def test_schedule_units(self):
+        accounts = [{'account_id': 'a'}, {'account_id': 'b'}]
+        units = [(accounts[0], 'us-east-1', g, {}) for g in ('x', 'y', 'z')]
+        units.append((accounts[1], 'us-east-1', 'x', {}))
+        timings = {'a:us-east-1:x': 1, 'a:us-east-1:y': 30, 'b:us-east-1:x': 10}
+        submitted = []
+
+        def submit(w, unit):
+            submitted.append(org.get_unit_key(*unit[:3]))
+            return w.submit(lambda: None)
+
+        with MainThreadExecutor() as w:
+            completed = [
+                org.get_unit_key(*u[:3]) for u, f, duration in org.schedule_units(
+                    w, units, submit, 2, account_concurrency=1, timings=timings)]
+
+        # unknown durations first, then longest first.
+        self.assertEqual(
+            submitted,
+            ['a:us-east-1:z', 'b:us-east-1:x', 'a:us-east-1:y', 'a:us-east-1:x'])
+        self.assertEqual(sorted(completed), sorted(submitted))
+
     def test_filter_policies(self):
         d = {'policies': [
             {'name': 'find-ml',
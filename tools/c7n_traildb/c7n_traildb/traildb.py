@@ -11,15 +11,10 @@ import math
 from multiprocessing import cpu_count, Pool
 from c7n.credentials import SessionFactory
 import os
-import tempfile
+import re
 import time
 import sqlite3
 
-try:
-    from cStringIO import StringIO
-except ImportError:
-    from io import BytesIO as StringIO
-
 from botocore.client import Config
 
 
@@ -50,7 +45,10 @@ def chunks(iterable, size=50):
 
 def process_trail_set(
         object_set, map_records, reduce_results=None, trail_bucket=None):
+    """Process a set of trail objects, returning their keys and results.
 
+    Objects are decompressed as they're read from s3.
+    """
     session_factory = SessionFactory(
         options.region, options.profile, options.assume_role)
 
@@ -60,23 +58,66 @@ def process_trail_set(
     previous = None
     for o in object_set:
         body = s3.get_object(Key=o['Key'], Bucket=trail_bucket)['Body']
-        fh = GzipFile(fileobj=StringIO(body.read()))
-        data = json.load(fh)
-        s = map_records(data['Records'])
+        with GzipFile(fileobj=body) as fh:
+            records = json.load(fh)['Records']
+        s = map_records(records)
         if reduce_results:
             previous = reduce_results(s, previous)
-    return previous
+    return [o['Key'] for o in object_set], previous
+
+
+def get_field_column(field):
+    return field.replace('.', '_')
+
+
+def get_field(record, field):
+    for part in field.split('.'):
+        if not isinstance(record, dict):
+            return None
+        record = record.get(part)
+    return record
 
 
 class TrailDB:
+    """Sqlite store of trail events.
+
+    Events are indexed on date, name and user once loaded, and the trail
+    objects stored are recorded so that loading a prefix again only
+    processes new objects.
+
+    The filters and fields events were loaded with are recorded as well,
+    and loading with others is refused, as the objects already stored
+    would be skipped.
+    """
+
+    indexes = ('event_date', 'event_name', 'user_id')
 
-    def __init__(self, path):
+    def __init__(self, path, load_options=None):
         self.path = path
+        self.load_options = load_options or {}
         self.conn = sqlite3.connect(self.path)
         self.cursor = self.conn.cursor()
         self._init()
 
     def _init(self):
+        # we're a bulk load of data we can fetch again, trade durability
+        # for write speed.
+        self.cursor.execute('pragma journal_mode = wal')
+        self.cursor.execute('pragma synchronous = off')
+
+        self.cursor.execute(
+            'create table if not exists load_options (options text)')
+        self.cursor.execute('select options from load_options')
+        row = self.cursor.fetchone()
+        load_options = dump(self.load_options)
+        if row is None:
+            self.cursor.execute(
+                'insert into load_options values (?)', (load_options,))
+        elif load(row[0]) != self.load_options:
+            raise ValueError(
+                "%s was loaded with options %s, use a new output db for %s" % (
+                    self.path, row[0], load_options))
+
         command = '''
            create table if not exists events (
               event_date   datetime,
@@ -91,12 +132,20 @@ class TrailDB:
 
         if options.field:
             for field in options.field:
-                command += ",\n{}    text".format(field)
+                command += ',\n"{}"    text'.format(get_field_column(field))
 
         command += ')'
         self.cursor.execute(command)
+        self.cursor.execute(
+            'create table if not exists objects (key varchar(1024) primary key)')
+
+    def get_objects(self, prefix):
+        self.cursor.execute(
+            'select key from objects where key >= ? and key < ?',
+            (prefix, prefix + '\uffff'))
+        return {k for k, in self.cursor.fetchall()}
 
-    def insert(self, records):
+    def insert(self, records, keys=()):
         command = "insert into events values (?, ?, ?, ?, ?, ?, ?, ?, ?"
 
         if options.field:
@@ -104,6 +153,15 @@ class TrailDB:
 
         command += ")"
         self.cursor.executemany(command, records)
+        self.cursor.executemany(
+            'insert or ignore into objects values (?)', [(k,) for k in keys])
+
+    def index(self):
+        # indexes are built after loading, rather than maintained per insert.
+        for column in self.indexes:
+            self.cursor.execute(
+                'create index if not exists events_{0} on events ({0})'.format(column))
+        self.conn.commit()
 
     def flush(self):
         self.conn.commit()
@@ -146,8 +204,7 @@ def process_records(records,
                     uid_filter=None,
                     event_filter=None,
                     service_filter=None,
-                    not_service_filter=None,
-                    data_dir=None):
+                    not_service_filter=None):
 
     user_records = []
     for r in records:
@@ -187,26 +244,17 @@ def process_records(records,
         # Field names are Case Sensitive.
         if options.field:
             for field in options.field:
-                user_record += (json.dumps(r[field]), )
+                user_record += (json.dumps(get_field(r, field)), )
 
         user_records.append(user_record)
 
-    if data_dir:
-        if not user_records:
-            return
-        # Spool to temporary files to get out of mem
-        fh = tempfile.NamedTemporaryFile(dir=data_dir, delete=False, mode='w')
-        fh.write(dump(user_records))
-        fh.flush()
-        fh.close()
-        return [fh.name]
     return user_records
 
 
 def process_bucket(
         bucket_name, prefix,
         output=None, uid_filter=None, event_filter=None,
-        service_filter=None, not_service_filter=None, data_dir=None):
+        service_filter=None, not_service_filter=None):
 
     session_factory = SessionFactory(
         options.region, options.profile, options.assume_role)
@@ -214,7 +262,12 @@ def process_bucket(
     s3 = session_factory().client(
         's3', config=Config(signature_version='s3v4'))
 
-    paginator = s3.get_paginator('list_objects')
+    db = TrailDB(output, {
+        'user': uid_filter, 'event': event_filter, 'source': service_filter,
+        'not_source': not_service_filter, 'field': options.field or []})
+    loaded = db.get_objects(prefix)
+
+    paginator = s3.get_paginator('list_objects_v2')
     # PyPy has some memory leaks.... :-(
     pool = Pool(maxtasksperchild=10)
     t = time.time()
@@ -229,52 +282,52 @@ def process_bucket(
         uid_filter=uid_filter,
         event_filter=event_filter,
         service_filter=service_filter,
-        not_service_filter=not_service_filter,
-        data_dir=data_dir)
+        not_service_filter=not_service_filter)
 
     object_processor = partial(
         process_trail_set,
         map_records=record_processor,
         reduce_results=reduce_records,
         trail_bucket=bucket_name)
-    db = TrailDB(output)
 
-    bsize = math.ceil(1000 / float(cpu_count()))
+    # small batches keep workers busy, as results are stored as they complete.
+    bsize = math.ceil(100 / float(cpu_count()))
     for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
-        objects = page.get('Contents', ())
+        objects = [o for o in page.get('Contents', ()) if o['Key'] not in loaded]
         object_count += len(objects)
         object_size += sum([o['Size'] for o in objects])
 
         pt = time.time()
         if pool:
-            results = pool.map(object_processor, chunks(objects, bsize))
+            results = pool.imap_unordered(object_processor, chunks(objects, bsize))
         else:
             results = map(object_processor, chunks(objects, bsize))
 
-        st = time.time()
-        log.info("Loaded page time:%0.2fs", st - pt)
-
-        for r in results:
-            for fpath in r:
-                with open(fpath) as fh:
-                    db.insert(load(fh.read()))
-                os.remove(fpath)
+        # store each object set's records and keys together, so an
+        # interrupted load resumes with the objects not yet stored.
+        for keys, records in results:
+            db.insert(records or (), keys)
             db.flush()
 
         l = t # NOQA
         t = time.time()
 
-        log.info("Stored page time:%0.2fs", t - st)
+        log.info("Loaded and stored page time:%0.2fs", t - pt)
         log.info(
             "Processed paged time:%0.2f size:%s count:%s" % (
                 t - l, object_size, object_count))
         if objects:
             log.info('Last Page Key: %s', objects[-1]['Key'])
 
+    it = time.time()
+    db.index()
+    log.info("Indexed events time:%0.2fs", time.time() - it)
+
 
 def get_bucket_path(options):
     prefix = "AWSLogs/%(account)s/CloudTrail/%(region)s/" % {
         'account': options.account, 'region': options.region}
+    date_prefix = None
     if options.prefix:
         prefix = "%s/%s" % (options.prefix.strip('/'), prefix)
     if options.day:
@@ -299,7 +352,6 @@ def setup_parser():
     parser.add_argument("--not-source")
     parser.add_argument("--day")
     parser.add_argument("--month")
-    parser.add_argument("--tmpdir", default="/tmp/traildb")
     parser.add_argument("--region", default="us-east-1")
     parser.add_argument("--output", default="results.db")
     parser.add_argument(
@@ -308,12 +360,18 @@ def setup_parser():
     parser.add_argument(
         "--assume", default=None, dest="assume_role",
         help="Role to assume")
-    parser.add_argument('--field', action='append',
-        help='additonal fields that can be added to each record',
-        choices=['userIdentity', 'requestParameters', 'responseElements'])
+    parser.add_argument('--field', action='append', type=field_name,
+        help=('additonal fields that can be added to each record, ie. '
+              'userIdentity, requestParameters or userIdentity.accountId'))
     return parser
 
 
+def field_name(value):
+    if not re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*(\.[a-zA-Z_][a-zA-Z0-9_]*)*$', value):
+        raise argparse.ArgumentTypeError("invalid field name %s" % value)
+    return value
+
+
 def main():
     logging.basicConfig(level=logging.DEBUG)
     logging.getLogger('botocore').setLevel(logging.WARNING)
@@ -322,8 +380,6 @@ def main():
     parser = setup_parser()
     options = parser.parse_args()
 
-    if options.tmpdir and not os.path.exists(options.tmpdir):
-        os.makedirs(options.tmpdir)
     prefix = get_bucket_path(options)
 
     process_bucket(
@@ -333,8 +389,7 @@ def main():
         options.user,
         options.event,
         options.source,
-        options.not_source,
-        options.tmpdir
+        options.not_source
     )
 
 
@@ -0,0 +1,148 @@
+# Copyright The Cloud Custodian Authors.
+# SPDX-License-Identifier: Apache-2.0
+import argparse
+import gzip
+import io
+import json
+import os
+import sqlite3
+
+import boto3
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+
+from c7n.testing import TestUtils
+
+from c7n_traildb import traildb
+
+
+PREFIX = 'AWSLogs/644160558196/CloudTrail/us-east-1/2024/03/01/'
+
+
+def get_record(name, user='alice', bucket='logs', **kw):
+    record = {
+        'eventTime': '2024-03-01T10:00:00Z',
+        'eventName': name,
+        'eventSource': 's3.amazonaws.com',
+        'sourceIPAddress': '10.0.0.1',
+        'requestID': 'req-%s' % name,
+        'userIdentity': {
+            'type': 'IAMUser', 'accountId': '644160558196',
+            'arn': 'arn:aws:iam::644160558196:user/%s' % user},
+        'requestParameters': {'bucketName': bucket}}
+    record.update(kw)
+    return record
+
+
+class TrailDBTest(TestUtils):
+
+    def setUp(self):
+        self.output = os.path.join(self.get_temp_dir(), 'trail.db')
+        s3 = boto3.Session(
+            region_name='us-east-1', aws_access_key_id='xyz',
+            aws_secret_access_key='abc').client('s3')
+        self.stubber = Stubber(s3)
+        self.stubber.activate()
+
+        class Session:
+            def client(self, service, config=None):
+                return s3
+
+        self.patch(traildb, 'SessionFactory', lambda *args: Session)
+        # objects are processed in process, rather than a worker pool.
+        self.patch(traildb, 'Pool', lambda maxtasksperchild: None)
+
+    def set_options(self, *args):
+        self.patch(traildb, 'options', traildb.setup_parser().parse_args(
+            ['--bucket', 'trails', '--account', '644160558196'] + list(args)))
+
+    def add_objects(self, objects):
+        self.stubber.add_response(
+            'list_objects_v2',
+            {'Contents': [{'Key': PREFIX + k, 'Size': 100} for k in objects],
+             'KeyCount': len(objects)},
+            {'Bucket': 'trails', 'Prefix': PREFIX})
+        for k, records in objects.items():
+            if records is None:
+                continue
+            data = gzip.compress(json.dumps({'Records': records}).encode('utf8'))
+            self.stubber.add_response(
+                'get_object',
+                {'Body': StreamingBody(io.BytesIO(data), len(data))},
+                {'Bucket': 'trails', 'Key': PREFIX + k})
+
+    def load(self):
+        opts = traildb.options
+        traildb.process_bucket(
+            'trails', PREFIX, self.output, opts.user, opts.event,
+            opts.source, opts.not_source)
+        self.stubber.assert_no_pending_responses()
+
+    def query(self, sql):
+        conn = sqlite3.connect(self.output)
+        self.addCleanup(conn.close)
+        return conn.execute(sql).fetchall()
+
+    def test_load_and_resume(self):
+        self.set_options()
+        self.add_objects({
+            'a.json.gz': [get_record('GetObject'), get_record('PutObject')],
+            'b.json.gz': [get_record('DeleteObject', user='bob')]})
+        self.load()
+        self.assertEqual(
+            self.query('select event_name, user_id from events order by event_name'),
+            [('DeleteObject', 'arn:aws:iam::644160558196:user/bob'),
+             ('GetObject', 'arn:aws:iam::644160558196:user/alice'),
+             ('PutObject', 'arn:aws:iam::644160558196:user/alice')])
+        self.assertEqual(
+            self.query('select key from objects order by key'),
+            [(PREFIX + 'a.json.gz',), (PREFIX + 'b.json.gz',)])
+        self.assertEqual(
+            sorted(self.query("select name from sqlite_master where type = 'index'"
+                              " and name like 'events_%'")),
+            [('events_event_date',), ('events_event_name',), ('events_user_id',)])
+
+        # loading again only fetches new objects.
+        self.add_objects({
+            'a.json.gz': None, 'b.json.gz': None,
+            'c.json.gz': [get_record('ListBuckets')]})
+        self.load()
+        self.assertEqual(self.query('select count(*) from events'), [(4,)])
+
+    def test_field_projection(self):
+        self.set_options(
+            '--field', 'requestParameters.bucketName', '--field', 'group',
+            '--field', 'userIdentity.missing.key')
+        self.add_objects({'a.json.gz': [
+            get_record('GetObject', group='admins'),
+            get_record('ListBuckets', requestParameters=None)]})
+        self.load()
+        self.assertEqual(
+            self.query(
+                'select event_name, requestParameters_bucketName, "group",'
+                ' userIdentity_missing_key from events order by event_name'),
+            [('GetObject', '"logs"', '"admins"', 'null'),
+             ('ListBuckets', 'null', 'null', 'null')])
+
+    def test_field_name(self):
+        self.assertEqual(traildb.field_name('order'), 'order')
+        self.assertEqual(
+            traildb.field_name('userIdentity.accountId'), 'userIdentity.accountId')
+        for invalid in ('a-b', 'a..b', '1a', 'a;drop'):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                traildb.field_name(invalid)
+
+    def test_resume_options_differ(self):
+        self.set_options('--user', 'alice')
+        self.add_objects({'a.json.gz': [
+            get_record('GetObject'), get_record('PutObject', user='bob')]})
+        self.load()
+        self.assertEqual(self.query('select event_name from events'), [('GetObject',)])
+
+        # a load with other filters or fields would skip the stored objects.
+        self.set_options('--user', 'bob')
+        with self.assertRaises(ValueError):
+            self.load()
+        self.set_options('--user', 'alice', '--field', 'requestParameters')
+        with self.assertRaises(ValueError):
+            self.load()